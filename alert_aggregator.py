@@ -0,0 +1,287 @@
+"""
+Real-Time Auction Tracker: High-Bid Alert Aggregator
+This module coalesces high-bid alerts per item type over a flush interval and sends one digest
+email per item type, with dedupe of identical alerts and a rate limit on outgoing emails. Bidders
+flagged for flooding a lot, and lots whose auctions closed, are collected into separate digests
+per item type.
+"""
+
+import logging
+import threading
+import time
+
+# Seconds between digest flushes
+FLUSH_INTERVAL = 60.0
+
+# Maximum digest emails sent per minute (across all item types)
+MAX_EMAILS_PER_MINUTE = 10
+
+# Number of highest bids listed in a digest email
+DIGEST_TOP_BIDS = 5
+
+
+class AlertDigest:
+    """Running summary of the high bids for one item type within the current window."""
+
+    def __init__(self, item_type: str):
+        self.item_type = item_type
+        self.count = 0
+        self.max_bid = None
+        self.first_timestamp = None
+        self.latest_timestamp = None
+        self.top_bids = []  # (bid_amount, timestamp), highest first
+
+    def add(self, bid_amount: float, timestamp: str):
+        """Fold one high bid into the digest."""
+        self.count += 1
+        if self.max_bid is None or bid_amount > self.max_bid:
+            self.max_bid = bid_amount
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.latest_timestamp = timestamp
+        if len(self.top_bids) < DIGEST_TOP_BIDS or bid_amount > self.top_bids[-1][0]:
+            self.top_bids.append((bid_amount, timestamp))
+            self.top_bids.sort(key=lambda bid: bid[0], reverse=True)
+            del self.top_bids[DIGEST_TOP_BIDS:]
+
+    def to_email(self):
+        """
+        Formats the digest as an email.
+
+        Returns:
+            tuple: (subject, body)
+        """
+        if self.count == 1:
+            subject = f"High Bid Alert: {self.item_type.capitalize()} - ${self.max_bid}"
+            body = f"A high bid of ${self.max_bid} was placed on {self.item_type} at {self.latest_timestamp}."
+            return subject, body
+
+        subject = f"High Bid Digest: {self.item_type.capitalize()} - {self.count} bids, max ${self.max_bid}"
+        lines = [
+            f"{self.count} high bids were placed on {self.item_type}.",
+            f"Highest bid: ${self.max_bid}",
+            f"First bid at: {self.first_timestamp}",
+            f"Latest bid at: {self.latest_timestamp}",
+            "",
+            "Top bids:",
+        ]
+        lines.extend(f"  ${bid_amount} at {timestamp}" for bid_amount, timestamp in self.top_bids)
+        return subject, "\n".join(lines)
+
+
+class FloodDigest:
+    """Bidders flagged for flooding lots of one item type within the current window."""
+
+    def __init__(self, item_type: str):
+        self.item_type = item_type
+        self.count = 0
+        self.flagged = []  # (bids, bidder_id, lot_id, timestamp), most bids first
+
+    def add(self, bidder_id: str, lot_id: int, bids: int, timestamp: str):
+        """Fold one flagged bidder into the digest."""
+        self.count += 1
+        if len(self.flagged) < DIGEST_TOP_BIDS or bids > self.flagged[-1][0]:
+            self.flagged.append((bids, bidder_id, lot_id, timestamp))
+            self.flagged.sort(key=lambda entry: entry[0], reverse=True)
+            del self.flagged[DIGEST_TOP_BIDS:]
+
+    def to_email(self):
+        """
+        Formats the digest as an email.
+
+        Returns:
+            tuple: (subject, body)
+        """
+        subject = f"Bid Flood Alert: {self.item_type.capitalize()} - {self.count} bidder(s) flagged"
+        lines = [f"{self.count} bidder(s) placed an unusual number of bids on a single {self.item_type} lot.", ""]
+        lines.extend(f"  Bidder {bidder_id} on lot {lot_id}: {bids} bids by {timestamp}"
+                     for bids, bidder_id, lot_id, timestamp in self.flagged)
+        return subject, "\n".join(lines)
+
+
+class CloseDigest:
+    """Lots of one item type whose auctions closed within the current window."""
+
+    def __init__(self, item_type: str):
+        self.item_type = item_type
+        self.count = 0
+        self.sniped = 0  # Lots whose deadline was extended by late bids
+        self.closed = []  # (price, lot_id, winner, bid_count, extensions, timestamp), highest price first
+
+    def add(self, lot_id: int, winner: str, price: float, bid_count: int, extensions: int, timestamp: str):
+        """Fold one closed lot into the digest."""
+        self.count += 1
+        if extensions:
+            self.sniped += 1
+        price_key = price if price is not None else float('-inf')
+        if len(self.closed) < DIGEST_TOP_BIDS or price_key > self.closed[-1][0]:
+            self.closed.append((price_key, lot_id, winner, bid_count, extensions, timestamp))
+            self.closed.sort(key=lambda entry: entry[0], reverse=True)
+            del self.closed[DIGEST_TOP_BIDS:]
+
+    def to_email(self):
+        """
+        Formats the digest as an email.
+
+        Returns:
+            tuple: (subject, body)
+        """
+        subject = f"Auction Close: {self.item_type.capitalize()} - {self.count} lot(s) closed"
+        lines = [f"{self.count} {self.item_type} lot(s) closed, {self.sniped} extended by last-second bids.", ""]
+        lines.extend(f"  Lot {lot_id}: won by {winner} at ${price} after {bid_count} bids"
+                     f"{f' ({extensions} extensions)' if extensions else ''}, closed {timestamp}"
+                     for price, lot_id, winner, bid_count, extensions, timestamp in self.closed)
+        return subject, "\n".join(lines)
+
+
+class AlertAggregator:
+    """
+    Collects high-bid alerts and hands digests to an alert dispatcher.
+
+    Alerts for the same item type are combined until the next flush. A background thread flushes
+    every flush_interval seconds; digests that would exceed the email rate limit stay pending,
+    collecting further alerts, until a later flush sends them. An alert identical to one already
+    in its item type's pending digest is counted once.
+    """
+
+    def __init__(self, dispatcher, flush_interval: float = FLUSH_INTERVAL,
+                 max_emails_per_minute: int = MAX_EMAILS_PER_MINUTE, logger=None):
+        """
+        Parameters:
+            dispatcher: Object with a submit(subject, body) method (e.g. AlertDispatcher)
+            flush_interval (float): Seconds between digest flushes
+            max_emails_per_minute (int): Rate limit on emails handed to the dispatcher
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.dispatcher = dispatcher
+        self.flush_interval = flush_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Token bucket for the email rate limit
+        self.capacity = max_emails_per_minute
+        self.tokens = float(max_emails_per_minute)
+        self.refill_rate = max_emails_per_minute / 60.0
+        self.last_refill = time.monotonic()
+
+        self.digests = {}  # item type -> AlertDigest ("<item type> floods" -> FloodDigest, "<item type> closes" -> CloseDigest)
+        self.seen = {}  # item type -> alert keys already counted in its pending digest
+        self.lock = threading.Lock()
+        self.stats = {'alerts': 0, 'duplicates': 0, 'floods': 0, 'closes': 0, 'emails': 0, 'deferred': 0}
+
+        self.stopped = threading.Event()
+        self.flusher = threading.Thread(target=self.run_flusher, name="alert-aggregator", daemon=True)
+        self.flusher.start()
+
+    def add(self, item_type: str, bid_amount: float, timestamp: str, bidder_id: str = None):
+        """
+        Records a high bid for the next digest.
+
+        Parameters:
+            item_type (str): Item type the bid was placed on
+            bid_amount (float): Amount of the bid
+            timestamp (str): Timestamp of the bid
+            bidder_id (str): Bidder identifier, used to recognise identical alerts
+        """
+        key = (bid_amount, timestamp, bidder_id)
+        with self.lock:
+            seen = self.seen.get(item_type)
+            if seen is None:
+                seen = self.seen[item_type] = set()
+            if key in seen:
+                self.stats['duplicates'] += 1
+                return
+            seen.add(key)
+            self.stats['alerts'] += 1
+            digest = self.digests.get(item_type)
+            if digest is None:
+                digest = self.digests[item_type] = AlertDigest(item_type)
+            digest.add(bid_amount, timestamp)
+
+    def add_flood(self, item_type: str, bidder_id: str, lot_id: int, bids: int, timestamp: str):
+        """
+        Records a bidder flagged for flooding a lot for the next digest.
+
+        Parameters:
+            item_type (str): Item type of the lot
+            bidder_id (str): The flagged bidder
+            lot_id (int): The flooded lot (None if the bidder was counted across lots)
+            bids (int): Estimated bids by the bidder on the lot in the current window
+            timestamp (str): Timestamp of the bid that flagged the bidder
+        """
+        key = f"{item_type} floods"
+        with self.lock:
+            self.stats['floods'] += 1
+            digest = self.digests.get(key)
+            if digest is None:
+                digest = self.digests[key] = FloodDigest(item_type)
+            digest.add(bidder_id, lot_id, bids, timestamp)
+
+    def add_close(self, item_type: str, lot_id: int, winner: str, price: float, bid_count: int, extensions: int,
+                  timestamp: str):
+        """
+        Records a lot whose auction closed for the next digest.
+
+        Parameters:
+            item_type (str): Item type of the lot
+            lot_id (int): The closed lot
+            winner (str): Bidder id of the winning bid
+            price (float): The winning (final) bid
+            bid_count (int): Bids placed on the lot in this auction
+            extensions (int): Times late bids extended the deadline
+            timestamp (str): Time the lot closed
+        """
+        key = f"{item_type} closes"
+        with self.lock:
+            self.stats['closes'] += 1
+            digest = self.digests.get(key)
+            if digest is None:
+                digest = self.digests[key] = CloseDigest(item_type)
+            digest.add(lot_id, winner, price, bid_count, extensions, timestamp)
+
+    def take_token(self) -> bool:
+        """Take one email from the rate limit, returning False if none is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def flush(self, force: bool = False):
+        """
+        Send one digest per item type, deferring any the rate limit does not allow yet. A
+        deferred digest stays pending (and keeps its duplicate check) until it is sent.
+
+        Parameters:
+            force (bool): Send every digest regardless of the rate limit
+        """
+        sent = []
+        deferred = []
+        with self.lock:
+            for key in list(self.digests):
+                if force or self.take_token():
+                    sent.append(self.digests.pop(key))
+                    self.seen.pop(key, None)
+                else:
+                    deferred.append(key)
+                    self.stats['deferred'] += 1
+
+        for digest in sent:
+            subject, body = digest.to_email()
+            self.dispatcher.submit(subject, body)
+            self.stats['emails'] += 1
+        if deferred:
+            self.logger.warning(f"Email rate limit reached. Deferred digests for: {', '.join(deferred)}")
+
+    def run_flusher(self):
+        """Background loop that flushes digests every flush_interval seconds."""
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stops the flusher and sends whatever is pending, ignoring the rate limit."""
+        self.stopped.set()
+        self.flusher.join()
+        self.flush(force=True)
+        self.logger.info(f"Alert aggregator stats: {self.stats}")
@@ -0,0 +1,213 @@
+"""
+Real-Time Auction Tracker: Non-Blocking Email Alert Dispatcher
+This module queues email alerts in-process and sends them from background worker threads that
+each keep a long-lived, authenticated SMTP session open, so consumers never wait on the mail server.
+"""
+
+import logging
+import queue
+import smtplib
+import threading
+import time
+
+from emailer import loadEmailConfig, buildEmailMessage
+
+# Maximum number of alerts waiting to be sent before new alerts are dropped
+ALERT_QUEUE_SIZE = 1000
+
+# Number of worker threads (each holds its own SMTP session)
+WORKER_COUNT = 1
+
+# Attempts to send one alert (reconnecting in between) before giving up on it
+SEND_ATTEMPTS = 3
+
+# Seconds to wait before reconnecting after a failed connection
+RECONNECT_DELAY = 2.0
+
+# Config keys every alert needs (the password is optional, for SMTP sinks without login)
+REQUIRED_KEYS = ('outgoing_email_host', 'outgoing_email_port', 'outgoing_email_address', 'receiver_email_address')
+
+# Marker put on the queue to tell a worker to shut down
+_STOP = object()
+
+
+class AlertDispatcher:
+    """
+    Sends email alerts asynchronously through persistent SMTP sessions.
+
+    The outgoing email config is read once when the dispatcher is created; if it cannot be read
+    or lacks a required key, the error is logged and alerts are disabled (counted and discarded) so the consumer keeps
+    running. Alerts submitted with submit() go onto a bounded queue and never block the caller; if
+    the queue is full the alert is dropped and counted.
+    """
+
+    def __init__(self, config: dict = None, config_path: str = ".env.toml",
+                 queue_size: int = ALERT_QUEUE_SIZE, worker_count: int = WORKER_COUNT,
+                 send_attempts: int = SEND_ATTEMPTS, reconnect_delay: float = RECONNECT_DELAY,
+                 logger=None):
+        """
+        Parameters:
+            config (dict): Outgoing email config (read from config_path if not given)
+            config_path (str): Path to the TOML config file
+            queue_size (int): Maximum number of queued alerts
+            worker_count (int): Number of sender threads
+            send_attempts (int): Attempts per alert before it is dropped
+            reconnect_delay (float): Seconds to wait before reconnecting after a failure
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.send_attempts = send_attempts
+        self.reconnect_delay = reconnect_delay
+        self.logger = logger or logging.getLogger(__name__)
+        if config is None:
+            try:
+                config = loadEmailConfig(config_path)
+            except (OSError, ValueError) as e:  # Missing, unreadable or invalid TOML
+                self.logger.error(f"Email alerts disabled: could not read the email config {config_path} ({e}).")
+        if config is not None:
+            missing = [key for key in REQUIRED_KEYS if key not in config]
+            if missing:
+                self.logger.error(f"Email alerts disabled: the email config is missing {', '.join(missing)}.")
+                config = None
+        self.config = config or {}
+        self.enabled = config is not None
+
+        # Optional keys let the dispatcher talk to a local SMTP sink without TLS or login
+        self.use_tls = self.config.get("outgoing_email_use_tls", True)
+        self.use_login = bool(self.config.get("outgoing_email_password"))
+
+        self.alerts = queue.Queue(maxsize=queue_size)
+        self.stats = {'queued': 0, 'sent': 0, 'dropped': 0, 'failed': 0, 'connects': 0, 'disabled': 0}
+        self.stats_lock = threading.Lock()
+
+        self.workers = []
+        for number in range(worker_count if self.enabled else 0):
+            worker = threading.Thread(target=self.run_worker, name=f"alert-dispatcher-{number}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, email_subject: str, email_body: str) -> bool:
+        """
+        Queues an email alert without blocking.
+
+        Parameters:
+            email_subject (str): Subject line of the alert
+            email_body (str): Body text of the alert
+
+        Returns:
+            bool: True if the alert was queued, False if the queue was full or alerts are disabled
+        """
+        if not self.enabled:
+            self.count('disabled')
+            return False
+        try:
+            self.alerts.put_nowait((email_subject, email_body))
+        except queue.Full:
+            self.count('dropped')
+            self.logger.warning(f"Alert queue full. Dropped alert: {email_subject}")
+            return False
+        self.count('queued')
+        return True
+
+    def count(self, key: str):
+        """Increment one of the dispatcher counters."""
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def connect(self):
+        """
+        Opens an SMTP session, starting TLS and logging in as configured.
+
+        Returns:
+            smtplib.SMTP: The connected session
+        """
+        server = smtplib.SMTP(self.config["outgoing_email_host"], self.config["outgoing_email_port"], timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.use_login:
+            server.login(self.config["outgoing_email_address"], self.config["outgoing_email_password"])
+        self.count('connects')
+        self.logger.info(f"SMTP session opened to {self.config['outgoing_email_host']}.")
+        return server
+
+    def disconnect(self, server):
+        """Closes an SMTP session, ignoring errors from a session that is already gone."""
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def run_worker(self):
+        """Worker loop: take alerts off the queue and send them over a persistent session."""
+        server = None
+        while True:
+            alert = self.alerts.get()
+            if alert is _STOP:
+                self.alerts.task_done()
+                break
+            email_subject, email_body = alert
+            try:
+                msg = buildEmailMessage(self.config, email_subject, email_body)
+                for attempt in range(1, self.send_attempts + 1):
+                    try:
+                        if server is None:
+                            server = self.connect()
+                        server.send_message(msg)
+                        self.count('sent')
+                        break
+                    except (smtplib.SMTPException, OSError) as e:
+                        # The session is unusable; drop it and reconnect on the next attempt
+                        self.logger.error(f"Failed to send alert (attempt {attempt}): {e}")
+                        self.disconnect(server)
+                        server = None
+                        if attempt < self.send_attempts:
+                            time.sleep(self.reconnect_delay)
+                else:
+                    self.count('failed')
+            except Exception as e:
+                # Anything else is specific to this alert (or config); never let it stop the worker
+                self.logger.error(f"Failed to send alert {email_subject!r}: {e!r}")
+                self.count('failed')
+                self.disconnect(server)
+                server = None
+            finally:
+                self.alerts.task_done()
+        self.disconnect(server)
+
+    def close(self, timeout: float = None):
+        """
+        Sends any queued alerts, then stops the workers and closes their SMTP sessions. If the
+        queue is still full after timeout seconds (e.g. the mail server is down), the alerts
+        waiting in it are dropped so the workers can be told to stop.
+
+        Parameters:
+            timeout (float): Maximum seconds to wait for the workers to finish (None to wait for all alerts)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for _ in self.workers:
+            try:
+                self.alerts.put(_STOP, timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                self.discard_pending()
+                self.alerts.put_nowait(_STOP)
+        for worker in self.workers:
+            worker.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self.logger.info(f"Alert dispatcher stats: {self.stats}")
+
+    def discard_pending(self):
+        """Drop every alert still waiting on the queue (counted as dropped)."""
+        discarded = 0
+        while True:
+            try:
+                alert = self.alerts.get_nowait()
+            except queue.Empty:
+                break
+            self.alerts.task_done()
+            if alert is _STOP:
+                self.alerts.put_nowait(_STOP)  # Keep stop markers already queued for other workers
+                break
+            discarded += 1
+            self.count('dropped')
+        if discarded:
+            self.logger.warning(f"Alert dispatcher closing: dropped {discarded} unsent alerts.")
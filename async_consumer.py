@@ -0,0 +1,242 @@
+"""
+Real-Time Auction Tracker: Asynchronous Consumer Engine
+This script consumes bids from the auction queues on an asynchronous pika SelectConnection with a
+tuned prefetch count. Successful deliveries are acknowledged cumulatively (multiple=True) once a
+batch fills or a timer fires, while failed deliveries are rejected one by one.
+
+Usage:
+    python async_consumer.py
+"""
+
+import logging
+import time
+
+import pika
+
+from alert_aggregator import AlertAggregator
+from alert_dispatcher import AlertDispatcher
+from bid_codec import BidDecodeError, decode_bid
+from auction_state import AuctionState
+from bid_pipeline import BidPipeline
+from dedupe import IdempotencyCache
+from util_logger import setup_logger
+
+# Configuration for mapping queue names to item types
+QUEUE_CONFIG = {
+    'auction_queue_electronics': 'electronics',
+    'auction_queue_furniture': 'furniture',
+    'auction_queue_art': 'art'
+}
+
+# Maximum unacknowledged deliveries the broker may push to this consumer
+PREFETCH_COUNT = 500
+
+# Send a cumulative ack once this many deliveries have been processed
+ACK_BATCH_SIZE = 100
+
+# Send a cumulative ack at least this often (in seconds) while deliveries are pending
+ACK_INTERVAL = 0.5
+
+# Seconds to wait before reconnecting after the connection drops
+RECONNECT_DELAY = 5.0
+
+# Pipeline configuration: consumer_v4.0's windows, fixed threshold, dedupe and lot state (without its
+# quantile thresholds, flood detection, event-time windows or auction closing)
+WINDOW_SIZE = 5
+WINDOW_SECONDS = None
+BID_THRESHOLD = 800
+ALERT_FLUSH_INTERVAL = 60
+LOG_SAMPLE_EVERY = 100  # Log per-bid lines for 1 in this many bids
+CONSUMER_FIELDS = ('bidder_id', 'bid_amount', 'timestamp_us', 'lot_id')
+DEDUPE_ENTRIES = 100_000  # Deliveries still unacked when the connection drops come back redelivered
+DEDUPE_TTL = 600
+LOT_MAX_IDLE = 3600  # Lot state: only a lot's new high bid can raise an alert
+
+
+class AsyncConsumer:
+    """
+    Event-driven consumer with prefetch and batched acknowledgements.
+
+    Each delivery is decoded and handed to on_bid(item_type, message). Deliveries that succeed
+    are acknowledged together with one basic_ack(multiple=True) for the newest successful tag;
+    a delivery that raises is nacked on its own right away, so a partial failure never acks or
+    rejects its neighbours.
+    """
+
+    def __init__(self, queue_config: dict, on_bid, host: str = 'localhost',
+                 prefetch_count: int = PREFETCH_COUNT, ack_batch_size: int = ACK_BATCH_SIZE,
+                 ack_interval: float = ACK_INTERVAL, fields=CONSUMER_FIELDS, logger=None):
+        """
+        Parameters:
+            queue_config (dict): Queue name -> item type
+            on_bid: Callable(item_type, message) run for every decoded bid
+            host (str): RabbitMQ server hostname
+            prefetch_count (int): basic_qos prefetch count
+            ack_batch_size (int): Processed deliveries that trigger a cumulative ack
+            ack_interval (float): Maximum seconds a processed delivery waits for its ack
+            fields (tuple): Bid fields to decode
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.queue_config = queue_config
+        self.on_bid = on_bid
+        self.parameters = pika.ConnectionParameters(host)
+        self.prefetch_count = prefetch_count
+        # A batch larger than the prefetch window would only ever be flushed by the timer
+        self.ack_batch_size = min(ack_batch_size, prefetch_count) if prefetch_count else ack_batch_size
+        self.ack_interval = ack_interval
+        self.fields = fields
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.connection = None
+        self.channel = None
+        self.consumer_tags = []
+        self.stopping = False
+
+        self.last_ok_tag = None  # Newest successfully processed delivery tag not yet acked
+        self.pending_acks = 0
+        self.stats = {'processed': 0, 'failed': 0, 'acks': 0}
+
+    # Connection and channel setup
+
+    def connect(self):
+        """Open a SelectConnection; setup continues in the callbacks below."""
+        return pika.SelectConnection(
+            parameters=self.parameters,
+            on_open_callback=self.on_connection_open,
+            on_open_error_callback=self.on_connection_open_error,
+            on_close_callback=self.on_connection_closed,
+        )
+
+    def on_connection_open(self, connection):
+        self.logger.info("Connection opened.")
+        connection.channel(on_open_callback=self.on_channel_open)
+
+    def on_connection_open_error(self, connection, error):
+        self.logger.error(f"Connection to RabbitMQ server failed: {error}")
+        connection.ioloop.stop()
+
+    def on_connection_closed(self, connection, reason):
+        self.channel = None
+        if not self.stopping:
+            self.logger.warning(f"Connection closed: {reason}. Reconnecting in {RECONNECT_DELAY} seconds.")
+        connection.ioloop.stop()
+
+    def on_channel_open(self, channel):
+        self.channel = channel
+        self.consumer_tags = []
+        channel.add_on_close_callback(self.on_channel_closed)
+        channel.basic_qos(prefetch_count=self.prefetch_count, callback=self.on_qos_ok)
+
+    def on_channel_closed(self, channel, reason):
+        self.logger.warning(f"Channel closed: {reason}")
+        self.channel = None
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+
+    def on_qos_ok(self, frame):
+        self.logger.info(f"Prefetch count set to {self.prefetch_count}.")
+        for queue_name in self.queue_config:
+            self.channel.queue_declare(queue=queue_name, durable=True,
+                                       callback=lambda frame, queue_name=queue_name: self.start_consuming(queue_name))
+        self.connection.ioloop.call_later(self.ack_interval, self.on_ack_timer)
+
+    def start_consuming(self, queue_name: str):
+        tag = self.channel.basic_consume(queue=queue_name, on_message_callback=self.on_message)
+        self.consumer_tags.append(tag)
+        self.logger.info(f"Consuming {queue_name}.")
+
+    # Message handling and acknowledgements
+
+    def on_message(self, channel, method, properties, body):
+        """Process one delivery, queueing its ack or rejecting it immediately on failure."""
+        try:
+            message = decode_bid(body, properties.content_type, self.fields)
+            self.on_bid(self.queue_config.get(method.routing_key, 'unknown'), message)
+        except BidDecodeError as e:
+            self.reject(method.delivery_tag, f"Failed to decode message: {e}")
+            return
+        except Exception as e:
+            self.reject(method.delivery_tag, f"An error occurred while processing the message: {e}")
+            return
+
+        self.stats['processed'] += 1
+        self.last_ok_tag = method.delivery_tag
+        self.pending_acks += 1
+        if self.pending_acks >= self.ack_batch_size:
+            self.flush_acks()
+
+    def reject(self, delivery_tag: int, reason: str):
+        """Nack a single delivery without requeueing it."""
+        self.logger.error(reason)
+        self.stats['failed'] += 1
+        if self.channel and self.channel.is_open:
+            self.channel.basic_nack(delivery_tag=delivery_tag, multiple=False, requeue=False)
+
+    def flush_acks(self):
+        """Acknowledge every processed delivery up to the newest one with a single frame."""
+        if self.last_ok_tag is None or not (self.channel and self.channel.is_open):
+            return
+        self.channel.basic_ack(delivery_tag=self.last_ok_tag, multiple=True)
+        self.stats['acks'] += 1
+        self.last_ok_tag = None
+        self.pending_acks = 0
+
+    def on_ack_timer(self):
+        """Flush acks on a timer so a quiet queue never holds deliveries unacknowledged."""
+        self.flush_acks()
+        if self.channel and self.channel.is_open:
+            self.connection.ioloop.call_later(self.ack_interval, self.on_ack_timer)
+
+    # Running and stopping
+
+    def run(self):
+        """Consume until stop() is called, reconnecting whenever the connection drops."""
+        while not self.stopping:
+            self.connection = self.connect()
+            try:
+                self.connection.ioloop.start()
+            except KeyboardInterrupt:
+                self.stop()
+                self.connection.ioloop.start()  # Let the close handshake finish
+                break
+            if not self.stopping:
+                self.last_ok_tag = None  # Unacked deliveries are redelivered after a reconnect
+                self.pending_acks = 0
+                time.sleep(RECONNECT_DELAY)
+        self.logger.info(f"Consumer stats: {self.stats}")
+
+    def stop(self):
+        """Ack what has been processed, cancel consumers and close the connection."""
+        self.stopping = True
+        self.flush_acks()
+        if self.channel and self.channel.is_open:
+            for tag in self.consumer_tags:
+                self.channel.basic_cancel(tag)
+            self.channel.close()
+        if self.connection and not self.connection.is_closed:
+            self.connection.close()
+
+
+def main():
+    """Run the asynchronous consumer with the standard bid pipeline and email alerts."""
+    logger, logname = setup_logger(__file__, asynchronous=True, sample_every=LOG_SAMPLE_EVERY)
+    dispatcher = AlertDispatcher(logger=logger)
+    aggregator = AlertAggregator(dispatcher, flush_interval=ALERT_FLUSH_INTERVAL, logger=logger)
+    dedupe = IdempotencyCache(max_entries=DEDUPE_ENTRIES, ttl=DEDUPE_TTL, logger=logger)
+    auction_state = AuctionState(max_idle=LOT_MAX_IDLE, logger=logger)
+    pipeline = BidPipeline(QUEUE_CONFIG.values(), window_size=WINDOW_SIZE, window_seconds=WINDOW_SECONDS,
+                           bid_threshold=BID_THRESHOLD, alert_sink=aggregator, auction_state=auction_state,
+                           dedupe=dedupe, logger=logger)
+    consumer = AsyncConsumer(QUEUE_CONFIG, pipeline.process, logger=logger)
+    logger.info("Starting asynchronous consumer. Waiting for messages...")
+    try:
+        consumer.run()
+    finally:
+        logger.info(f"Dedupe stats: {dedupe.stats}")
+        logger.info(f"Lot state stats: {auction_state.stats}, {len(auction_state)} lots tracked")
+        aggregator.close()
+        dispatcher.close(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Real-Time Auction Tracker: Auction Close Scheduling
+This module closes auction lots at their deadlines. Deadlines live in a hierarchical timing wheel:
+scheduling, moving and cancelling a deadline are O(1) (a dict insert or delete in one slot), and
+advancing the clock costs O(1) per tick plus one cascade per timer per level, however many lots
+are open. A bid close to a lot's deadline extends it (anti-sniping), and each close produces an
+event with the winner, final price and bid count.
+
+All times are bid (event) times, like AuctionState, so replaying recorded bids closes the same lots.
+"""
+
+import logging
+import time
+
+# Seconds a lot stays open after its first bid
+AUCTION_SECONDS = 300.0
+
+# A bid this many seconds or less before the deadline extends it...
+SNIPE_WINDOW = 30.0
+
+# ...to this many seconds after the bid
+SNIPE_EXTENSION = 60.0
+
+# Timer resolution in seconds (a lot closes at most one tick after its deadline)
+TICK_SECONDS = 0.1
+
+# Seconds without a newer bid after which lots close by the clock instead of by bid time
+IDLE_TIMEOUT = 10.0
+
+# Slots per wheel level (as a power of two) and number of levels: 256^4 ticks of 0.1s cover 13 years
+WHEEL_BITS = 8
+WHEEL_LEVELS = 4
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel of keyed deadlines (in the style of Varghese and Lauck).
+
+    Level 0 has one slot per tick; each higher level has slots 2^WHEEL_BITS times as long. A timer
+    is placed on the lowest level whose span covers its distance from now, and is moved down a
+    level (cascaded) when the clock reaches its slot, until it expires from level 0. Timers past
+    the top level's span wait in its slots and are re-placed on every cascade.
+    """
+
+    def __init__(self, tick_seconds: float = TICK_SECONDS, bits: int = WHEEL_BITS, levels: int = WHEEL_LEVELS):
+        """
+        Parameters:
+            tick_seconds (float): Length of a tick in seconds
+            bits (int): log2 of the slots per level
+            levels (int): Number of levels
+        """
+        self.tick_us = int(tick_seconds * 1_000_000)
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.top_bits = bits * (levels - 1)  # Distances of 2^top_bits ticks and more go on the top level
+        self.levels = [[{} for _ in range(1 << bits)] for _ in range(levels)]  # slot -> {key: deadline_us}
+        self.counts = [0] * levels  # Timers per level
+        self.timers = {}  # key -> (level, slot, tick)
+        self.current = None  # Last tick processed
+
+    def __len__(self):
+        return len(self.timers)
+
+    def __contains__(self, key):
+        return key in self.timers
+
+    def schedule(self, key, deadline_us: int):
+        """
+        Sets (or moves) a key's deadline.
+
+        Parameters:
+            key: Any hashable key (e.g. a lot id)
+            deadline_us (int): Epoch microseconds at or after which the key expires
+        """
+        entry = self.timers.get(key)
+        if entry is not None:
+            del self.levels[entry[0]][entry[1]][key]
+            self.counts[entry[0]] -= 1
+        tick = -(-deadline_us // self.tick_us)  # First tick at or after the deadline
+        if self.current is None:
+            self.current = tick - 1
+        elif tick <= self.current:
+            tick = self.current + 1
+        self.place(key, tick, deadline_us)
+
+    def place(self, key, tick: int, deadline_us: int):
+        """Put a timer on the lowest level that spans its distance from the current tick."""
+        level = min(((tick - self.current) | 1).bit_length() - 1, self.top_bits) // self.bits
+        slot = (tick >> (self.bits * level)) & self.mask
+        self.levels[level][slot][key] = deadline_us
+        self.counts[level] += 1
+        self.timers[key] = (level, slot, tick)
+
+    def cancel(self, key) -> bool:
+        """Removes a key's deadline, returning False if it had none."""
+        entry = self.timers.pop(key, None)
+        if entry is None:
+            return False
+        level, slot, _ = entry
+        del self.levels[level][slot][key]
+        self.counts[level] -= 1
+        return True
+
+    def deadline(self, key):
+        """A key's deadline in epoch microseconds (None if it has none)."""
+        entry = self.timers.get(key)
+        if entry is None:
+            return None
+        level, slot, _ = entry
+        return self.levels[level][slot][key]
+
+    def advance(self, now_us: int) -> list:
+        """
+        Moves the clock to now_us and removes every timer whose deadline has passed.
+
+        Parameters:
+            now_us (int): Epoch microseconds
+
+        Returns:
+            list: (key, deadline_us) pairs of the expired timers, earliest tick first
+        """
+        target = now_us // self.tick_us
+        if self.current is None or target <= self.current:
+            return []
+        if not self.timers:
+            self.current = target
+            return []
+        expired = []
+        bits, mask = self.bits, self.mask
+        while self.current < target:
+            if not self.counts[0]:
+                # Nothing on level 0: skip to the tick before the next cascade of the lowest non-empty level
+                level = 1
+                while not self.counts[level]:
+                    level += 1
+                self.current = min(target, self.current | ((1 << (bits * level)) - 1))
+                if self.current == target:
+                    break
+            self.current += 1
+            tick = self.current
+            level = 1
+            while level < len(self.levels) and not tick & ((1 << (bits * level)) - 1):
+                self.cascade(level, (tick >> (bits * level)) & mask)
+                level += 1
+            slot = self.levels[0][tick & mask]
+            if slot:
+                self.levels[0][tick & mask] = {}
+                self.counts[0] -= len(slot)
+                for key, deadline_us in slot.items():
+                    del self.timers[key]
+                    expired.append((key, deadline_us))
+            if not self.timers:
+                self.current = target
+        return expired
+
+    def cascade(self, level: int, slot: int):
+        """Re-place the timers of a higher-level slot whose time has come."""
+        timers = self.levels[level][slot]
+        if not timers:
+            return
+        self.levels[level][slot] = {}
+        self.counts[level] -= len(timers)
+        for key, deadline_us in timers.items():
+            self.place(key, self.timers[key][2], deadline_us)
+
+
+class AuctionCloser:
+    """
+    Close deadlines for every open lot, with anti-sniping extensions.
+
+    A lot's auction opens with its first bid and is scheduled to close auction_seconds later. A
+    bid within snipe_window seconds of the deadline moves it to snipe_extension seconds after the
+    bid. When the deadline passes, the lot is removed from the AuctionState and a close event is
+    returned; a later bid on the same lot opens a new auction.
+    """
+
+    def __init__(self, auction_state, auction_seconds: float = AUCTION_SECONDS, snipe_window: float = SNIPE_WINDOW,
+                 snipe_extension: float = SNIPE_EXTENSION, tick_seconds: float = TICK_SECONDS,
+                 idle_timeout: float = IDLE_TIMEOUT, logger=None):
+        """
+        Parameters:
+            auction_state (AuctionState): Per-lot state holding the high bid, high bidder and bid count
+            auction_seconds (float): Seconds a lot stays open after its first bid
+            snipe_window (float): Seconds before the deadline in which a bid extends it
+            snipe_extension (float): Seconds after such a bid that the new deadline falls
+            tick_seconds (float): Timer resolution in seconds
+            idle_timeout (float): Seconds without a newer bid before poll() closes lots by the clock
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.auction_state = auction_state
+        self.auction_us = int(auction_seconds * 1_000_000)
+        self.snipe_window_us = int(snipe_window * 1_000_000)
+        self.extension_us = int(snipe_extension * 1_000_000)
+        self.idle_timeout = idle_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.wheel = TimerWheel(tick_seconds)
+        self.extensions = {}  # lot id -> deadline extensions so far (only lots that were extended)
+        self.latest_us = None
+        self.last_bid_at = time.monotonic()
+        self.stats = {'opened': 0, 'extended': 0, 'closed': 0}
+
+    def __len__(self):
+        return len(self.wheel)
+
+    def bid(self, lot_id: int, timestamp_us: int) -> list:
+        """
+        Closes lots whose deadline has passed by this bid's time, then opens the bid's lot or
+        extends its deadline. Call before the bid is applied to the AuctionState, so a bid after
+        its lot's deadline opens a new auction instead of changing the closed one.
+
+        Parameters:
+            lot_id (int): The auction lot
+            timestamp_us (int): Epoch microseconds of the bid
+
+        Returns:
+            list: Close events (see close()) for the lots that closed
+        """
+        closed = []
+        if self.latest_us is None or timestamp_us > self.latest_us:
+            self.latest_us = timestamp_us
+            self.last_bid_at = time.monotonic()
+            closed = self.advance(timestamp_us)
+        deadline_us = self.wheel.deadline(lot_id)
+        if deadline_us is None:
+            self.wheel.schedule(lot_id, timestamp_us + self.auction_us)
+            self.stats['opened'] += 1
+        elif deadline_us - timestamp_us <= self.snipe_window_us and timestamp_us + self.extension_us > deadline_us:
+            self.wheel.schedule(lot_id, timestamp_us + self.extension_us)
+            self.extensions[lot_id] = self.extensions.get(lot_id, 0) + 1
+            self.stats['extended'] += 1
+        return closed
+
+    def poll(self, now_us: int = None) -> list:
+        """
+        Closes lots by the clock after idle_timeout seconds without a newer bid, so the last lots
+        close when bids stop arriving.
+
+        Parameters:
+            now_us (int): Current epoch microseconds (defaults to the clock)
+
+        Returns:
+            list: Close events for the lots that closed
+        """
+        if time.monotonic() - self.last_bid_at < self.idle_timeout:
+            return []
+        if now_us is None:
+            now_us = int(time.time() * 1_000_000)
+        return self.advance(now_us)
+
+    def advance(self, now_us: int) -> list:
+        """Close every lot whose deadline is at or before now_us."""
+        return [self.close(lot_id, deadline_us) for lot_id, deadline_us in self.wheel.advance(now_us)]
+
+    def close(self, lot_id: int, deadline_us: int) -> dict:
+        """
+        Finalizes a lot.
+
+        Returns:
+            dict: lot_id, item_type, winner, price, bid_count, extensions and closed_us (None
+            for the fields of a lot the AuctionState no longer holds)
+        """
+        lot = self.auction_state.close(lot_id) or {}
+        self.stats['closed'] += 1
+        return {
+            'lot_id': lot_id,
+            'item_type': lot.get('item_type'),
+            'winner': lot.get('high_bidder'),
+            'price': lot.get('high_bid'),
+            'bid_count': lot.get('bid_count', 0),
+            'extensions': self.extensions.pop(lot_id, 0),
+            'closed_us': deadline_us,
+        }
@@ -0,0 +1,306 @@
+"""
+Real-Time Auction Tracker: Auction State Store
+This module keeps the current state of every auction lot (high bid, high bidder, bid count and a
+decaying bid rate) in a hash map, with indexed heaps over high bid and bid rate so the top K lots
+by either can be read in O(K log K) and every update costs O(log n). Lots with no bids for
+max_idle seconds are evicted in O(1) each, oldest first.
+
+All times are bid (event) times, so replaying recorded bids gives the same state as live traffic.
+"""
+
+import heapq
+import logging
+import math
+from collections import OrderedDict
+
+# Evict lots with no bids for this many seconds
+MAX_IDLE = 3600.0
+
+# Half-life in seconds of the decaying bid count behind each lot's bid rate
+RATE_HALF_LIFE = 60.0
+
+# Check for stale lots at most this often (seconds of bid time)
+SWEEP_INTERVAL = 10.0
+
+
+class IndexedHeap:
+    """
+    Max-heap of (key, item) that also tracks each item's position, so an item's key can be
+    changed or the item removed in O(log n).
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.items = []
+        self.positions = {}  # item -> index in the heap
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def set(self, item, key: float):
+        """Insert item with key, or change the key of an item already in the heap."""
+        index = self.positions.get(item)
+        if index is None:
+            index = len(self.items)
+            self.keys.append(key)
+            self.items.append(item)
+            self.positions[item] = index
+            self.sift_up(index)
+            return
+        old_key = self.keys[index]
+        self.keys[index] = key
+        if key > old_key:
+            self.sift_up(index)
+        elif key < old_key:
+            self.sift_down(index)
+
+    def remove(self, item):
+        """Remove item if present."""
+        index = self.positions.pop(item, None)
+        if index is None:
+            return
+        last_key = self.keys.pop()
+        last_item = self.items.pop()
+        if index < len(self.items):
+            old_key = self.keys[index]
+            self.keys[index] = last_key
+            self.items[index] = last_item
+            self.positions[last_item] = index
+            if last_key > old_key:
+                self.sift_up(index)
+            else:
+                self.sift_down(index)
+
+    def key(self, item) -> float:
+        return self.keys[self.positions[item]]
+
+    def top(self, count: int) -> list:
+        """
+        The count items with the largest keys, largest first, without modifying the heap.
+
+        Returns:
+            list: (key, item) pairs
+        """
+        result = []
+        if not self.items or count <= 0:
+            return result
+        frontier = [(-self.keys[0], 0)]
+        while frontier and len(result) < count:
+            negative_key, index = heapq.heappop(frontier)
+            result.append((-negative_key, self.items[index]))
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(self.items):
+                    heapq.heappush(frontier, (-self.keys[child], child))
+        return result
+
+    def swap(self, first: int, second: int):
+        keys, items = self.keys, self.items
+        keys[first], keys[second] = keys[second], keys[first]
+        items[first], items[second] = items[second], items[first]
+        self.positions[items[first]] = first
+        self.positions[items[second]] = second
+
+    def sift_up(self, index: int):
+        keys = self.keys
+        while index > 0:
+            parent = (index - 1) >> 1
+            if keys[parent] >= keys[index]:
+                break
+            self.swap(parent, index)
+            index = parent
+
+    def sift_down(self, index: int):
+        keys = self.keys
+        size = len(keys)
+        while True:
+            largest = index
+            left = 2 * index + 1
+            right = left + 1
+            if left < size and keys[left] > keys[largest]:
+                largest = left
+            if right < size and keys[right] > keys[largest]:
+                largest = right
+            if largest == index:
+                return
+            self.swap(index, largest)
+            index = largest
+
+
+class LotState:
+    """Current state of one auction lot."""
+
+    __slots__ = ('lot_id', 'item_type', 'high_bid', 'high_bidder', 'high_bid_us', 'bid_count',
+                 'last_bid_us', 'decayed_count')
+
+    def __init__(self, lot_id: int, item_type: str):
+        self.lot_id = lot_id
+        self.item_type = item_type
+        self.high_bid = None
+        self.high_bidder = None
+        self.high_bid_us = 0
+        self.bid_count = 0
+        self.last_bid_us = 0
+        self.decayed_count = 0.0  # Exponentially decayed bid count as of last_bid_us
+
+    def to_dict(self) -> dict:
+        return {
+            'lot_id': self.lot_id,
+            'item_type': self.item_type,
+            'high_bid': self.high_bid,
+            'high_bidder': self.high_bidder,
+            'high_bid_us': self.high_bid_us,
+            'bid_count': self.bid_count,
+            'last_bid_us': self.last_bid_us,
+        }
+
+
+class AuctionState:
+    """
+    Per-lot high bids with top-K queries by high bid and by recent bid rate.
+
+    Bid rates decay exponentially with rate_half_life. Because every lot's count decays at the
+    same rate, lots can be ranked by log(count) + decay * last_update, a key that only changes
+    when the lot itself gets a bid, so the rate heap never needs a global refresh.
+    """
+
+    def __init__(self, max_idle: float = MAX_IDLE, rate_half_life: float = RATE_HALF_LIFE,
+                 sweep_interval: float = SWEEP_INTERVAL, logger=None):
+        """
+        Parameters:
+            max_idle (float): Evict lots with no bids for this many seconds
+            rate_half_life (float): Half-life in seconds of the decaying bid count
+            sweep_interval (float): Minimum seconds of bid time between stale-lot sweeps
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.max_idle_us = int(max_idle * 1_000_000)
+        self.decay = math.log(2) / rate_half_life  # Per second
+        self.sweep_interval_us = int(sweep_interval * 1_000_000)
+        self.logger = logger or logging.getLogger(__name__)
+        self.lots = OrderedDict()  # lot id -> LotState, least recently bid first
+        self.by_amount = IndexedHeap()
+        self.by_rate = IndexedHeap()
+        self.epoch_us = None  # Reference time for rate keys (keeps the exponent small)
+        self.latest_us = 0
+        self.next_sweep_us = 0
+        self.stats = {'updates': 0, 'new_highs': 0, 'evicted': 0}
+
+    def __len__(self):
+        return len(self.lots)
+
+    def update(self, lot_id: int, item_type: str, bid_amount: float, timestamp_us: int, bidder_id: str = None) -> bool:
+        """
+        Applies one bid.
+
+        Parameters:
+            lot_id (int): The auction lot
+            item_type (str): Item type of the lot
+            bid_amount (float): The bid amount
+            timestamp_us (int): Epoch microseconds of the bid
+            bidder_id (str): Bidder UUID
+
+        Returns:
+            bool: True if the bid is the lot's new high bid
+        """
+        if self.epoch_us is None:
+            self.epoch_us = timestamp_us
+        if timestamp_us > self.latest_us:
+            self.latest_us = timestamp_us
+        self.stats['updates'] += 1
+
+        lot = self.lots.get(lot_id)
+        if lot is None:
+            lot = self.lots[lot_id] = LotState(lot_id, item_type)
+        else:
+            self.lots.move_to_end(lot_id)
+
+        # Decay the lot's count to this bid's time and add the bid
+        if lot.bid_count:
+            elapsed = max(0, timestamp_us - lot.last_bid_us) / 1_000_000
+            lot.decayed_count *= math.exp(-self.decay * elapsed)
+        lot.decayed_count += 1.0
+        lot.bid_count += 1
+        lot.last_bid_us = max(lot.last_bid_us, timestamp_us)
+        self.by_rate.set(lot_id, math.log(lot.decayed_count) + self.decay * (lot.last_bid_us - self.epoch_us) / 1_000_000)
+
+        new_high = lot.high_bid is None or bid_amount > lot.high_bid
+        if new_high:
+            lot.high_bid = bid_amount
+            lot.high_bidder = bidder_id
+            lot.high_bid_us = timestamp_us
+            self.by_amount.set(lot_id, bid_amount)
+            self.stats['new_highs'] += 1
+
+        if self.latest_us >= self.next_sweep_us:
+            self.evict_stale()
+        return new_high
+
+    def close(self, lot_id: int):
+        """
+        Removes a lot whose auction has ended; its next bid opens a new auction.
+
+        Returns:
+            dict: The lot's final state (None if the lot is unknown or was evicted)
+        """
+        lot = self.lots.pop(lot_id, None)
+        if lot is None:
+            return None
+        self.by_amount.remove(lot_id)
+        self.by_rate.remove(lot_id)
+        return lot.to_dict()
+
+    def high_bid(self, lot_id: int):
+        """Current state of a lot as a dict (None if the lot is unknown or was evicted)."""
+        lot = self.lots.get(lot_id)
+        return None if lot is None else lot.to_dict()
+
+    def rate(self, lot_id: int, now_us: int = None) -> float:
+        """Recent bids per second on a lot (the decayed count times the decay constant)."""
+        lot = self.lots.get(lot_id)
+        if lot is None:
+            return 0.0
+        now_us = self.latest_us if now_us is None else now_us
+        elapsed = max(0, now_us - lot.last_bid_us) / 1_000_000
+        return lot.decayed_count * math.exp(-self.decay * elapsed) * self.decay
+
+    def top_by_amount(self, count: int = 20) -> list:
+        """The count lots with the highest high bids, highest first."""
+        return [self.lots[lot_id].to_dict() for _, lot_id in self.by_amount.top(count)]
+
+    def top_by_rate(self, count: int = 20) -> list:
+        """The count lots with the highest recent bid rate, busiest first (with a 'rate' field)."""
+        result = []
+        for _, lot_id in self.by_rate.top(count):
+            lot = self.lots[lot_id].to_dict()
+            lot['rate'] = self.rate(lot_id)
+            result.append(lot)
+        return result
+
+    def evict_stale(self, now_us: int = None) -> int:
+        """
+        Removes lots whose last bid is more than max_idle before now.
+
+        Parameters:
+            now_us (int): Epoch microseconds to measure against (defaults to the latest bid time)
+
+        Returns:
+            int: Number of lots evicted
+        """
+        now_us = self.latest_us if now_us is None else now_us
+        self.next_sweep_us = now_us + self.sweep_interval_us
+        cutoff = now_us - self.max_idle_us
+        evicted = 0
+        while self.lots:
+            lot_id, lot = next(iter(self.lots.items()))
+            if lot.last_bid_us >= cutoff:
+                break
+            del self.lots[lot_id]
+            self.by_amount.remove(lot_id)
+            self.by_rate.remove(lot_id)
+            evicted += 1
+        if evicted:
+            self.stats['evicted'] += evicted
+            self.logger.debug(f"Evicted {evicted} stale lots.")
+        return evicted
@@ -0,0 +1,183 @@
+"""
+Real-Time Auction Tracker: Producer Backpressure
+This module adapts the producer's publish rate to how far behind the consumers are. The total
+depth of the producer's queues is read every check interval with passive queue_declare calls, and
+the rate follows AIMD (additive increase, multiplicative decrease): it is cut by a factor when the
+backlog is above the high-water mark and raised by a fixed step when it is below the low-water
+mark. While the broker has blocked the connection (a memory or disk alarm), publishing stops
+altogether. All waiting is done in the connection's event loop, so heartbeats and publisher
+confirms keep flowing however slow the producer gets.
+"""
+
+import logging
+import time
+
+from transport import CHANNEL_ERRORS
+
+# Seconds between queue depth checks
+CHECK_INTERVAL = 1.0
+
+# Total queued messages above which the rate is cut, and below which it is raised
+HIGH_WATER = 10_000
+LOW_WATER = 1_000
+
+# Factor the rate is multiplied by above the high-water mark
+DECREASE_FACTOR = 0.5
+
+# Rate increase per check below the low-water mark, as a fraction of the maximum rate
+INCREASE_FRACTION = 0.05
+
+# Lowest rate, as a fraction of the maximum rate
+MIN_RATE_FRACTION = 0.01
+
+
+class BackpressureController:
+    """
+    AIMD publish-rate controller driven by queue depth and connection.blocked notifications.
+
+    Call poll() regularly from the publishing loop (it only queries the broker once per
+    check_interval, and only returns once the connection is unblocked), pace sends with rate,
+    and wait with connection.sleep() or process_data_events() instead of time.sleep().
+    """
+
+    def __init__(self, connection, queue_names, max_rate: float, min_rate: float = None,
+                 high_water: int = HIGH_WATER, low_water: int = LOW_WATER, decrease_factor: float = DECREASE_FACTOR,
+                 increase: float = None, check_interval: float = CHECK_INTERVAL, logger=None):
+        """
+        Parameters:
+            connection: The broker connection (pika.BlockingConnection or MemoryConnection)
+            queue_names (iterable): Queues whose combined depth is watched
+            max_rate (float): Highest publish rate in messages per second
+            min_rate (float): Lowest publish rate (defaults to MIN_RATE_FRACTION of max_rate)
+            high_water (int): Combined depth above which the rate is cut
+            low_water (int): Combined depth below which the rate is raised
+            decrease_factor (float): Factor the rate is multiplied by above high_water
+            increase (float): Messages per second added per check below low_water (defaults to INCREASE_FRACTION of max_rate)
+            check_interval (float): Seconds between depth checks
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.connection = None
+        self.queue_names = list(queue_names)
+        self.max_rate = max_rate
+        self.min_rate = max_rate * MIN_RATE_FRACTION if min_rate is None else min_rate
+        self.high_water = high_water
+        self.low_water = low_water
+        self.decrease_factor = decrease_factor
+        self.increase = max_rate * INCREASE_FRACTION if increase is None else increase
+        self.check_interval = check_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.rate = max_rate
+        self.depth = 0
+        self.blocked = False
+        self.channel = None  # Separate channel for passive declares (a failed one closes it)
+        self.next_check = 0.0
+        self.stats = {'checks': 0, 'decreases': 0, 'increases': 0, 'blocked': 0, 'blocked_seconds': 0.0}
+        self.rebind(connection)
+
+    def rebind(self, connection):
+        """
+        Watch through a new connection (e.g. after a reconnect), closing the depth channel of the
+        old one. The current rate and the stats carry over.
+
+        Parameters:
+            connection: The new broker connection
+        """
+        if self.channel is not None and self.channel.is_open:
+            try:
+                self.channel.close()
+            except CHANNEL_ERRORS:
+                pass
+        self.channel = None
+        self.connection = connection
+        self.blocked = False
+        self.next_check = 0.0
+        # pika delivers these while the connection processes data events
+        connection.add_on_connection_blocked_callback(self.on_blocked)
+        connection.add_on_connection_unblocked_callback(self.on_unblocked)
+
+    def on_blocked(self, connection, frame):
+        self.blocked = True
+        self.stats['blocked'] += 1
+        self.logger.warning(f"Broker blocked the connection: {getattr(frame.method, 'reason', 'resource alarm')}. Pausing publishing.")
+
+    def on_unblocked(self, connection, frame):
+        self.blocked = False
+        self.logger.info("Broker unblocked the connection. Resuming publishing.")
+
+    def queue_depth(self) -> int:
+        """Combined message count of the watched queues (missing queues count as empty)."""
+        depth = 0
+        for queue_name in self.queue_names:
+            if self.channel is None or not self.channel.is_open:
+                self.channel = self.connection.channel()
+            try:
+                depth += self.channel.queue_declare(queue=queue_name, passive=True).method.message_count
+            except CHANNEL_ERRORS as e:
+                self.logger.debug(f"Could not read the depth of {queue_name}: {e}")
+                self.channel = None
+        return depth
+
+    def adjust(self, depth: int) -> float:
+        """
+        Apply one AIMD step for a depth reading.
+
+        Parameters:
+            depth (int): Combined depth of the watched queues
+
+        Returns:
+            float: The new rate in messages per second
+        """
+        self.depth = depth
+        if depth > self.high_water and self.rate > self.min_rate:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.stats['decreases'] += 1
+            self.logger.info(f"Queue depth {depth} above {self.high_water}: publish rate cut to {self.rate:.1f} msg/s")
+        elif depth < self.low_water and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.stats['increases'] += 1
+            self.logger.debug(f"Queue depth {depth} below {self.low_water}: publish rate raised to {self.rate:.1f} msg/s")
+        return self.rate
+
+    def poll(self) -> float:
+        """
+        Check the queue depth if check_interval has passed, and wait out a blocked connection.
+
+        Returns:
+            float: The current rate in messages per second
+        """
+        now = time.monotonic()
+        if now >= self.next_check:
+            self.next_check = now + self.check_interval
+            self.stats['checks'] += 1
+            self.adjust(self.queue_depth())
+        if self.blocked:
+            started = time.monotonic()
+            while self.blocked and self.connection.is_open:
+                self.connection.process_data_events(time_limit=self.check_interval)
+            self.stats['blocked_seconds'] += time.monotonic() - started
+            self.next_check = 0.0  # Re-read the depth before resuming
+        return self.rate
+
+    def pace(self, minimum: float = 0.0):
+        """
+        Wait until the next send is due at the current rate (and at least minimum seconds),
+        servicing the connection and re-checking the depth every check_interval, so a rate that
+        recovers mid-wait shortens the wait.
+
+        Parameters:
+            minimum (float): Shortest wait in seconds
+        """
+        started = time.monotonic()
+        while True:
+            self.poll()
+            remaining = started + max(minimum, 1.0 / self.rate) - time.monotonic()
+            if remaining <= 0:
+                return
+            self.connection.sleep(min(remaining, self.check_interval))
+
+    def close(self):
+        """Close the depth channel and log the controller's stats."""
+        if self.channel is not None and self.channel.is_open:
+            self.channel.close()
+        self.logger.info(f"Backpressure stats: {self.stats}, final rate {self.rate:.1f} msg/s")
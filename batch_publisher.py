@@ -0,0 +1,265 @@
+"""
+Real-Time Auction Tracker: Batched Publisher with Publisher Confirms
+This module buffers bid messages per target queue, publishes them in batches, and tracks
+asynchronous publisher confirms by delivery tag so nacked or unconfirmed messages are retried.
+"""
+
+import logging
+import time
+
+from bid_codec import JSON_CONTENT_TYPE, encode_bid
+from transport import enable_async_confirms, make_properties
+
+# Flush a queue's buffer once it holds this many messages
+BATCH_SIZE = 100
+
+# Flush any non-empty buffer at least this often (in seconds)
+FLUSH_INTERVAL = 1.0
+
+# Republish a message if the broker has not confirmed it within this many seconds
+CONFIRM_TIMEOUT = 10.0
+
+# Give up on a message after this many publish attempts
+MAX_ATTEMPTS = 5
+
+
+class BatchPublisher:
+    """
+    Publishes bid messages in per-queue batches on a single channel.
+
+    Queue topology is declared once when the publisher is created. Messages are buffered per
+    queue and flushed when a buffer reaches batch_size or flush_interval has elapsed. The channel
+    is put into confirm mode and broker acks/nacks are matched to outstanding delivery tags.
+    """
+
+    def __init__(self, connection, channel, queue_names, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, confirm_timeout: float = CONFIRM_TIMEOUT,
+                 max_attempts: int = MAX_ATTEMPTS, content_type: str = JSON_CONTENT_TYPE,
+                 latency_recorder=None, exchange: str = '', logger=None):
+        """
+        Parameters:
+            connection: The RabbitMQ connection (used to pump confirm frames)
+            channel: The channel object for sending messages
+            queue_names (iterable): Names of all queues this publisher may send to (routing keys when
+                exchange is set)
+            batch_size (int): Number of buffered messages that triggers a flush
+            flush_interval (float): Maximum seconds a message waits in the buffer
+            confirm_timeout (float): Seconds to wait for a confirm before republishing
+            max_attempts (int): Publish attempts per message before it is dropped
+            content_type (str): Wire format for message bodies (see bid_codec)
+            latency_recorder: Optional object with record(seconds), given publish-to-confirm latency
+            exchange (str): Exchange to publish to ('' for the default exchange, which routes by queue name;
+                a named exchange must already be declared)
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.connection = connection
+        self.channel = channel
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.confirm_timeout = confirm_timeout
+        self.max_attempts = max_attempts
+        self.logger = logger or logging.getLogger(__name__)
+        self.exchange = exchange
+
+        self.buffers = {}  # queue name -> list of (body, attempts)
+        self.last_flush = {}  # queue name -> monotonic time of last flush
+        self.outstanding = {}  # delivery tag -> (queue name, body, attempts, sent at), in tag order
+        self.next_tag = 1
+        self.content_type = content_type
+        self.latency_recorder = latency_recorder
+        self.properties = make_properties(delivery_mode=2, content_type=content_type)  # Persistent, tagged with the wire format
+
+        self.stats = {'published': 0, 'confirmed': 0, 'nacked': 0, 'retried': 0, 'dropped': 0}
+
+        # Declare the queue topology once instead of on every publish
+        for queue_name in queue_names:
+            self.declare_queue(queue_name)
+
+        # Enable asynchronous confirms so publishes don't wait for a round trip;
+        # confirms are delivered to on_confirm while data events are processed
+        enable_async_confirms(self.channel, self.on_confirm)
+        self.connection.process_data_events(time_limit=0)
+
+    def declare_queue(self, queue_name: str):
+        """Declare a durable queue (default exchange only) and give it an empty buffer."""
+        if not self.exchange:
+            self.channel.queue_declare(queue=queue_name, durable=True)
+        self.buffers.setdefault(queue_name, [])
+        self.last_flush.setdefault(queue_name, time.monotonic())
+
+    def publish(self, queue_name: str, message: dict):
+        """
+        Buffers a message for the specified queue, flushing the buffer if it is full.
+
+        Parameters:
+            queue_name (str): Name of the queue to send the message to
+            message (dict): The message data to be sent
+        """
+        self.publish_encoded(queue_name, encode_bid(message, self.content_type))
+
+    def publish_encoded(self, queue_name: str, body: bytes):
+        """
+        Buffers an already encoded message body (in this publisher's content type).
+
+        Parameters:
+            queue_name (str): Name of the queue to send the message to
+            body (bytes): The encoded message
+        """
+        if queue_name not in self.buffers:
+            self.declare_queue(queue_name)  # Late queue (e.g. the default queue)
+        buffer = self.buffers[queue_name]
+        buffer.append((body, 0))
+        if len(buffer) >= self.batch_size:
+            self.flush_queue(queue_name)
+
+    def flush_queue(self, queue_name: str):
+        """
+        Publish every buffered message for one queue. If a publish fails, the messages after it
+        go back to the front of the buffer (the failed one is outstanding), so take_unconfirmed()
+        still returns all of them in order.
+        """
+        buffer = self.buffers[queue_name]
+        self.buffers[queue_name] = []
+        now = time.monotonic()
+        self.last_flush[queue_name] = now
+        for index, (body, attempts) in enumerate(buffer):
+            if attempts >= self.max_attempts:
+                self.stats['dropped'] += 1
+                self.logger.error(f"Dropping message for {queue_name} after {attempts} attempts.")
+                continue
+            # Track the tag before publishing: pika may process its confirm inside basic_publish
+            self.outstanding[self.next_tag] = (queue_name, body, attempts + 1, now)
+            self.next_tag += 1
+            try:
+                self.channel.basic_publish(
+                    exchange=self.exchange,
+                    routing_key=queue_name,
+                    body=body,
+                    properties=self.properties
+                )
+            except BaseException:
+                self.buffers[queue_name][:0] = buffer[index + 1:]
+                raise
+            self.stats['published'] += 1
+        if buffer:
+            self.logger.debug(f"Flushed {len(buffer)} messages to {queue_name}.")
+
+    def flush(self):
+        """Publish every buffered message for all queues."""
+        for queue_name in list(self.buffers):
+            if self.buffers[queue_name]:
+                self.flush_queue(queue_name)
+
+    def poll(self):
+        """
+        Services the publisher: processes pending confirms, flushes buffers whose flush interval
+        has elapsed, and requeues messages whose confirms have timed out.
+        Call this regularly from the producer loop.
+        """
+        self.connection.process_data_events(time_limit=0)
+        now = time.monotonic()
+        for queue_name, buffer in self.buffers.items():
+            if buffer and now - self.last_flush[queue_name] >= self.flush_interval:
+                self.flush_queue(queue_name)
+        self.retry_expired()
+
+    def on_confirm(self, method_frame):
+        """
+        Handles a Basic.Ack or Basic.Nack from the broker.
+
+        Parameters:
+            method_frame: The confirm frame with delivery_tag and multiple flag
+        """
+        method = method_frame.method
+        if method.multiple:
+            # Tags are inserted in increasing order, so stop at the first one past the ack
+            tags = []
+            for tag in self.outstanding:
+                if tag > method.delivery_tag:
+                    break
+                tags.append(tag)
+        else:
+            tags = [method.delivery_tag] if method.delivery_tag in self.outstanding else []
+
+        acked = method.NAME == 'Basic.Ack'
+        now = time.monotonic()
+        nacked = []
+        for tag in tags:
+            queue_name, body, attempts, sent_at = self.outstanding.pop(tag)
+            if acked:
+                self.stats['confirmed'] += 1
+                if self.latency_recorder is not None:
+                    self.latency_recorder.record(now - sent_at)
+            else:
+                self.stats['nacked'] += 1
+                nacked.append((queue_name, body, attempts))
+        if nacked:
+            self.requeue(nacked)
+
+    def retry_expired(self):
+        """Requeue outstanding messages that have not been confirmed within confirm_timeout."""
+        cutoff = time.monotonic() - self.confirm_timeout
+        expired = []
+        for tag, entry in self.outstanding.items():
+            if entry[3] >= cutoff:
+                break  # Later tags were sent later, so none of them has expired either
+            expired.append(tag)
+        if expired:
+            self.requeue([self.outstanding.pop(tag)[:3] for tag in expired])
+
+    def requeue(self, messages: list):
+        """
+        Put messages back at the front of their queues' buffers to be republished, keeping their
+        order (messages are given oldest first, as (queue name, body, attempts)).
+        """
+        by_queue = {}
+        for queue_name, body, attempts in messages:
+            by_queue.setdefault(queue_name, []).append((body, attempts))
+        for queue_name, entries in by_queue.items():
+            self.buffers[queue_name][:0] = entries
+        self.stats['retried'] += len(messages)
+
+    def take_unconfirmed(self) -> list:
+        """
+        Removes and returns every message not yet confirmed, oldest first (e.g. to spool them after
+        the connection was lost; some may have reached the broker, so they can be delivered twice).
+
+        Returns:
+            list: (queue name, body) pairs, outstanding messages in tag order followed by buffered ones
+        """
+        messages = [(queue_name, body) for queue_name, body, _, _ in self.outstanding.values()]
+        for queue_name, buffer in self.buffers.items():
+            messages.extend((queue_name, body) for body, _ in buffer)
+            buffer.clear()
+        self.outstanding.clear()
+        return messages
+
+    def wait_for_confirms(self, timeout: float = CONFIRM_TIMEOUT) -> bool:
+        """
+        Flushes all buffers and waits for outstanding confirms, retrying as needed.
+
+        Parameters:
+            timeout (float): Maximum seconds to wait for the broker to confirm everything
+
+        Returns:
+            bool: True if every message was confirmed (False if any was dropped after max_attempts)
+        """
+        deadline = time.monotonic() + timeout
+        dropped = self.stats['dropped']
+        self.flush()
+        while (self.outstanding or any(self.buffers.values())) and time.monotonic() < deadline:
+            self.connection.process_data_events(time_limit=0.1)
+            self.retry_expired()
+            self.flush()
+        return not self.outstanding and not any(self.buffers.values()) and self.stats['dropped'] == dropped
+
+    def close(self, timeout: float = CONFIRM_TIMEOUT):
+        """
+        Flushes all buffers and waits for outstanding confirms, retrying as needed.
+
+        Parameters:
+            timeout (float): Maximum seconds to wait for the broker to confirm everything
+        """
+        if not self.wait_for_confirms(timeout):
+            self.logger.error(f"{len(self.outstanding)} messages were not confirmed before close.")
+        self.logger.info(f"Publisher stats: {self.stats}")
@@ -0,0 +1,89 @@
+"""
+Real-Time Auction Tracker: Auction Close Benchmark
+This script compares the hierarchical TimerWheel with a heapq of deadlines (lazy deletion, the
+usual alternative) for many concurrently open lots: opening every lot, extending a share of them
+with late bids, and advancing the clock in bid-sized steps until every lot has closed.
+
+Usage:
+    python benchmark_auction_close.py [lot_count]
+"""
+
+import heapq
+import random
+import sys
+import time
+
+from auction_close import AUCTION_SECONDS, SNIPE_EXTENSION, TimerWheel
+
+# Number of concurrently open lots
+LOT_COUNT = 1_000_000
+
+# Share of lots that receive a sniping bid (and are extended)
+SNIPED = 0.3
+
+# Seconds over which lots open (bids arrive at LOT_COUNT / OPEN_SECONDS lots per second)
+OPEN_SECONDS = 60.0
+
+AUCTION_US = int(AUCTION_SECONDS * 1_000_000)
+EXTENSION_US = int(SNIPE_EXTENSION * 1_000_000)
+
+
+class HeapDeadlines:
+    """Deadlines in a heap; moved deadlines leave stale entries that are skipped when popped."""
+
+    def __init__(self):
+        self.heap = []
+        self.deadlines = {}
+
+    def schedule(self, key, deadline_us: int):
+        self.deadlines[key] = deadline_us
+        heapq.heappush(self.heap, (deadline_us, key))
+
+    def advance(self, now_us: int) -> list:
+        expired = []
+        heap, deadlines = self.heap, self.deadlines
+        while heap and heap[0][0] <= now_us:
+            deadline_us, key = heapq.heappop(heap)
+            if deadlines.get(key) == deadline_us:
+                del deadlines[key]
+                expired.append((key, deadline_us))
+        return expired
+
+
+def run(timers, opens: list, snipes: list, end_us: int, step_us: int) -> tuple:
+    """Returns (open seconds, extend seconds, close seconds, lots closed)."""
+    start = time.perf_counter()
+    for lot_id, timestamp_us in opens:
+        timers.schedule(lot_id, timestamp_us + AUCTION_US)
+    opened = time.perf_counter()
+    for lot_id, timestamp_us in snipes:
+        timers.schedule(lot_id, timestamp_us + EXTENSION_US)
+    extended = time.perf_counter()
+    closed = 0
+    now_us = opens[0][1]
+    while now_us <= end_us:
+        closed += len(timers.advance(now_us))
+        now_us += step_us
+    finished = time.perf_counter()
+    return opened - start, extended - opened, finished - extended, closed
+
+
+def main(lot_count: int):
+    random.seed(7)
+    base_us = 1_700_000_000_000_000
+    open_us = int(OPEN_SECONDS * 1_000_000)
+    opens = [(lot_id, base_us + lot_id * open_us // lot_count) for lot_id in range(lot_count)]
+    sniped = random.sample(range(lot_count), int(lot_count * SNIPED))
+    snipes = [(lot_id, opens[lot_id][1] + AUCTION_US - random.randint(0, 10_000_000)) for lot_id in sniped]
+    end_us = base_us + open_us + AUCTION_US + EXTENSION_US
+    step_us = 10_000  # Advance as a busy consumer would: every 10ms of bid time
+
+    print(f"Lots: {lot_count:,} open at once, {len(snipes):,} extended, clock advanced every {step_us // 1000}ms")
+    for name, timers in (('heapq', HeapDeadlines()), ('timer wheel', TimerWheel())):
+        open_s, extend_s, close_s, closed = run(timers, opens, snipes, end_us, step_us)
+        print(f"{name:>12}: open {lot_count / open_s:,.0f}/s, extend {len(snipes) / extend_s:,.0f}/s, "
+              f"close {closed / close_s:,.0f}/s ({closed:,} closed, {open_s + extend_s + close_s:.2f}s total)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else LOT_COUNT)
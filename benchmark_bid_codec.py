@@ -0,0 +1,64 @@
+"""
+Real-Time Auction Tracker: Bid Codec Micro-Benchmark
+This script reports encode and decode time per bid and bytes on the wire for the JSON and
+binary bid formats.
+
+Usage:
+    python benchmark_bid_codec.py [bid_count]
+"""
+
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from bid_codec import BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE, decode_bid, encode_bid
+
+# Number of bids encoded and decoded per run
+BID_COUNT = 100_000
+
+# Fields a consumer needs for windows and alerts
+CONSUMER_FIELDS = ('bidder_id', 'bid_amount', 'timestamp_us')
+
+NAMES = ['Ava Smith', 'Liam Johnson', 'Mia Brown', 'Noah Davis', 'Zoe Miller']
+
+
+def make_bid() -> dict:
+    """Build a bid shaped like the ones produced by generate_fake_bid."""
+    name = random.choice(NAMES)
+    return {
+        'bidder_id': str(uuid.uuid4()),
+        'bid_amount': round(random.uniform(10, 1000), 2),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'item': random.choice(('electronics', 'furniture', 'art')),
+        'bidder_name': name,
+        'bidder_email': name.lower().replace(' ', '.') + '@example.com',
+    }
+
+
+def time_per_bid(function, items) -> float:
+    """Return nanoseconds per call of function over items."""
+    start = time.perf_counter_ns()
+    for item in items:
+        function(item)
+    return (time.perf_counter_ns() - start) / len(items)
+
+
+def main(bid_count: int):
+    """Run the codec benchmark and print a results table."""
+    random.seed(7)
+    bids = [make_bid() for _ in range(bid_count)]
+
+    print(f"{'format':<8} {'bytes/bid':>10} {'encode ns':>10} {'decode ns':>10} {'decode core ns':>15}")
+    for label, content_type in (('json', JSON_CONTENT_TYPE), ('binary', BINARY_CONTENT_TYPE)):
+        bodies = [encode_bid(bid, content_type) for bid in bids]
+        size = sum(len(body) for body in bodies) / bid_count
+        encode_ns = time_per_bid(lambda bid: encode_bid(bid, content_type), bids)
+        decode_ns = time_per_bid(lambda body: decode_bid(body, content_type), bodies)
+        core_ns = time_per_bid(lambda body: decode_bid(body, content_type, CONSUMER_FIELDS), bodies)
+        print(f"{label:<8} {size:>10.1f} {encode_ns:>10.0f} {decode_ns:>10.0f} {core_ns:>15.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else BID_COUNT)
@@ -0,0 +1,62 @@
+"""
+Real-Time Auction Tracker: Bid Generator Benchmark
+This script compares bids per second for the per-call Faker path used by generate_fake_bid and
+the batched BulkBidGenerator.
+
+Usage:
+    python benchmark_bid_generator.py [bid_count]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from faker import Faker
+
+from bulk_bid_generator import BulkBidGenerator, build_bidder_pools
+
+# Number of bids generated by each path
+BID_COUNT = 20_000
+
+
+def generate_fake_bid(fake):
+    """Same per-call Faker bid as producer_v3.0.generate_fake_bid."""
+    return {
+        'bidder_id': fake.uuid4(),
+        'bid_amount': round(random.uniform(10, 1000), 2),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'item': fake.random_element(elements=('electronics', 'furniture', 'art')),
+        'bidder_name': fake.name(),
+        'bidder_email': fake.email()
+    }
+
+
+def bids_per_second(make_bid, count: int) -> float:
+    """Time count calls of make_bid and return the rate."""
+    start = time.perf_counter()
+    for _ in range(count):
+        make_bid()
+    return count / (time.perf_counter() - start)
+
+
+def main(bid_count: int):
+    """Run both generators and print their rates."""
+    fake = Faker()
+    faker_rate = bids_per_second(lambda: generate_fake_bid(fake), bid_count)
+
+    start = time.perf_counter()
+    names, emails = build_bidder_pools(seed=7)
+    pool_seconds = time.perf_counter() - start
+    bids = BulkBidGenerator(seed=7, names=names, emails=emails)
+    bulk_rate = bids_per_second(bids.__next__, bid_count)
+
+    print(f"Bids per run: {bid_count:,}")
+    print(f"Faker per call:     {faker_rate:12,.0f} bids/s  ({1e6 / faker_rate:8.2f} us/bid)")
+    print(f"BulkBidGenerator:   {bulk_rate:12,.0f} bids/s  ({1e6 / bulk_rate:8.2f} us/bid)")
+    print(f"Pool build (once):  {pool_seconds * 1000:12.1f} ms")
+    print(f"Speedup: {bulk_rate / faker_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else BID_COUNT)
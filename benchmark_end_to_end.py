@@ -0,0 +1,138 @@
+"""
+Real-Time Auction Tracker: End-to-End Pipeline Benchmark
+This script runs the batched producer, the consumer pipeline and the alert aggregator against the
+in-memory broker (no RabbitMQ needed) and reports throughput and producer-to-consumer latency.
+It isolates the overhead of this project's own code from the broker and the mail server.
+
+Usage:
+    python benchmark_end_to_end.py [bid_count] [json|binary] [micro_batch_size]
+
+A micro_batch_size of 0 (the default) processes each delivery in its own callback.
+"""
+
+import logging
+import sys
+import threading
+import time
+
+from alert_aggregator import AlertAggregator
+from auction_state import AuctionState
+from batch_publisher import BatchPublisher
+from bid_codec import BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE, decode_bid
+from bid_pipeline import BidPipeline
+from bulk_bid_generator import BulkBidGenerator
+from load_generator import LatencyRecorder, format_percentiles
+from micro_batch import MicroBatcher
+from transport import connect
+
+# Number of bids pushed through the pipeline
+BID_COUNT = 50_000
+
+# Consumer prefetch count
+PREFETCH_COUNT = 1000
+
+QUEUE_CONFIG = {
+    'auction_queue_electronics': 'electronics',
+    'auction_queue_furniture': 'furniture',
+    'auction_queue_art': 'art'
+}
+ITEM_QUEUES = {item_type: queue_name for queue_name, item_type in QUEUE_CONFIG.items()}
+CONSUMER_FIELDS = ('bidder_id', 'bid_amount', 'timestamp_us', 'lot_id')
+
+# Static bidder pools so the benchmark does not depend on Faker
+NAMES = ['Ava Smith', 'Liam Johnson', 'Mia Brown', 'Noah Davis', 'Zoe Miller']
+EMAILS = ['ava@example.com', 'liam@example.com', 'mia@example.com', 'noah@example.com', 'zoe@example.com']
+
+
+class CountingDispatcher:
+    """Stands in for AlertDispatcher and counts the emails it would have sent."""
+
+    def __init__(self):
+        self.sent = 0
+
+    def submit(self, email_subject: str, email_body: str) -> bool:
+        self.sent += 1
+        return True
+
+
+def run_producer(url: str, bid_count: int, content_type: str):
+    """Publish bid_count bids through a BatchPublisher on its own connection."""
+    connection = connect(url)
+    channel = connection.channel()
+    publisher = BatchPublisher(connection, channel, QUEUE_CONFIG, content_type=content_type)
+    bids = BulkBidGenerator(seed=7, names=NAMES, emails=EMAILS)
+    for sent in range(1, bid_count + 1):
+        bid = next(bids)
+        publisher.publish(ITEM_QUEUES[bid['item']], bid)
+        if sent % 1000 == 0:
+            publisher.poll()
+    publisher.close()
+    connection.close()
+
+
+def main(bid_count: int, content_type: str, batch_size: int = 0):
+    """Run producer and consumer together and print the results."""
+    quiet = logging.getLogger('benchmark_end_to_end')
+    quiet.setLevel(logging.WARNING)  # Per-bid INFO logging is measured separately
+
+    url = f"memory://benchmark-{time.monotonic_ns()}"
+    connection = connect(url)
+    channel = connection.channel()
+    channel.basic_qos(prefetch_count=PREFETCH_COUNT)
+
+    dispatcher = CountingDispatcher()
+    aggregator = AlertAggregator(dispatcher, flush_interval=1.0, max_emails_per_minute=1000, logger=quiet)
+    pipeline = BidPipeline(QUEUE_CONFIG.values(), window_size=1000, alert_sink=aggregator,
+                           auction_state=AuctionState(logger=quiet), logger=quiet)
+    latency = LatencyRecorder()
+    received = 0
+
+    def callback(ch, method, properties, body):
+        nonlocal received
+        message = decode_bid(body, properties.content_type, CONSUMER_FIELDS)
+        pipeline.process(QUEUE_CONFIG[method.routing_key], message)
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+        latency.record(time.time() - message['timestamp_us'] / 1_000_000)
+        received += 1
+
+    def handle_batch(deliveries):
+        nonlocal received
+        now = time.time()
+        bids = [(QUEUE_CONFIG[method.routing_key], decode_bid(body, properties.content_type, CONSUMER_FIELDS))
+                for _, method, properties, body in deliveries]
+        pipeline.process_batch(bids)
+        for _, message in bids:
+            latency.record(now - message['timestamp_us'] / 1_000_000)
+        received += len(deliveries)
+        return {}
+
+    batcher = MicroBatcher(handle_batch, max_batch=batch_size, logger=quiet) if batch_size else None
+    for queue_name in QUEUE_CONFIG:
+        channel.queue_declare(queue=queue_name, durable=True)
+        channel.basic_consume(queue=queue_name, on_message_callback=batcher.add if batcher else callback)
+
+    start = time.perf_counter()
+    producer = threading.Thread(target=run_producer, args=(url, bid_count, content_type))
+    producer.start()
+    while received < bid_count:
+        if batcher is not None:
+            connection.process_data_events(time_limit=batcher.max_delay)
+            batcher.poll()
+        else:
+            connection.process_data_events(time_limit=1.0)
+    elapsed = time.perf_counter() - start
+    producer.join()
+    aggregator.close()
+    connection.close()
+
+    print(f"Bids: {bid_count:,} ({content_type}, {f'micro-batches of {batch_size}' if batch_size else 'one callback per bid'})")
+    print(f"Throughput: {bid_count / elapsed:,.0f} bids/s end to end ({elapsed:.2f}s)")
+    print(f"Producer-to-consumer latency: {format_percentiles(latency.percentiles())}")
+    print(f"High bids: {aggregator.stats['alerts']:,}, digest emails: {dispatcher.sent}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else BID_COUNT
+    wire = BINARY_CONTENT_TYPE if len(sys.argv) > 2 and sys.argv[2] == 'binary' else JSON_CONTENT_TYPE
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    main(count, wire, batch)
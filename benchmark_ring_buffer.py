@@ -0,0 +1,89 @@
+"""
+Real-Time Auction Tracker: Ring Buffer Memory Benchmark
+This script compares memory per bid and window-scan time for the original dict-in-deque
+rolling window and the columnar BidRingBuffer.
+
+Usage:
+    python benchmark_ring_buffer.py [window_size]
+"""
+
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from ring_buffer import BidRingBuffer, to_micros, uuid_bytes
+
+# Number of bids held in the window
+WINDOW_SIZE = 100_000
+
+NAMES = ['Ava Smith', 'Liam Johnson', 'Mia Brown', 'Noah Davis', 'Zoe Miller']
+
+
+def make_bid() -> dict:
+    """Build a bid shaped like the ones produced by generate_fake_bid."""
+    name = random.choice(NAMES)
+    return {
+        'bidder_id': str(uuid.uuid4()),
+        'bid_amount': round(random.uniform(10, 1000), 2),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'item': random.choice(('electronics', 'furniture', 'art')),
+        'bidder_name': name,
+        'bidder_email': name.lower().replace(' ', '.') + '@example.com',
+    }
+
+
+def measure(build):
+    """Return (result, bytes allocated) for a build function."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main(window_size: int):
+    """Fill both window layouts with the same bids and report memory and scan time."""
+    random.seed(7)
+    bids = [make_bid() for _ in range(window_size)]
+    encoded = [(bid['bid_amount'], datetime.fromisoformat(bid['timestamp']).timestamp(), bid['bidder_id']) for bid in bids]
+
+    def build_deque():
+        # Decode each bid from JSON-like text so the dicts own their strings, as in the consumers
+        window = deque(maxlen=window_size)
+        for bid in bids:
+            window.append({key: (value if isinstance(value, float) else ''.join(value)) for key, value in bid.items()})
+        return window
+
+    def build_ring():
+        ring = BidRingBuffer(window_size)
+        for amount, timestamp, bidder_id in encoded:
+            ring.append(amount, to_micros(timestamp), uuid_bytes(bidder_id))
+        return ring
+
+    window, deque_bytes = measure(build_deque)
+    ring, ring_bytes = measure(build_ring)
+
+    start = time.perf_counter()
+    amounts = [bid['bid_amount'] for bid in window]
+    deque_stats = (statistics.fmean(amounts), min(amounts), max(amounts), statistics.variance(amounts))
+    deque_scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ring_stats = ring.summary()
+    ring_scan = time.perf_counter() - start
+
+    print(f"Window size: {window_size:,} bids")
+    print(f"dict-in-deque:  {deque_bytes / window_size:8.1f} bytes/bid  scan {deque_scan * 1000:8.2f} ms")
+    print(f"BidRingBuffer:  {ring_bytes / window_size:8.1f} bytes/bid  scan {ring_scan * 1000:8.2f} ms")
+    print(f"Memory reduction: {deque_bytes / ring_bytes:.1f}x")
+    print(f"Means agree: {abs(deque_stats[0] - ring_stats['mean']) < 1e-6}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else WINDOW_SIZE)
@@ -0,0 +1,175 @@
+"""
+Real-Time Auction Tracker: Producer Spool Benchmark
+This script measures the producer spool against the in-memory broker (no RabbitMQ needed): the
+rate bids are appended to disk during an outage, the rate the drainer republishes them once the
+broker is back, a connection lost mid-stream, and one lost while a full batch is being flushed,
+checking that every queue receives every bid in the order it was produced.
+
+Usage:
+    python benchmark_spool.py [bid_count] [json|binary]
+"""
+
+import logging
+import shutil
+import sys
+import tempfile
+import time
+
+from batch_publisher import BatchPublisher
+from bid_codec import BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE, encode_bid
+from bulk_bid_generator import BulkBidGenerator
+from spool import FailoverPublisher, Spool
+from transport import get_broker
+
+# Number of bids spooled per run
+BID_COUNT = 100_000
+
+QUEUE_CONFIG = {
+    'electronics': 'auction_queue_electronics',
+    'furniture': 'auction_queue_furniture',
+    'art': 'auction_queue_art'
+}
+
+# Static bidder pools so the benchmark does not depend on Faker
+NAMES = ['Ava Smith', 'Liam Johnson', 'Mia Brown', 'Noah Davis', 'Zoe Miller']
+EMAILS = ['ava@example.com', 'liam@example.com', 'mia@example.com', 'noah@example.com', 'zoe@example.com']
+
+
+def make_publisher(connection, channel, content_type: str, **kwargs):
+    return BatchPublisher(connection, channel, QUEUE_CONFIG.values(), content_type=content_type,
+                          logger=logging.getLogger('benchmark_spool'), **kwargs)
+
+
+def wait_for(condition, timeout: float = 120.0) -> float:
+    """Seconds until condition() is true."""
+    start = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError("Timed out waiting for the spool to drain")
+        time.sleep(0.005)
+    return time.perf_counter() - start
+
+
+def queued_bodies(broker) -> dict:
+    """Queue name -> bodies in the order they were queued."""
+    return {name: [entry[0] for entry in queue.messages] for name, queue in broker.queues.items()}
+
+
+def check_order(sent: dict, received: dict) -> int:
+    """
+    Check every sent body arrived, in order, per queue (copies republished after a lost
+    connection are allowed and skipped). Returns the number of duplicate copies.
+    """
+    duplicates = 0
+    for queue_name, bodies in sent.items():
+        seen = set()
+        first_copies = []
+        for body in received.get(queue_name, []):
+            if body in seen:
+                duplicates += 1
+            else:
+                seen.add(body)
+                first_copies.append(body)
+        if first_copies != bodies:
+            raise AssertionError(f"{queue_name}: {len(first_copies)} distinct bodies received out of order or missing "
+                                 f"(sent {len(bodies)})")
+    return duplicates
+
+
+def run_failover(directory: str, content_type: str, routed: list, outage_start: int, outage_end: int,
+                 batch_size: int = None, poll_every: int = 1000) -> dict:
+    """
+    Publish (queue name, bid) pairs through a FailoverPublisher, taking the broker down at index
+    outage_start and back up at outage_end, then wait for the spool to drain and check that every
+    queue received every bid in order. Returns the publisher stats plus the duplicate count.
+    """
+    quiet = logging.getLogger('benchmark_spool')
+    name = f"benchmark-{time.monotonic_ns()}"
+    broker = get_broker(name)
+    factory = make_publisher
+    if batch_size is not None:
+        def factory(connection, channel, wire):
+            return make_publisher(connection, channel, wire, batch_size=batch_size)
+    spool = Spool(directory, content_type, logger=quiet)
+    publisher = FailoverPublisher(f"memory://{name}", factory, spool, content_type,
+                                  reconnect_interval=0.05, logger=quiet)
+    for index, (queue_name, bid) in enumerate(routed):
+        if index == outage_start:
+            broker.set_available(False)
+        elif index == outage_end:
+            broker.set_available(True)
+        publisher.publish(queue_name, bid)
+        if index % poll_every == 0:
+            publisher.poll()
+    wait_for(lambda: not spool.pending)
+    publisher.close()
+    sent = {}
+    for queue_name, bid in routed:
+        sent.setdefault(queue_name, []).append(encode_bid(bid, content_type))
+    return dict(publisher.stats, duplicates=check_order(sent, queued_bodies(broker)))
+
+
+def main(bid_count: int, content_type: str):
+    quiet = logging.getLogger('benchmark_spool')
+    quiet.setLevel(logging.ERROR)
+    directory = tempfile.mkdtemp(prefix='spool-benchmark-')
+    bids = BulkBidGenerator(seed=7, names=NAMES, emails=EMAILS)
+    messages = [next(bids) for _ in range(bid_count)]
+    bodies = [(QUEUE_CONFIG[bid['item']], encode_bid(bid, content_type)) for bid in messages]
+    try:
+        # Raw appends (what a publish costs while the broker is down)
+        spool = Spool(f"{directory}/raw", content_type, segment_bytes=8 * 1024 * 1024, logger=quiet)
+        start = time.perf_counter()
+        for queue_name, body in bodies:
+            spool.append(queue_name, body)
+        spool.flush()
+        append_seconds = time.perf_counter() - start
+        size = spool.size
+        spool.close()
+        reopened = Spool(f"{directory}/raw", content_type, logger=quiet)
+        recovered = reopened.pending
+        reopened.close()
+
+        # Outage from the start: everything is spooled, then drained once the broker is back
+        name = f"benchmark-{time.monotonic_ns()}"
+        broker = get_broker(name)
+        broker.set_available(False)
+        spool = Spool(f"{directory}/outage", content_type, logger=quiet)
+        publisher = FailoverPublisher(f"memory://{name}", make_publisher, spool, content_type,
+                                      reconnect_interval=0.05, logger=quiet)
+        start = time.perf_counter()
+        for bid in messages:
+            publisher.publish(QUEUE_CONFIG[bid['item']], bid)
+        spool.flush()
+        spool_seconds = time.perf_counter() - start
+        broker.set_available(True)
+        drain_seconds = wait_for(lambda: not spool.pending)
+        publisher.close()
+        sent = {}
+        for queue_name, body in bodies:
+            sent.setdefault(queue_name, []).append(body)
+        check_order(sent, queued_bodies(broker))
+
+        # Connection lost halfway through: unconfirmed bids and new ones are spooled, then drained
+        routed = [(QUEUE_CONFIG[bid['item']], bid) for bid in messages]
+        failover = run_failover(f"{directory}/failover", content_type, routed, bid_count // 2, bid_count * 3 // 4)
+
+        # Connection lost while a full batch is flushed: the unsent rest of the batch must be spooled too
+        routed = [(QUEUE_CONFIG['art'], bid) for bid in messages[:300]]
+        mid_flush = run_failover(f"{directory}/mid-flush", content_type, routed, 150, 250, batch_size=100,
+                                 poll_every=len(routed))  # No polls, so the outage is first seen by a flush
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"Bids: {bid_count:,} ({content_type}), {size / bid_count:.0f} bytes per spooled bid")
+    print(f"Spool append: {bid_count / append_seconds:,.0f} bids/s ({append_seconds:.2f}s); {recovered:,} recovered after reopening")
+    print(f"Publish during outage (encode + append): {bid_count / spool_seconds:,.0f} bids/s")
+    print(f"Reconnect and drain: {bid_count / drain_seconds:,.0f} bids/s ({drain_seconds:.2f}s), order preserved")
+    print(f"Mid-stream failover: {failover}, order preserved")
+    print(f"Failover mid-flush (300 bids, batches of 100, outage at 150-250): {mid_flush}, order preserved")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else BID_COUNT
+    wire = BINARY_CONTENT_TYPE if len(sys.argv) > 2 and sys.argv[2] == 'binary' else JSON_CONTENT_TYPE
+    main(count, wire)
@@ -0,0 +1,163 @@
+"""
+Real-Time Auction Tracker: Bid Archive
+This module records consumed bid messages to a compact, append-only archive file and reads them
+back. Each record keeps the raw message body as it arrived (JSON or compact binary), so recording
+costs one buffered write per bid. A sparse index written alongside the archive lets a reader
+seek to a point in time without scanning the whole file.
+"""
+
+import bisect
+import logging
+import os
+import struct
+import time
+
+from bid_codec import BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE
+
+# File header: magic and format version
+MAGIC = b'ABAR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sH')
+
+# Record header: body length, receive time (epoch microseconds), content type code, item type length
+RECORD = struct.Struct('<IqBB')
+
+# Content type codes stored in each record
+CONTENT_TYPES = (JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE)
+CONTENT_CODES = {content_type: code for code, content_type in enumerate(CONTENT_TYPES)}
+
+# Index entry: receive time (epoch microseconds) and file offset of a record
+INDEX_ENTRY = struct.Struct('<qQ')
+
+# Write an index entry every this many records
+INDEX_EVERY = 1000
+
+# Bytes buffered before the archive is written to disk
+WRITE_BUFFER = 1024 * 1024
+
+
+class ArchiveError(ValueError):
+    """Raised when an archive file is not in the expected format."""
+
+
+def index_path(path: str) -> str:
+    """Path of the sparse index kept next to an archive."""
+    return f"{path}.idx"
+
+
+class BidRecorder:
+    """
+    Appends bid messages to an archive file.
+
+    Records are buffered in memory and written in large blocks; close() (or flush()) makes
+    sure everything has reached the file. Appending to an existing archive continues it.
+    """
+
+    def __init__(self, path: str, index_every: int = INDEX_EVERY, logger=None):
+        """
+        Parameters:
+            path (str): Archive file to append to (created with its directory if needed)
+            index_every (int): Records between sparse index entries
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.index_every = index_every
+        self.logger = logger or logging.getLogger(__name__)
+        self.file = open(path, 'ab', buffering=WRITE_BUFFER)
+        self.index = open(index_path(path), 'ab')
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self.offset = self.file.tell()
+        self.stats = {'recorded': 0, 'bytes': 0}
+
+    def record(self, item_type: str, body: bytes, content_type: str = None, received_at: float = None):
+        """
+        Appends one message.
+
+        Parameters:
+            item_type (str): Item type of the queue the message came from
+            body (bytes): The message body exactly as received
+            content_type (str): Content type of the body (JSON when missing)
+            received_at (float): Epoch seconds the message was received (defaults to now)
+        """
+        received_us = int((time.time() if received_at is None else received_at) * 1_000_000)
+        name = item_type.encode('utf-8')
+        if self.stats['recorded'] % self.index_every == 0:
+            self.index.write(INDEX_ENTRY.pack(received_us, self.offset))
+        code = CONTENT_CODES.get(content_type or JSON_CONTENT_TYPE, 0)
+        header = RECORD.pack(len(body), received_us, code, len(name))
+        self.file.write(header)
+        self.file.write(name)
+        self.file.write(body)
+        size = RECORD.size + len(name) + len(body)
+        self.offset += size
+        self.stats['recorded'] += 1
+        self.stats['bytes'] += size
+
+    def flush(self):
+        """Write buffered records to the file."""
+        self.file.flush()
+        self.index.flush()
+
+    def close(self):
+        """Flush and close the archive."""
+        self.flush()
+        self.file.close()
+        self.index.close()
+        self.logger.info(f"Bid recorder stats: {self.stats}")
+
+
+class BidArchiveReader:
+    """Reads the records of an archive in order, optionally starting at a point in time."""
+
+    def __init__(self, path: str):
+        """
+        Parameters:
+            path (str): Archive file written by BidRecorder
+        """
+        self.path = path
+        self.index_times = []
+        self.index_offsets = []
+        try:
+            with open(index_path(path), 'rb') as file:
+                data = file.read()
+            for received_us, offset in INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % INDEX_ENTRY.size]):
+                self.index_times.append(received_us)
+                self.index_offsets.append(offset)
+        except FileNotFoundError:
+            pass  # Reading still works; seeking scans from the start
+
+    def records(self, start: float = None):
+        """
+        Yields the archived messages.
+
+        Parameters:
+            start (float): Skip messages received before this epoch second (None for all)
+
+        Yields:
+            tuple: (received_at epoch seconds, item_type, content_type, body)
+        """
+        start_us = None if start is None else int(start * 1_000_000)
+        with open(self.path, 'rb', buffering=WRITE_BUFFER) as file:
+            magic, version = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ArchiveError(f"{self.path} is not a version {VERSION} bid archive.")
+            if start_us is not None and self.index_times:
+                position = bisect.bisect_right(self.index_times, start_us) - 1
+                if position >= 0:
+                    file.seek(self.index_offsets[position])
+            while True:
+                header = file.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    return  # End of the archive (or a record cut short by a crash)
+                length, received_us, code, name_length = RECORD.unpack(header)
+                name = file.read(name_length)
+                body = file.read(length)
+                if len(body) < length:
+                    return
+                if start_us is not None and received_us < start_us:
+                    continue
+                yield received_us / 1_000_000, name.decode('utf-8'), CONTENT_TYPES[code], body
@@ -0,0 +1,208 @@
+"""
+Real-Time Auction Tracker: Bid Message Codec
+This module encodes and decodes bid messages either as JSON or as a compact fixed-layout binary
+record. The format is advertised through the message content_type so consumers can decode each
+message according to how it was sent.
+"""
+
+import json
+import struct
+from datetime import datetime, timezone
+
+JSON_CONTENT_TYPE = 'application/json'
+BINARY_CONTENT_TYPE = 'application/x-auction-bid'
+
+# Binary layout version, written as the first byte of every record
+# (version 2 adds the auction lot id to the fixed header)
+BINARY_VERSION = 1
+LOT_BINARY_VERSION = 2
+
+# Item types with a one-byte code; anything else is sent as text after the fixed header
+ITEM_CODES = ('electronics', 'furniture', 'art')
+ITEM_LOOKUP = {item: code for code, item in enumerate(ITEM_CODES)}
+OTHER_ITEM = 255
+
+# version, item code, bidder uuid, bid amount, timestamp (epoch microseconds)
+HEADER = struct.Struct('<BB16sdq')
+# version 2: the same followed by the lot id
+LOT_HEADER = struct.Struct('<BB16sdqI')
+TEXT_LENGTH = struct.Struct('<H')
+
+# All fields of a decoded bid; 'timestamp_us' is the timestamp as integer epoch microseconds
+ALL_FIELDS = ('bidder_id', 'bid_amount', 'timestamp', 'timestamp_us', 'item', 'lot_id', 'bidder_name', 'bidder_email')
+
+# Fields that can be read from the fixed binary header without touching the text section
+HEADER_FIELDS = frozenset(('bidder_id', 'bid_amount', 'timestamp', 'timestamp_us', 'item', 'lot_id'))
+
+
+class BidDecodeError(ValueError):
+    """Raised when a message body cannot be decoded as a bid."""
+
+
+def iso_to_micros(timestamp: str) -> int:
+    """Convert an ISO 8601 timestamp to integer epoch microseconds."""
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(round(moment.timestamp() * 1_000_000))
+
+
+def uuid_to_bytes(bidder_id: str) -> bytes:
+    """Convert a UUID string to its 16 raw bytes (faster than going through uuid.UUID)."""
+    raw = bytes.fromhex(bidder_id.replace('-', ''))
+    if len(raw) != 16:
+        raise ValueError(f"Invalid bidder UUID: {bidder_id}")
+    return raw
+
+
+def bytes_to_uuid(raw: bytes) -> str:
+    """Format 16 raw bytes as a hyphenated UUID string."""
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def micros_to_iso(timestamp_us: int) -> str:
+    """Convert integer epoch microseconds to a UTC ISO 8601 timestamp."""
+    return datetime.fromtimestamp(timestamp_us / 1_000_000, timezone.utc).isoformat()
+
+
+class LazyIsoTimestamp:
+    """
+    Epoch microseconds that format as ISO 8601 only when converted to text, for lazily formatted
+    (e.g. sampled) log arguments: the string is built only if the record is emitted.
+    """
+
+    __slots__ = ('timestamp_us',)
+
+    def __init__(self, timestamp_us: int):
+        self.timestamp_us = timestamp_us
+
+    def __str__(self):
+        return micros_to_iso(self.timestamp_us)
+
+
+def encode_bid(message: dict, content_type: str = JSON_CONTENT_TYPE) -> bytes:
+    """
+    Encodes a bid message for publishing.
+
+    Parameters:
+        message (dict): A bid as built by generate_fake_bid
+        content_type (str): JSON_CONTENT_TYPE or BINARY_CONTENT_TYPE
+
+    Returns:
+        bytes: The encoded message body
+    """
+    if content_type == JSON_CONTENT_TYPE:
+        return json.dumps(message).encode()
+    if content_type != BINARY_CONTENT_TYPE:
+        raise ValueError(f"Unsupported content type: {content_type}")
+
+    item = message['item']
+    item_code = ITEM_LOOKUP.get(item, OTHER_ITEM)
+    timestamp_us = message.get('timestamp_us')
+    if timestamp_us is None:
+        timestamp_us = iso_to_micros(message['timestamp'])
+    lot_id = message.get('lot_id')
+    if lot_id is None:
+        header = HEADER.pack(BINARY_VERSION, item_code, uuid_to_bytes(message['bidder_id']),
+                             message['bid_amount'], timestamp_us)
+    else:
+        header = LOT_HEADER.pack(LOT_BINARY_VERSION, item_code, uuid_to_bytes(message['bidder_id']),
+                                 message['bid_amount'], timestamp_us, lot_id)
+    parts = [header]
+    texts = (message.get('bidder_name', ''), message.get('bidder_email', ''))
+    if item_code == OTHER_ITEM:
+        texts = (item,) + texts
+    for text in texts:
+        raw = text.encode()
+        parts.append(TEXT_LENGTH.pack(len(raw)))
+        parts.append(raw)
+    return b''.join(parts)
+
+
+def decode_bid(body: bytes, content_type: str = None, fields=ALL_FIELDS) -> dict:
+    """
+    Decodes a bid message body according to its content type.
+
+    Binary records only decode the requested fields; the name and email text is skipped
+    entirely unless asked for. JSON bodies (and messages with no content type, as sent by
+    older producers) are parsed in full.
+
+    Parameters:
+        body (bytes): The message body
+        content_type (str): The content_type from the message properties
+        fields (iterable): Names of the fields to return (see ALL_FIELDS)
+
+    Returns:
+        dict: The requested fields of the bid
+    """
+    if content_type == BINARY_CONTENT_TYPE:
+        return decode_binary(body, fields)
+    if content_type in (None, JSON_CONTENT_TYPE):
+        try:
+            message = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise BidDecodeError(f"Failed to decode JSON: {e}") from e
+        if 'timestamp_us' in fields and 'timestamp' in message:
+            message['timestamp_us'] = iso_to_micros(message['timestamp'])
+        return message
+    raise BidDecodeError(f"Unsupported content type: {content_type}")
+
+
+def decode_binary(body: bytes, fields=ALL_FIELDS) -> dict:
+    """Decode the requested fields of a binary bid record."""
+    try:
+        version = body[0]
+        if version == LOT_BINARY_VERSION:
+            _, item_code, bidder, bid_amount, timestamp_us, lot_id = LOT_HEADER.unpack_from(body)
+            text_offset = LOT_HEADER.size
+        elif version == BINARY_VERSION:
+            _, item_code, bidder, bid_amount, timestamp_us = HEADER.unpack_from(body)
+            lot_id = None
+            text_offset = HEADER.size
+        else:
+            raise BidDecodeError(f"Unknown bid record version: {version}")
+    except (struct.error, IndexError) as e:
+        raise BidDecodeError(f"Truncated bid record: {e}") from e
+
+    message = {}
+    if 'bid_amount' in fields:
+        message['bid_amount'] = bid_amount
+    if 'timestamp_us' in fields:
+        message['timestamp_us'] = timestamp_us
+    if 'timestamp' in fields:
+        message['timestamp'] = micros_to_iso(timestamp_us)
+    if 'bidder_id' in fields:
+        message['bidder_id'] = bytes_to_uuid(bidder)
+    if 'item' in fields and item_code != OTHER_ITEM:
+        message['item'] = ITEM_CODES[item_code]
+    if 'lot_id' in fields and lot_id is not None:
+        message['lot_id'] = lot_id
+
+    if item_code == OTHER_ITEM or not HEADER_FIELDS.issuperset(fields):
+        texts = read_texts(body, 3 if item_code == OTHER_ITEM else 2, text_offset)
+        if item_code == OTHER_ITEM:
+            item = texts.pop(0)
+            if 'item' in fields:
+                message['item'] = item
+        if 'bidder_name' in fields:
+            message['bidder_name'] = texts[0]
+        if 'bidder_email' in fields:
+            message['bidder_email'] = texts[1]
+    return message
+
+
+def read_texts(body: bytes, count: int, offset: int = HEADER.size) -> list:
+    """Read count length-prefixed UTF-8 strings following the fixed header (which ends at offset)."""
+    texts = []
+    try:
+        for _ in range(count):
+            (length,) = TEXT_LENGTH.unpack_from(body, offset)
+            offset += TEXT_LENGTH.size
+            if offset + length > len(body):
+                raise BidDecodeError("Truncated bid record text.")
+            texts.append(body[offset:offset + length].decode())
+            offset += length
+    except (struct.error, UnicodeDecodeError) as e:
+        raise BidDecodeError(f"Malformed bid record text: {e}") from e
+    return texts
@@ -0,0 +1,264 @@
+"""
+Real-Time Auction Tracker: Bid Processing Pipeline
+This module holds the per-bid work shared by the consumers: updating the rolling window for the
+bid's item type and raising a high-bid alert when the bid exceeds the threshold (fixed, or a
+quantile of the item type's bids so far), flagging bidders who flood a lot with bids, feeding
+event-time windows keyed on the bid timestamp, and closing lots at their auction deadlines.
+"""
+
+import logging
+
+from bid_codec import LazyIsoTimestamp, micros_to_iso
+from dedupe import message_key
+from quantile_sketch import merge_sketch_snapshots
+from rolling_stats import RollingStats, merge_snapshots
+from util_logger import SAMPLED
+
+# Defaults matching consumer_v4.0
+WINDOW_SIZE = 5
+WINDOW_SECONDS = None
+BID_THRESHOLD = 800
+
+
+class BidPipeline:
+    """
+    Rolling windows and alert logic for a set of item types.
+
+    Alerts are handed to alert_sink, any object with an add(item_type, bid_amount, timestamp,
+    bidder_id) method such as AlertAggregator. With an auction_state, every bid that names a lot
+    updates the lot's state, and only a new high bid for its lot can raise an alert. With a
+    dedupe cache, a bid that was already processed is dropped before any window or alert work.
+    With thresholds, each item type alerts above a quantile of its own bids once it has enough of
+    them, and bid_threshold only applies while it warms up. With heavy_hitters, every bid is
+    counted per (bidder, lot) and a flagged bidder is handed to the sink's add_flood(). With
+    event_windows, every bid is also added to the event-time window of its bid time, keyed by
+    item type or, with event_window_key='lot', by (item type, lot id). With an auction_closer (which
+    needs the auction_state), every lot's deadline is tracked and closed lots are handed to the
+    sink's add_close().
+    """
+
+    def __init__(self, item_types, window_size: int = WINDOW_SIZE, window_seconds: float = WINDOW_SECONDS,
+                 bid_threshold: float = BID_THRESHOLD, alert_sink=None, auction_state=None, dedupe=None, thresholds=None,
+                 heavy_hitters=None, event_windows=None, event_window_key: str = 'item', auction_closer=None,
+                 logger=None):
+        """
+        Parameters:
+            item_types (iterable): Item types to keep windows for
+            window_size (int): Number of most recent bids kept per item type
+            window_seconds (float): Also limit each window to this many seconds (None for no limit)
+            bid_threshold (float): Bids above this amount raise an alert
+            alert_sink: Receiver for high-bid alerts (None to only log them)
+            auction_state (AuctionState): Per-lot state store consulted before alerting (None to alert on every bid above the threshold)
+            dedupe (IdempotencyCache): Cache of processed message ids (None to process every delivery)
+            thresholds (QuantileThresholds): Per-item-type quantile thresholds (None to always use bid_threshold)
+            heavy_hitters (HeavyHitterDetector): Per-bidder flood detection (None to skip it)
+            event_windows (EventTimeWindows): Tumbling or sliding windows of bid time (None to skip them)
+            event_window_key (str): 'item' to key event-time windows by item type, 'lot' by (item type, lot id)
+            auction_closer (AuctionCloser): Lot close deadlines with anti-sniping (None to never close lots)
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.windows = {item_type: RollingStats(max_count=window_size, max_age=window_seconds) for item_type in item_types}
+        self.bid_threshold = bid_threshold
+        self.alert_sink = alert_sink
+        self.auction_state = auction_state
+        self.dedupe = dedupe
+        self.thresholds = thresholds
+        self.heavy_hitters = heavy_hitters
+        self.event_windows = event_windows
+        self.event_window_key = event_window_key
+        self.auction_closer = auction_closer
+        self.logger = logger or logging.getLogger(__name__)
+
+    def process(self, item_type: str, message: dict) -> bool:
+        """
+        Adds one decoded bid to its item type's window and checks it against the threshold.
+
+        Parameters:
+            item_type (str): Item type the bid was placed on
+            message (dict): Decoded bid with bid_amount, timestamp, timestamp_us and bidder_id
+
+        Returns:
+            bool: True if the bid raised a high-bid alert
+        """
+        if self.update_window(item_type, message) is None:
+            return False
+        return self.check_alert(item_type, message)
+
+    def process_batch(self, bids) -> list:
+        """
+        Runs a micro-batch of decoded bids through the pipeline in delivery order.
+
+        Each bid gets the same window and alert work as in process(), but the per-bid log lines
+        are replaced by one window summary per item type per batch. A bid that raises is skipped
+        and reported, and the rest of the batch still runs.
+
+        Parameters:
+            bids (list): (item type, message) pairs
+
+        Returns:
+            list: (position in bids, exception) for every bid that failed
+        """
+        failures = []
+        windows = self.windows
+        seen = self.dedupe.seen if self.dedupe is not None else None
+        add_event = self.add_event if self.event_windows is not None else None
+        check_alert = self.check_alert
+        updated = {}  # item type -> bids added to its window in this batch
+        for position, (item_type, message) in enumerate(bids):
+            try:
+                if seen is not None and seen(message_key(message)):
+                    self.logger.info(f"Skipping duplicate {item_type} bid: {message['bid_amount']} at {micros_to_iso(message['timestamp_us'])}")
+                    continue
+                if add_event is not None:
+                    add_event(item_type, message)
+                window = windows.get(item_type)
+                if window is None:
+                    continue
+                window.append(message['bid_amount'], message['timestamp_us'] / 1_000_000, message.get('bidder_id'))
+                updated[item_type] = updated.get(item_type, 0) + 1
+                check_alert(item_type, message)
+            except Exception as e:
+                failures.append((position, e))
+        if updated and self.logger.isEnabledFor(logging.INFO):
+            for item_type, count in updated.items():
+                window = windows[item_type]
+                self.logger.info("Rolling window for %s updated with %s bids. Size: %s, Mean: %.2f, Min: %s, Max: %s, Std dev: %.2f",
+                                 item_type, count, window.count, window.mean, window.minimum, window.maximum, window.stddev,
+                                 extra=SAMPLED)
+        return failures
+
+    def update_window(self, item_type: str, message: dict):
+        """
+        Adds one decoded bid to its item type's window.
+
+        Returns:
+            RollingStats: The updated window (None if the item type has no window or the bid is a duplicate)
+        """
+        if self.dedupe is not None and self.dedupe.seen(message_key(message)):
+            self.logger.info(f"Skipping duplicate {item_type} bid: {message['bid_amount']} at {micros_to_iso(message['timestamp_us'])}")
+            return None
+        bid_amount = message['bid_amount']
+        timestamp = LazyIsoTimestamp(message['timestamp_us'])  # Formatted only if a sampled record is emitted
+        self.logger.info("Received %s message: %s at %s", item_type, bid_amount, timestamp, extra=SAMPLED)
+        if self.event_windows is not None:
+            self.add_event(item_type, message)
+
+        window = self.windows.get(item_type)
+        if window is None:
+            return None
+
+        # Add the bid to the rolling window
+        bid_time = message['timestamp_us'] / 1_000_000  # Epoch seconds of the bid
+        window.append(bid_amount, bid_time, message.get('bidder_id'))
+        if self.logger.isEnabledFor(logging.INFO):  # Skip the window statistics when INFO is off
+            self.logger.info("Rolling window for %s updated. Size: %s, Latest bid: %s at %s, Mean: %.2f, Min: %s, Max: %s, Std dev: %.2f",
+                             item_type, window.count, bid_amount, timestamp, window.mean, window.minimum, window.maximum,
+                             window.stddev, extra=SAMPLED)
+        return window
+
+    def add_event(self, item_type: str, message: dict):
+        """Adds a bid to the event-time windows under its item type (or item type and lot)."""
+        key = (item_type, message.get('lot_id')) if self.event_window_key == 'lot' else item_type
+        if not self.event_windows.add(key, message['bid_amount'], message['timestamp_us'], message.get('bidder_id')):
+            self.logger.info("Dropped %s bid too late for its event-time window: %s at %s", item_type,
+                             message['bid_amount'], LazyIsoTimestamp(message['timestamp_us']), extra=SAMPLED)
+
+    def check_alert(self, item_type: str, message: dict) -> bool:
+        """
+        Updates the bid's lot and its item type's quantile sketch, and hands the bid to the alert
+        sink if it exceeds the threshold (and, with an auction state, is the lot's new high bid).
+
+        Returns:
+            bool: True if the bid raised a high-bid alert
+        """
+        bid_amount = message['bid_amount']
+        lot_id = message.get('lot_id')
+        threshold = self.bid_threshold
+        if self.thresholds is not None:
+            adaptive = self.thresholds.observe(item_type, bid_amount)  # Every bid feeds the sketch
+            if adaptive is not None:
+                threshold = adaptive
+        if self.heavy_hitters is not None:
+            flood = self.heavy_hitters.add(message.get('bidder_id'), lot_id, message['timestamp_us'])
+            if flood is not None:
+                self.flag_bidder(item_type, message, flood)
+        if self.auction_closer is not None and lot_id is not None:
+            for event in self.auction_closer.bid(lot_id, message['timestamp_us']):  # Before the bid updates its lot
+                self.close_lot(event)
+        if self.auction_state is not None and lot_id is not None:
+            new_high = self.auction_state.update(lot_id, item_type, bid_amount, message['timestamp_us'], message.get('bidder_id'))
+            if not new_high:
+                return False
+        if bid_amount <= threshold:
+            return False
+        timestamp = micros_to_iso(message['timestamp_us'])
+        self.logger.info(f"High bid alert: {bid_amount} at {timestamp} (threshold {threshold:.2f}). Adding to alert digest.")
+        if self.alert_sink is not None:
+            self.alert_sink.add(item_type, bid_amount, timestamp, message.get('bidder_id'))
+        return True
+
+    def flag_bidder(self, item_type: str, message: dict, bids: int):
+        """Logs a bidder flagged for flooding a lot and hands it to the alert sink."""
+        bidder_id = message.get('bidder_id')
+        lot_id = message.get('lot_id')
+        self.logger.warning(f"Bid flood: bidder {bidder_id} placed {bids} bids on {item_type} lot {lot_id} this window.")
+        if self.alert_sink is not None:
+            self.alert_sink.add_flood(item_type, bidder_id, lot_id, bids, micros_to_iso(message['timestamp_us']))
+
+    def close_lot(self, event: dict):
+        """Logs a closed lot and hands it to the alert sink."""
+        closed_at = micros_to_iso(event['closed_us'])
+        self.logger.info(f"Auction closed: {event['item_type']} lot {event['lot_id']} won by {event['winner']} at "
+                         f"{event['price']} after {event['bid_count']} bids ({event['extensions']} extensions), {closed_at}")
+        if self.alert_sink is not None and event['item_type'] is not None:
+            self.alert_sink.add_close(event['item_type'], event['lot_id'], event['winner'], event['price'],
+                                      event['bid_count'], event['extensions'], closed_at)
+
+    def poll(self):
+        """Emits due event-time windows and closes due lots by the clock (call while bids are quiet)."""
+        if self.event_windows is not None:
+            self.event_windows.poll()
+        if self.auction_closer is not None:
+            for event in self.auction_closer.poll():
+                self.close_lot(event)
+
+    def snapshot(self) -> dict:
+        """
+        Returns the mergeable state of every window (with its quantile sketch under 'sketch' when
+        the pipeline has thresholds).
+
+        Returns:
+            dict: item type -> RollingStats snapshot
+        """
+        snapshot = {item_type: window.snapshot() for item_type, window in self.windows.items()}
+        if self.thresholds is not None:
+            for item_type, sketch in self.thresholds.snapshot().items():
+                if item_type in snapshot:
+                    snapshot[item_type]['sketch'] = sketch
+        return snapshot
+
+
+def merge_pipeline_snapshots(snapshots) -> dict:
+    """
+    Combines BidPipeline snapshots (e.g. from several worker processes) per item type.
+
+    Parameters:
+        snapshots (iterable): Snapshots from BidPipeline.snapshot()
+
+    Returns:
+        dict: item type -> merged snapshot, with the sample variance added (and the merged
+        QuantileSketch under 'sketch' when the snapshots carry sketches)
+    """
+    merged = {}
+    sketches = []
+    for snapshot in snapshots:
+        for item_type, window in snapshot.items():
+            if 'sketch' in window:
+                window = dict(window)
+                sketches.append({item_type: window.pop('sketch')})
+            merged[item_type] = merge_snapshots(merged[item_type], window) if item_type in merged else dict(window)
+    for window in merged.values():
+        window['variance'] = window['m2'] / (window['count'] - 1) if window['count'] > 1 else 0.0
+    for item_type, sketch in merge_sketch_snapshots(sketches).items():
+        merged[item_type]['sketch'] = sketch
+    return merged
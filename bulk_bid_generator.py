@@ -0,0 +1,128 @@
+"""
+Real-Time Auction Tracker: Bulk Bid Generator
+This module generates synthetic bids in batches from a seedable random generator, drawing bidder
+names and emails from pools built once up front instead of calling Faker for every message.
+"""
+
+import random
+from datetime import datetime, timezone
+
+from lot_routing import LOT_COUNT  # Lot n is an item of type ITEM_TYPES[n % len(ITEM_TYPES)]
+
+# Item types bids are spread across (matches generate_fake_bid)
+ITEM_TYPES = ('electronics', 'furniture', 'art')
+
+# Bids generated per batch
+BATCH_SIZE = 1024
+
+# Distinct bidder names/emails in the pools
+POOL_SIZE = 1000
+
+# Bid amount range in dollars (matches generate_fake_bid)
+MIN_AMOUNT = 10
+MAX_AMOUNT = 1000
+
+
+def build_bidder_pools(pool_size: int = POOL_SIZE, seed: int = None):
+    """
+    Build name and email pools with Faker (called once, not per bid).
+
+    Parameters:
+        pool_size (int): Number of names and emails to generate
+        seed (int): Seed for reproducible pools
+
+    Returns:
+        tuple: (names, emails) lists
+    """
+    from faker import Faker  # Only needed to build the pools
+
+    fake = Faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+    return [fake.name() for _ in range(pool_size)], [fake.email() for _ in range(pool_size)]
+
+
+def format_uuid4(bits: int) -> str:
+    """Format 128 random bits as a version-4 UUID string."""
+    bits = (bits & ~(0xF000 << 64) | (0x4000 << 64))  # Version 4
+    bits = (bits & ~(0xC000 << 48) | (0x8000 << 48))  # RFC 4122 variant
+    h = f"{bits:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+class BulkBidGenerator:
+    """
+    Iterator of bid dictionaries shaped like generate_fake_bid's, produced a batch at a time.
+
+    Everything except the timestamp comes from one seeded random.Random, so two generators with
+    the same seed and pools yield the same bids. Timestamps are taken when each bid is handed
+    out so they reflect send time.
+    """
+
+    def __init__(self, seed: int = None, batch_size: int = BATCH_SIZE, names: list = None, emails: list = None,
+                 pool_size: int = POOL_SIZE, item_types=ITEM_TYPES, lot_count: int = LOT_COUNT,
+                 min_amount: float = MIN_AMOUNT, max_amount: float = MAX_AMOUNT, clock=None):
+        """
+        Parameters:
+            seed (int): Seed for reproducible runs (None for a random seed)
+            batch_size (int): Bids generated per batch
+            names (list): Bidder name pool (built with Faker if not given)
+            emails (list): Bidder email pool (built with Faker if not given)
+            pool_size (int): Size of the pools built when names/emails are not given
+            item_types (tuple): Item types to choose from
+            lot_count (int): Number of auction lots (each lot has a fixed item type)
+            min_amount (float): Lowest bid amount
+            max_amount (float): Highest bid amount
+            clock: Callable returning the current UTC datetime (defaults to datetime.now)
+        """
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        if names is None or emails is None:
+            names, emails = build_bidder_pools(pool_size, seed)
+        self.names = names
+        self.emails = emails
+        self.item_types = tuple(item_types)
+        self.lot_count = lot_count
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.pending = []
+
+    def batch(self) -> list:
+        """
+        Generate one batch of bids without timestamps.
+
+        Returns:
+            list: bid dictionaries (the 'timestamp' key is filled in by __next__)
+        """
+        rng = self.rng
+        count = self.batch_size
+        span = self.max_amount - self.min_amount
+        amounts = [round(self.min_amount + span * rng.random(), 2) for _ in range(count)]
+        lots = [rng.randrange(self.lot_count) for _ in range(count)]
+        item_types = self.item_types
+        bidders = [rng.randrange(len(self.names)) for _ in range(count)]
+        ids = [format_uuid4(rng.getrandbits(128)) for _ in range(count)]
+        return [
+            {
+                'bidder_id': bidder_id,
+                'bid_amount': amount,
+                'timestamp': None,
+                'item': item_types[lot_id % len(item_types)],
+                'lot_id': lot_id,
+                'bidder_name': self.names[bidder],
+                'bidder_email': self.emails[bidder % len(self.emails)],
+            }
+            for bidder_id, amount, lot_id, bidder in zip(ids, amounts, lots, bidders)
+        ]
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        if not self.pending:
+            self.pending = self.batch()
+            self.pending.reverse()  # pop() from the end hands bids out in generation order
+        bid = self.pending.pop()
+        bid['timestamp'] = self.clock().isoformat()
+        return bid
@@ -0,0 +1,368 @@
+"""
+Real-Time Auction Tracker: Multi-Process Consumer Supervisor
+This script starts N consumer worker processes, each with its own RabbitMQ connection, assigns
+the auction queues to them, restarts any worker that crashes, and merges the workers' rolling
+window statistics on demand over a control pipe. In 'lots' routing mode each worker consumes a
+contiguous range of lot shard queues, and the ranges are rebalanced when workers are added or
+removed (SIGTTIN adds a worker, SIGTTOU removes one).
+
+Usage:
+    python consumer_supervisor.py [worker_count]
+
+worker_count defaults to the CPU count, capped at the number of queues (item-type queues, or lot
+shard queues in 'lots' mode) so that no two workers compete for a queue.
+"""
+
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from alert_aggregator import AlertAggregator
+from alert_dispatcher import AlertDispatcher
+from bid_codec import BidDecodeError, decode_bid
+from auction_state import AuctionState
+from bid_pipeline import BidPipeline, merge_pipeline_snapshots
+from dedupe import IdempotencyCache
+from quantile_sketch import QuantileThresholds
+from heavy_hitters import HeavyHitterDetector
+from lot_routing import SHARD_COUNT, assign_shards, declare_topology, item_type_for, shard_queue_name
+from transport import connect
+from util_logger import setup_logger, shutdown_logger
+
+# Set up logger
+logger, logname = setup_logger(__file__)
+
+# Log per-bid lines for 1 in this many bids in each worker
+LOG_SAMPLE_EVERY = 100
+
+# Message transport (workers are separate processes, so this needs a real broker)
+TRANSPORT_URL = 'pika://localhost'
+
+# Configuration for mapping queue names to item types
+QUEUE_CONFIG = {
+    'auction_queue_electronics': 'electronics',
+    'auction_queue_furniture': 'furniture',
+    'auction_queue_art': 'art'
+}
+
+# Routing: 'queues' splits the per-item-type queues above; 'lots' splits the lot shard queues
+ROUTING_MODE = 'queues'
+
+# Worker configuration: consumer_v4.0's windows, thresholds, dedupe, flood detection and lot state
+# (without its event-time windows or auction closing)
+WINDOW_SIZE = 5
+WINDOW_SECONDS = None
+BID_THRESHOLD = 800
+ALERT_QUANTILE = 99.5  # None to always use BID_THRESHOLD
+ALERT_MIN_BIDS = 500
+FLOOD_WINDOW = 60
+FLOOD_THRESHOLD = 30
+ALERT_FLUSH_INTERVAL = 60
+CONSUMER_FIELDS = ('bidder_id', 'bid_amount', 'timestamp_us', 'lot_id')
+DEDUPE_ENTRIES = 100_000
+DEDUPE_TTL = 600
+LOT_MAX_IDLE = 3600  # Lot state per worker: a lot's bids all arrive on one queue, so one worker holds it
+
+# Seconds a worker spends in the broker event loop before checking its control pipe
+WORKER_POLL_INTERVAL = 0.2
+
+# Seconds between supervisor health checks
+MONITOR_INTERVAL = 1.0
+
+# Seconds between merged statistics reports
+STATS_INTERVAL = 60.0
+
+# Seconds to wait for a worker to answer a snapshot request
+SNAPSHOT_TIMEOUT = 2.0
+
+# Minimum seconds between restarts of the same worker (avoids a tight crash loop)
+RESTART_DELAY = 5.0
+
+
+def assign_queues(queue_names: list, worker_count: int) -> list:
+    """
+    Assigns queues to workers.
+
+    With no more workers than queues, the queues are split round-robin so each is consumed by
+    exactly one worker. With more workers than queues, each worker consumes one queue and busy
+    queues get several competing workers.
+
+    Parameters:
+        queue_names (list): Names of the queues to consume
+        worker_count (int): Number of worker processes
+
+    Returns:
+        list: One list of queue names per worker
+    """
+    if worker_count <= len(queue_names):
+        return [queue_names[worker_id::worker_count] for worker_id in range(worker_count)]
+    return [[queue_names[worker_id % len(queue_names)]] for worker_id in range(worker_count)]
+
+
+def default_worker_count() -> int:
+    """One worker per CPU, but no more workers than there are queues to give each its own."""
+    queue_count = SHARD_COUNT if ROUTING_MODE == 'lots' else len(QUEUE_CONFIG)
+    return min(os.cpu_count() or 1, queue_count)
+
+
+def plan_assignments(worker_count: int) -> list:
+    """
+    Queues for each worker under the current routing mode.
+
+    Parameters:
+        worker_count (int): Number of worker processes (in 'lots' mode, at most SHARD_COUNT)
+
+    Returns:
+        list: One list of queue names per worker
+    """
+    if ROUTING_MODE == 'lots':
+        shard_ranges = assign_shards(SHARD_COUNT, min(worker_count, SHARD_COUNT))
+        return [[shard_queue_name(shard) for shard in shard_range] for shard_range in shard_ranges]
+    return assign_queues(list(QUEUE_CONFIG), worker_count)
+
+
+def run_worker(worker_id: int, queue_names: list, control):
+    """
+    Worker process: consume the assigned queues and answer control requests.
+
+    Parameters:
+        worker_id (int): Index of this worker
+        queue_names (list): Queues this worker consumes
+        control: Worker end of the control pipe
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The supervisor handles Ctrl+C and stops workers itself
+    worker_logger, _ = setup_logger(f"consumer_worker_{worker_id}.py", asynchronous=True, sample_every=LOG_SAMPLE_EVERY)
+
+    dispatcher = AlertDispatcher(logger=worker_logger)
+    aggregator = AlertAggregator(dispatcher, flush_interval=ALERT_FLUSH_INTERVAL, logger=worker_logger)
+    # Per worker: redeliveries are caught when their queue has this worker to itself (the default worker
+    # count); with more workers than queues a redelivery can land on another worker and is processed again
+    dedupe = IdempotencyCache(max_entries=DEDUPE_ENTRIES, ttl=DEDUPE_TTL, logger=worker_logger)
+    thresholds = QuantileThresholds(quantile=ALERT_QUANTILE, min_count=ALERT_MIN_BIDS, logger=worker_logger) if ALERT_QUANTILE else None
+    heavy_hitters = HeavyHitterDetector(window_seconds=FLOOD_WINDOW, flood_threshold=FLOOD_THRESHOLD, logger=worker_logger)
+    auction_state = AuctionState(max_idle=LOT_MAX_IDLE, logger=worker_logger)
+    pipeline = BidPipeline(QUEUE_CONFIG.values(), window_size=WINDOW_SIZE, window_seconds=WINDOW_SECONDS,
+                           bid_threshold=BID_THRESHOLD, alert_sink=aggregator, auction_state=auction_state,
+                           dedupe=dedupe, thresholds=thresholds, heavy_hitters=heavy_hitters, logger=worker_logger)
+
+    def callback(ch, method, properties, body):
+        """Decode a bid, run it through the pipeline, and ack or reject it."""
+        try:
+            message = decode_bid(body, properties.content_type, CONSUMER_FIELDS)
+            pipeline.process(item_type_for(method.routing_key, QUEUE_CONFIG), message)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+        except BidDecodeError as e:
+            worker_logger.error(f"Failed to decode message: {e}")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        except Exception as e:
+            worker_logger.error(f"An error occurred while processing the message: {e}")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+
+    connection = connect(TRANSPORT_URL)
+    try:
+        channel = connection.channel()
+        if ROUTING_MODE == 'lots':
+            declare_topology(channel)  # Idempotent; makes sure the exchange and bindings exist
+        for queue_name in queue_names:
+            channel.queue_declare(queue=queue_name, durable=True)
+            channel.basic_consume(queue=queue_name, on_message_callback=callback)
+        worker_logger.info(f"Worker {worker_id} (pid {os.getpid()}) consuming {', '.join(queue_names)}.")
+
+        while True:
+            connection.process_data_events(time_limit=WORKER_POLL_INTERVAL)
+            if control.poll():
+                command = control.recv()
+                if command == 'snapshot':
+                    control.send(pipeline.snapshot())
+                elif command == 'stop':
+                    break
+    finally:
+        if connection.is_open:
+            connection.close()
+        aggregator.close()
+        dispatcher.close(timeout=10)
+        worker_logger.info(f"Worker {worker_id} stopped. Dedupe stats: {dedupe.stats}; lot state stats: "
+                           f"{auction_state.stats}, {len(auction_state)} lots tracked")
+        shutdown_logger(worker_logger)
+
+
+class Supervisor:
+    """Starts, monitors and restarts consumer worker processes."""
+
+    def __init__(self, worker_count: int):
+        """
+        Parameters:
+            worker_count (int): Number of worker processes to run
+        """
+        self.assignments = plan_assignments(worker_count)
+        self.workers = {}  # worker id -> (process, supervisor end of control pipe)
+        self.started_at = {}  # worker id -> monotonic time of last start
+        self.restarts = 0
+
+    def start_worker(self, worker_id: int):
+        """Start (or restart) one worker process."""
+        supervisor_end, worker_end = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(worker_id, self.assignments[worker_id], worker_end),
+            name=f"consumer-worker-{worker_id}",
+        )
+        process.start()
+        self.workers[worker_id] = (process, supervisor_end)
+        self.started_at[worker_id] = time.monotonic()
+        logger.info(f"Started worker {worker_id} (pid {process.pid}) for {', '.join(self.assignments[worker_id])}.")
+
+    def start(self):
+        """Start every worker."""
+        for worker_id in range(len(self.assignments)):
+            self.start_worker(worker_id)
+
+    def check_workers(self):
+        """Restart any worker that has exited."""
+        for worker_id, (process, control) in list(self.workers.items()):
+            if process.is_alive():
+                continue
+            if time.monotonic() - self.started_at[worker_id] < RESTART_DELAY:
+                continue  # Wait out the restart delay before trying again
+            logger.warning(f"Worker {worker_id} exited with code {process.exitcode}. Restarting.")
+            control.close()
+            self.restarts += 1
+            self.start_worker(worker_id)
+
+    def stop_worker(self, worker_id: int):
+        """Ask one worker to stop and wait for it to exit."""
+        process, control = self.workers.pop(worker_id)
+        if process.is_alive():
+            try:
+                control.send('stop')
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=15)
+            if process.is_alive():
+                process.terminate()
+        control.close()
+
+    def rebalance(self, worker_count: int):
+        """
+        Change the number of workers and reassign queues (shard ranges in 'lots' mode).
+
+        Workers whose assignment changes are stopped before any worker is started on the new
+        assignment, so their unacknowledged messages are requeued before another worker takes
+        over the queue and each lot's bids stay in order. Workers keeping their queues carry on.
+
+        Parameters:
+            worker_count (int): New number of workers
+        """
+        assignments = plan_assignments(max(1, worker_count))
+        changed = [worker_id for worker_id in self.workers
+                   if worker_id >= len(assignments) or assignments[worker_id] != self.assignments[worker_id]]
+        for worker_id in changed:
+            self.stop_worker(worker_id)
+        self.assignments = assignments
+        for worker_id in range(len(assignments)):
+            if worker_id not in self.workers:
+                self.start_worker(worker_id)
+        logger.info(f"Rebalanced to {len(assignments)} workers ({len(changed)} reassigned).")
+
+    def collect_stats(self) -> dict:
+        """
+        Ask every live worker for its window snapshot and merge them.
+
+        Returns:
+            dict: item type -> merged window statistics
+        """
+        pending = []
+        for worker_id, (process, control) in self.workers.items():
+            if process.is_alive():
+                try:
+                    control.send('snapshot')
+                    pending.append((worker_id, control))
+                except (BrokenPipeError, OSError):
+                    pass
+        snapshots = []
+        for worker_id, control in pending:
+            try:
+                if control.poll(SNAPSHOT_TIMEOUT):
+                    snapshots.append(control.recv())
+                else:
+                    logger.warning(f"Worker {worker_id} did not answer the snapshot request.")
+            except (EOFError, OSError):
+                logger.warning(f"Worker {worker_id} closed its control pipe.")
+        return merge_pipeline_snapshots(snapshots)
+
+    def report_stats(self):
+        """Log the merged statistics across all workers."""
+        for item_type, stats in self.collect_stats().items():
+            if stats['count']:
+                logger.info(f"Merged window for {item_type}: Size: {stats['count']}, Mean: {stats['mean']:.2f}, "
+                            f"Min: {stats['min']}, Max: {stats['max']}, Variance: {stats['variance']:.2f}")
+            else:
+                logger.info(f"Merged window for {item_type}: empty")
+            sketch = stats.get('sketch')
+            if sketch is not None and sketch.count:
+                logger.info(f"Merged quantiles for {item_type} over {sketch.count} bids: p50 {sketch.quantile(50):.2f}, "
+                            f"p99 {sketch.quantile(99):.2f}, p{ALERT_QUANTILE:g} {sketch.quantile(ALERT_QUANTILE):.2f}")
+
+    def stop(self):
+        """Ask every worker to stop and wait for them to exit."""
+        for process, control in self.workers.values():
+            if process.is_alive():
+                try:
+                    control.send('stop')
+                except (BrokenPipeError, OSError):
+                    pass
+        for process, _ in self.workers.values():
+            process.join(timeout=15)
+            if process.is_alive():
+                process.terminate()
+        logger.info(f"All workers stopped. Restarts during run: {self.restarts}")
+
+
+def main(worker_count: int):
+    """
+    Run the supervisor until interrupted.
+
+    Parameters:
+        worker_count (int): Number of worker processes
+    """
+    supervisor = Supervisor(worker_count)
+    report_requested = False
+    worker_change = 0
+
+    def request_report(signum, frame):
+        nonlocal report_requested
+        report_requested = True
+
+    def request_scale(signum, frame):
+        nonlocal worker_change
+        worker_change += 1 if signum == signal.SIGTTIN else -1
+
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, request_report)  # kill -USR1 <pid> prints merged stats on demand
+    if hasattr(signal, 'SIGTTIN'):
+        signal.signal(signal.SIGTTIN, request_scale)  # kill -TTIN <pid> adds a worker
+        signal.signal(signal.SIGTTOU, request_scale)  # kill -TTOU <pid> removes a worker
+
+    supervisor.start()
+    next_report = time.monotonic() + STATS_INTERVAL
+    try:
+        while True:
+            time.sleep(MONITOR_INTERVAL)
+            if worker_change:
+                target, worker_change = len(supervisor.assignments) + worker_change, 0
+                supervisor.rebalance(target)
+            supervisor.check_workers()
+            if report_requested or time.monotonic() >= next_report:
+                report_requested = False
+                next_report = time.monotonic() + STATS_INTERVAL
+                supervisor.report_stats()
+    except KeyboardInterrupt:
+        logger.info("Supervisor interrupted. Stopping workers.")
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else default_worker_count())
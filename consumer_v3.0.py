@@ -10,8 +10,10 @@ Revised: June 12, 2024
 import pika
 import json
 import sys
-from collections import deque
+from datetime import datetime
 from util_logger import setup_logger
+from rolling_stats import RollingStats
+from window_checkpoint import WindowCheckpointer
 
 # Set up logger
 logger, logname = setup_logger(__file__)
@@ -24,12 +26,20 @@ QUEUE_CONFIG = {
 }
 
 # Rolling window configuration
+WINDOW_SIZE = 5  # Number of most recent bids kept per item type
+WINDOW_SECONDS = None  # Set to a number of seconds to also limit the window by age
+
 ROLLING_WINDOWS = {
-    'electronics': deque(maxlen=5),  # Track the last 5 bids for electronics
-    'furniture': deque(maxlen=5),  # Track the last 5 bids for furniture
-    'art': deque(maxlen=5)  # Track the last 5 bids for art
+    'electronics': RollingStats(max_count=WINDOW_SIZE, max_age=WINDOW_SECONDS),  # Statistics over recent electronics bids
+    'furniture': RollingStats(max_count=WINDOW_SIZE, max_age=WINDOW_SECONDS),  # Statistics over recent furniture bids
+    'art': RollingStats(max_count=WINDOW_SIZE, max_age=WINDOW_SECONDS)  # Statistics over recent art bids
 }
 
+# Window checkpoints so the windows survive a restart
+CHECKPOINT_PATH = 'checkpoints/consumer_v3.0.ckpt'
+CHECKPOINT_INTERVAL = 5  # Seconds between checkpoints
+CHECKPOINTER = WindowCheckpointer(CHECKPOINT_PATH, ROLLING_WINDOWS, interval=CHECKPOINT_INTERVAL, logger=logger)
+
 def callback(ch, method, properties, body):
     """
     Callback function for processing messages from the RabbitMQ queue.
@@ -47,12 +57,15 @@ def callback(ch, method, properties, body):
 
         # Add message to the rolling window
         if item_type in ROLLING_WINDOWS:
-            ROLLING_WINDOWS[item_type].append(message)
+            window = ROLLING_WINDOWS[item_type]
+            bid_time = datetime.fromisoformat(message['timestamp']).timestamp()  # Epoch seconds of the bid
+            window.append(message['bid_amount'], bid_time, message.get('bidder_id'))
             # Log the summary of the rolling window
-            latest_message = ROLLING_WINDOWS[item_type][-1]
-            logger.info(f"Rolling window for {item_type} updated. Size: {len(ROLLING_WINDOWS[item_type])}, Latest bid: {latest_message['bid_amount']} at {latest_message['timestamp']}")
+            logger.info(f"Rolling window for {item_type} updated. Size: {window.count}, Latest bid: {message['bid_amount']} at {message['timestamp']}, "
+                        f"Mean: {window.mean:.2f}, Min: {window.minimum}, Max: {window.maximum}, Std dev: {window.stddev:.2f}")
 
         ch.basic_ack(delivery_tag=method.delivery_tag)  # Acknowledge the message
+        CHECKPOINTER.maybe_checkpoint()  # Hands a snapshot to the writer thread when one is due
     except json.JSONDecodeError as e:
         logger.error(f"Failed to decode JSON: {e}")
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)  # Reject the message without requeueing
@@ -64,6 +77,7 @@ def main():
     """
     Main function to set up RabbitMQ consumer.
     """
+    CHECKPOINTER.restore()  # Warm the windows from the last checkpoint
     try:
         # Create a blocking connection to the RabbitMQ server
         connection = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
@@ -83,6 +97,8 @@ def main():
         logger.info("Consumer interrupted. Closing connection.")
         if 'connection' in locals() and connection.is_open:
             connection.close()  # Close the connection gracefully
+    finally:
+        CHECKPOINTER.close()  # Write a final checkpoint
 
 if __name__ == "__main__":
     main()  # Run the main function if this script is executed directly
@@ -7,15 +7,35 @@ Date: June 11, 2024
 Revised: June 12, 2024
 """
 
-import pika
-import json
+import signal
 import sys
-from collections import deque
+import time
 from util_logger import setup_logger
-from emailer import createAndSendEmailAlert
+from transport import CONNECTION_ERRORS, connect
+from bid_codec import BidDecodeError, decode_bid
+from bid_pipeline import BidPipeline
+from auction_state import AuctionState
+from dedupe import IdempotencyCache
+from quantile_sketch import QuantileThresholds
+from heavy_hitters import HeavyHitterDetector
+from event_windows import EventTimeWindows
+from auction_close import AuctionCloser
+from alert_dispatcher import AlertDispatcher
+from alert_aggregator import AlertAggregator
+from latency_histogram import LatencyMonitor
+from window_checkpoint import WindowCheckpointer
+from bid_archive import BidRecorder
+from lot_routing import declare_topology, item_type_for
+from micro_batch import MicroBatcher
 
-# Set up logger
-logger, logname = setup_logger(__file__)
+# Log per-bid lines for 1 in this many bids (warnings and errors are always logged)
+LOG_SAMPLE_EVERY = 100
+
+# Set up logger (records are written by a background thread)
+logger, logname = setup_logger(__file__, asynchronous=True, sample_every=LOG_SAMPLE_EVERY)
+
+# Message transport: "pika://localhost" for RabbitMQ, "memory://" for the in-process broker
+TRANSPORT_URL = 'pika://localhost'
 
 # Configuration for mapping queue names to item types
 QUEUE_CONFIG = {
@@ -24,16 +44,96 @@ QUEUE_CONFIG = {
     'auction_queue_art': 'art'
 }
 
+# Routing: 'queues' consumes the per-item-type queues above; 'lots' consumes every lot shard queue
+# (use consumer_supervisor.py to split the shards across several consumers)
+ROUTING_MODE = 'queues'
+
 # Rolling window configuration
-ROLLING_WINDOWS = {
-    'electronics': deque(maxlen=5),
-    'furniture': deque(maxlen=5),
-    'art': deque(maxlen=5)
-}
+WINDOW_SIZE = 5  # Number of most recent bids kept per item type
+WINDOW_SECONDS = None  # Set to a number of seconds to also limit the window by age
+
+# Only the bid fields the consumer uses are decoded from compact binary messages
+CONSUMER_FIELDS = ('bidder_id', 'bid_amount', 'timestamp_us', 'lot_id')
 
 # Define the bid threshold
 BID_THRESHOLD = 800  # Change this to an amount that will trigger alerts appropriately
 
+# Alert on bids above this percentile of their item type's bids (None to always use BID_THRESHOLD);
+# BID_THRESHOLD still applies until an item type has ALERT_MIN_BIDS bids
+ALERT_QUANTILE = 99.5
+ALERT_MIN_BIDS = 500
+THRESHOLDS = QuantileThresholds(quantile=ALERT_QUANTILE, min_count=ALERT_MIN_BIDS, logger=logger) if ALERT_QUANTILE else None
+
+# Current high bid, bidder and bid rate of every lot; only a lot's new high bid can raise an alert
+LOT_MAX_IDLE = 3600  # Forget lots with no bids for this many seconds
+LEADERBOARD_SIZE = 20  # Lots listed in the on-demand leaderboard report
+AUCTION_STATE = AuctionState(max_idle=LOT_MAX_IDLE, logger=logger)
+
+# Every lot closes AUCTION_SECONDS after its first bid; a bid within SNIPE_WINDOW seconds of the close moves
+# it to SNIPE_EXTENSION seconds after that bid. Winners, final prices and bid counts go to the alert digests
+AUCTION_SECONDS = 300
+SNIPE_WINDOW = 30
+SNIPE_EXTENSION = 60
+AUCTION_CLOSER = AuctionCloser(AUCTION_STATE, auction_seconds=AUCTION_SECONDS, snipe_window=SNIPE_WINDOW,
+                               snipe_extension=SNIPE_EXTENSION, logger=logger)
+
+# Flag bidders who place FLOOD_THRESHOLD bids on one lot within FLOOD_WINDOW seconds (shill bidding or bots)
+FLOOD_WINDOW = 60
+FLOOD_THRESHOLD = 30
+HEAVY_HITTERS = HeavyHitterDetector(window_seconds=FLOOD_WINDOW, flood_threshold=FLOOD_THRESHOLD, logger=logger)
+
+# Event-time windows of EVENT_WINDOW_SECONDS by bid timestamp (sliding every EVENT_WINDOW_SLIDE seconds,
+# or tumbling with None), keyed by item type ('item') or by lot ('lot'). The watermark trails the newest
+# bid time by WATERMARK_DELAY seconds; a window's aggregates are logged once the watermark passes its end,
+# and again for bids up to ALLOWED_LATENESS seconds late (later bids are dropped)
+EVENT_WINDOW_SECONDS = 60
+EVENT_WINDOW_SLIDE = None
+EVENT_WINDOW_KEY = 'item'
+WATERMARK_DELAY = 5
+ALLOWED_LATENESS = 30
+EVENT_WINDOWS = EventTimeWindows(window_seconds=EVENT_WINDOW_SECONDS, slide_seconds=EVENT_WINDOW_SLIDE,
+                                 max_out_of_order=WATERMARK_DELAY, allowed_lateness=ALLOWED_LATENESS, logger=logger)
+
+# Redelivered (or republished) bids are recognized by bidder id and timestamp and skipped
+DEDUPE_ENTRIES = 100_000  # Recent message ids remembered exactly
+DEDUPE_TTL = 600  # Seconds an id is remembered exactly
+DEDUPE_BLOOM_CAPACITY = None  # Ids per Bloom filter generation for a longer horizon; its false positives skip real bids
+DEDUPE = IdempotencyCache(max_entries=DEDUPE_ENTRIES, ttl=DEDUPE_TTL, bloom_capacity=DEDUPE_BLOOM_CAPACITY, logger=logger)
+
+# Rolling windows and high-bid checks for each item type
+PIPELINE = BidPipeline(QUEUE_CONFIG.values(), window_size=WINDOW_SIZE, window_seconds=WINDOW_SECONDS,
+                       bid_threshold=BID_THRESHOLD, auction_state=AUCTION_STATE, dedupe=DEDUPE,
+                       thresholds=THRESHOLDS, heavy_hitters=HEAVY_HITTERS, event_windows=EVENT_WINDOWS,
+                       event_window_key=EVENT_WINDOW_KEY, auction_closer=AUCTION_CLOSER, logger=logger)
+ROLLING_WINDOWS = PIPELINE.windows
+
+# Window checkpoints so the windows survive a restart
+CHECKPOINT_PATH = 'checkpoints/consumer_v4.0.ckpt'
+CHECKPOINT_INTERVAL = 5  # Seconds between checkpoints
+CHECKPOINTER = WindowCheckpointer(CHECKPOINT_PATH, ROLLING_WINDOWS, interval=CHECKPOINT_INTERVAL, logger=logger)
+
+# Set to a file path (e.g. 'recordings/consumer_v4.0.bids') to archive consumed bids for replay_bids.py
+RECORDING_PATH = None
+RECORDER = None
+
+# Email alerts are sent in the background so a slow mail server never delays acks
+ALERT_DISPATCHER = None
+
+# High bids are combined into one digest email per item type every flush interval
+ALERT_FLUSH_INTERVAL = 60  # Seconds between digest emails
+ALERT_AGGREGATOR = None
+
+# Process deliveries in micro-batches of up to MICRO_BATCH_SIZE, or whatever arrived within
+# MICRO_BATCH_DELAY seconds, with one cumulative ack per batch (None to process each delivery on its own)
+MICRO_BATCH_SIZE = 100
+MICRO_BATCH_DELAY = 0.05
+BATCHER = None
+
+# Producer-to-consumer and per-stage latency histograms, reported periodically (and on SIGUSR1)
+LATENCY_REPORT_INTERVAL = 60  # Seconds between latency reports
+LATENCY = None
+STATUS_REQUESTED = False  # Set by SIGUSR1; the consuming loop logs the report
+
 def callback(ch, method, properties, body):
     """
     Callback function for processing messages from the RabbitMQ queue.
@@ -42,59 +142,179 @@ def callback(ch, method, properties, body):
         ch: Channel object
         method: Method frame containing delivery tag
         properties: Properties of the message
-        body: The actual message body (JSON string)
+        body: The actual message body (JSON or compact binary, per properties.content_type)
     """
+    queue_name = method.routing_key
+    received_at = time.time()
+    started = time.perf_counter()
     try:
-        message = json.loads(body)  # Decode the JSON message
-        item_type = QUEUE_CONFIG.get(method.routing_key, 'unknown')  # Get item type based on queue
-        bid_amount = message['bid_amount']
-        timestamp = message['timestamp']
-        logger.info(f"Received {item_type} message: {bid_amount} at {timestamp}")
-
-        # Add message to the rolling window
-        if item_type in ROLLING_WINDOWS:
-            ROLLING_WINDOWS[item_type].append(message)
-            latest_message = ROLLING_WINDOWS[item_type][-1]
-            logger.info(f"Rolling window for {item_type} updated. Size: {len(ROLLING_WINDOWS[item_type])}, Latest bid: {latest_message['bid_amount']} at {latest_message['timestamp']}")
-
-            # Check if bid exceeds threshold
-            if bid_amount > BID_THRESHOLD:
-                logger.info(f"High bid alert: {bid_amount} at {timestamp}. Sending email alert.")
-                subject = f"High Bid Alert: {item_type.capitalize()} - ${bid_amount}"
-                body = f"A high bid of ${bid_amount} was placed on {item_type} at {timestamp}."
-                createAndSendEmailAlert(subject, body)
+        message = decode_bid(body, properties.content_type, CONSUMER_FIELDS)  # Decode according to the content type
+        decoded = time.perf_counter()
+        item_type = item_type_for(queue_name, QUEUE_CONFIG)  # Get item type based on queue (or lot routing key)
+        if RECORDER is not None:
+            RECORDER.record(item_type, body, properties.content_type, received_at)  # Archive the raw message
+        window = PIPELINE.update_window(item_type, message)  # Update the rolling window
+        windowed = time.perf_counter()
+        if window is not None:
+            PIPELINE.check_alert(item_type, message)  # Check for a high bid and queue an alert
+        alerted = time.perf_counter()
 
         ch.basic_ack(delivery_tag=method.delivery_tag)  # Acknowledge the message
+        acked = time.perf_counter()
+        CHECKPOINTER.maybe_checkpoint()  # Hands a snapshot to the writer thread when one is due
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to decode JSON: {e}")
+        # Record end-to-end latency from the bid's timestamp and the time spent in each stage
+        LATENCY.record(queue_name, 'producer_to_consumer', received_at - message['timestamp_us'] / 1_000_000)
+        LATENCY.record(queue_name, 'decode', decoded - started)
+        LATENCY.record(queue_name, 'window_update', windowed - decoded)
+        LATENCY.record(queue_name, 'alert_enqueue', alerted - windowed)
+        LATENCY.record(queue_name, 'ack', acked - alerted)
+        LATENCY.record(queue_name, 'callback_total', acked - started)
+
+    except BidDecodeError as e:
+        logger.error(f"Failed to decode message: {e}")
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)  # Reject the message without requeueing
     except Exception as e:
         logger.error(f"An error occurred while processing the message: {e}")
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)  # Reject the message without requeueing
+    maybe_report_status()
+
+def process_batch(deliveries) -> dict:
+    """
+    Processes a micro-batch of deliveries (the MicroBatcher handler): decodes every body, runs
+    the bids through the pipeline in delivery order and records latencies, keeping per-delivery
+    errors apart so that only the failed deliveries are nacked.
+
+    Parameters:
+        deliveries (list): (channel, method, properties, body) tuples in delivery order
+
+    Returns:
+        dict: index -> error message for every delivery that failed
+    """
+    received_at = time.time()
+    started = time.perf_counter()
+    failures = {}
+    bids = []  # (item type, message) for the pipeline
+    indices = []  # Delivery index of each entry in bids
+    for index, (_, method, properties, body) in enumerate(deliveries):
+        try:
+            message = decode_bid(body, properties.content_type, CONSUMER_FIELDS)  # Decode according to the content type
+            item_type = item_type_for(method.routing_key, QUEUE_CONFIG)  # Get item type based on queue (or lot routing key)
+            if RECORDER is not None:
+                RECORDER.record(item_type, body, properties.content_type, received_at)  # Archive the raw message
+        except BidDecodeError as e:
+            failures[index] = f"Failed to decode message: {e}"
+            continue
+        except Exception as e:
+            failures[index] = f"An error occurred while processing the message: {e}"
+            continue
+        bids.append((item_type, message))
+        indices.append(index)
+    decoded = time.perf_counter()
+    for position, error in PIPELINE.process_batch(bids):  # Windows, quantiles, lots, floods and alerts
+        failures[indices[position]] = f"An error occurred while processing the message: {error}"
+    processed = time.perf_counter()
+
+    # End-to-end latency per bid; stage times per batch
+    for index, (item_type, message) in zip(indices, bids):
+        LATENCY.record(deliveries[index][1].routing_key, 'producer_to_consumer', received_at - message['timestamp_us'] / 1_000_000)
+    LATENCY.record('micro_batch', 'decode', decoded - started)
+    LATENCY.record('micro_batch', 'pipeline', processed - decoded)
+    return failures
+
+def request_status(signum, frame):
+    """
+    SIGUSR1 handler: only flags the request. The handler can interrupt the main thread while it
+    holds a lock (e.g. in LatencyMonitor.record), so the report itself is logged from the loop.
+    """
+    global STATUS_REQUESTED
+    STATUS_REQUESTED = True
+
+def maybe_report_status():
+    """Log the status report if SIGUSR1 asked for one."""
+    global STATUS_REQUESTED
+    if STATUS_REQUESTED:
+        STATUS_REQUESTED = False
+        report_status()
+
+def report_status():
+    """Log latency percentiles and the hottest and highest-bid lots (on SIGUSR1)."""
+    LATENCY.report()
+    logger.info(f"Dedupe stats: {DEDUPE.stats}")
+    logger.info(f"Event-time window stats: {EVENT_WINDOWS.stats}, watermark {EVENT_WINDOWS.watermark_us}")
+    logger.info(f"Auction close stats: {AUCTION_CLOSER.stats}, {len(AUCTION_CLOSER)} lots open")
+    if THRESHOLDS is not None:
+        for item_type, sketch in THRESHOLDS.sketches.items():
+            logger.info(f"Bids for {item_type}: {sketch.count}, p50 {sketch.quantile(50):.2f}, p99 {sketch.quantile(99):.2f}, "
+                        f"alert threshold {THRESHOLDS.threshold(item_type) or BID_THRESHOLD:.2f}")
+    for entry in HEAVY_HITTERS.top(LEADERBOARD_SIZE):
+        logger.info(f"Active bidder {entry['bidder_id']} on lot {entry['lot_id']}: ~{entry['bids']} bids this window")
+    for lot in AUCTION_STATE.top_by_rate(LEADERBOARD_SIZE):
+        logger.info(f"Hot lot {lot['lot_id']} ({lot['item_type']}): {lot['rate']:.2f} bids/s, "
+                    f"{lot['bid_count']} bids, high bid {lot['high_bid']}")
+    for lot in AUCTION_STATE.top_by_amount(LEADERBOARD_SIZE):
+        logger.info(f"Top lot {lot['lot_id']} ({lot['item_type']}): high bid {lot['high_bid']} by {lot['high_bidder']}")
 
 def main():
     """
     Main function to set up RabbitMQ consumer.
     """
+    global ALERT_DISPATCHER, ALERT_AGGREGATOR, LATENCY, RECORDER, BATCHER
+    LATENCY = LatencyMonitor(report_interval=LATENCY_REPORT_INTERVAL, logger=logger)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, request_status)  # kill -USR1 <pid> reports on demand (after the next bid, or within MICRO_BATCH_DELAY)
+    ALERT_DISPATCHER = AlertDispatcher(logger=logger)  # Reads the email config once
+    ALERT_AGGREGATOR = AlertAggregator(ALERT_DISPATCHER, flush_interval=ALERT_FLUSH_INTERVAL, logger=logger)
+    PIPELINE.alert_sink = ALERT_AGGREGATOR
+    CHECKPOINTER.restore()  # Warm the windows from the last checkpoint
+    if RECORDING_PATH:
+        RECORDER = BidRecorder(RECORDING_PATH, logger=logger)
+    if MICRO_BATCH_SIZE:
+        BATCHER = MicroBatcher(process_batch, max_batch=MICRO_BATCH_SIZE, max_delay=MICRO_BATCH_DELAY, logger=logger)
+
     try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
+        connection = connect(TRANSPORT_URL)
         channel = connection.channel()
         
         # Declare queues and consume messages from each queue
-        for queue_name in QUEUE_CONFIG.keys():
-            channel.queue_declare(queue=queue_name, durable=True)  # Declare the queue as durable
-            channel.basic_consume(queue=queue_name, on_message_callback=callback)  # Set callback for the queue
+        if ROUTING_MODE == 'lots':
+            queue_names = declare_topology(channel)  # Lot exchange and shard queues
+        else:
+            queue_names = list(QUEUE_CONFIG.keys())
+            for queue_name in queue_names:
+                channel.queue_declare(queue=queue_name, durable=True)  # Declare the queue as durable
+        on_message = BATCHER.add if BATCHER is not None else callback
+        for queue_name in queue_names:
+            channel.basic_consume(queue=queue_name, on_message_callback=on_message)  # Set callback for the queue
         
         logger.info("Starting consumer. Waiting for messages...")
-        channel.start_consuming()  # Start consuming messages
-    except pika.exceptions.AMQPConnectionError as e:
+        if BATCHER is not None:
+            # Drive the connection here so a partial batch is processed once MICRO_BATCH_DELAY has passed
+            while channel.is_open:
+                connection.process_data_events(time_limit=MICRO_BATCH_DELAY)
+                BATCHER.poll()
+                PIPELINE.poll()  # Emit due windows and close due lots by the clock once bids stop arriving
+                maybe_report_status()
+                CHECKPOINTER.maybe_checkpoint()  # After the batch is acked, as in callback()
+        else:
+            channel.start_consuming()  # Start consuming messages
+    except CONNECTION_ERRORS as e:
         logger.error(f"Connection to RabbitMQ server failed: {e}")
         sys.exit(1)  # Exit if connection fails
     except KeyboardInterrupt:
         logger.info("Consumer interrupted. Closing connection.")
+        if BATCHER is not None and 'connection' in locals() and connection.is_open:
+            BATCHER.close()  # Process and ack the partial batch
         if 'connection' in locals() and connection.is_open:
             connection.close()  # Close the connection gracefully
+    finally:
+        CHECKPOINTER.close()  # Write a final checkpoint
+        if RECORDER is not None:
+            RECORDER.close()  # Flush the bid archive
+        LATENCY.close()  # Log the final latency report
+        logger.info(f"Dedupe stats: {DEDUPE.stats}")
+        ALERT_AGGREGATOR.close()  # Send any pending digests
+        ALERT_DISPATCHER.close(timeout=10)  # Send queued alerts and close SMTP sessions
 
 if __name__ == "__main__":
     main()  # Run the main function if this script is executed directly
\ No newline at end of file
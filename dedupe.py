@@ -0,0 +1,175 @@
+"""
+Real-Time Auction Tracker: Idempotency Cache
+This module recognizes bids that have already been processed, so a message redelivered after a
+consumer crash (or republished by the producer after a lost confirm) does not update a window or
+send an alert twice. Recent message ids are kept exactly in an LRU with a time-to-live; ids that
+age out of it can be kept for a longer horizon in a pair of rotating Bloom filters of fixed size.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+
+# Message ids remembered exactly
+MAX_ENTRIES = 100_000
+
+# Seconds an id stays in the exact tier
+TTL = 600.0
+
+# Ids per Bloom filter generation (None disables the Bloom tier) and its false-positive rate
+BLOOM_CAPACITY = None
+BLOOM_ERROR_RATE = 0.001
+
+
+def message_key(message: dict):
+    """
+    Identity of a bid message: its bidder id and timestamp (in microseconds). The producer stamps
+    every bid with its own timestamp, so a republished or redelivered copy has the same key.
+
+    Parameters:
+        message (dict): The decoded bid
+
+    Returns:
+        tuple: (bidder id, timestamp), or None if the bid lacks either (it cannot be deduplicated)
+    """
+    bidder_id = message.get('bidder_id')
+    timestamp = message.get('timestamp_us', message.get('timestamp'))
+    if bidder_id is None or timestamp is None:
+        return None
+    return bidder_id, timestamp
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over hashable keys (hashes are only stable within one process)."""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        """
+        Parameters:
+            capacity (int): Number of keys the filter is sized for
+            error_rate (float): False-positive rate at capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key) -> range:
+        """Bit positions probed for a key (the same for every filter of the same size)."""
+        # Double hashing: two halves of one 64-bit hash generate all probe positions
+        value = hash(key) & 0xFFFFFFFFFFFFFFFF
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        return range(first, first + self.hash_count * second, second)
+
+    def add(self, key):
+        bits, size = self.bits, self.size
+        for position in self.positions(key):
+            position %= size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains(self, positions) -> bool:
+        bits, size = self.bits, self.size
+        for position in positions:
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __contains__(self, key) -> bool:
+        return self.contains(self.positions(key))
+
+
+class IdempotencyCache:
+    """
+    Two-tier record of processed message ids.
+
+    The exact tier is an LRU of id -> time last seen, bounded by max_entries and ttl. When
+    bloom_capacity is set, ids leaving the exact tier are added to the current Bloom filter;
+    once it holds bloom_capacity ids it becomes the previous generation and a fresh filter is
+    started, so memory stays fixed and ids are remembered for roughly two generations. A Bloom
+    hit can be a false positive (at about bloom_error_rate), in which case a new bid is skipped,
+    so the Bloom tier is off by default.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL, bloom_capacity: int = BLOOM_CAPACITY,
+                 bloom_error_rate: float = BLOOM_ERROR_RATE, logger=None):
+        """
+        Parameters:
+            max_entries (int): Ids kept in the exact tier
+            ttl (float): Seconds an id stays in the exact tier
+            bloom_capacity (int): Ids per Bloom filter generation (None for no Bloom tier)
+            bloom_error_rate (float): Bloom filter false-positive rate
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.logger = logger or logging.getLogger(__name__)
+        self.recent = OrderedDict()  # id -> monotonic time last seen, oldest first
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        self.previous_bloom = None
+        self.stats = {'checked': 0, 'misses': 0, 'hits': 0, 'bloom_hits': 0, 'expired': 0, 'evicted': 0, 'unkeyed': 0}
+
+    def __len__(self):
+        return len(self.recent)
+
+    def seen(self, key, now: float = None) -> bool:
+        """
+        Checks an id and records it as processed.
+
+        Parameters:
+            key: The message id (see message_key; None for a message without one, which is never a duplicate)
+            now (float): Monotonic seconds (defaults to time.monotonic())
+
+        Returns:
+            bool: True if the id was already processed (the message is a duplicate)
+        """
+        if key is None:
+            self.stats['unkeyed'] += 1
+            return False
+        if now is None:
+            now = time.monotonic()
+        self.stats['checked'] += 1
+        self.expire(now)
+
+        if key in self.recent:
+            self.recent[key] = now
+            self.recent.move_to_end(key)
+            self.stats['hits'] += 1
+            return True
+        if self.bloom is not None:
+            positions = self.bloom.positions(key)
+            if self.bloom.contains(positions) or (self.previous_bloom is not None and self.previous_bloom.contains(positions)):
+                self.stats['bloom_hits'] += 1
+                return True
+
+        self.stats['misses'] += 1
+        self.recent[key] = now
+        if len(self.recent) > self.max_entries:
+            old_key, _ = self.recent.popitem(last=False)
+            self.stats['evicted'] += 1
+            self.retire(old_key)
+        return False
+
+    def expire(self, now: float):
+        """Moves ids older than ttl out of the exact tier."""
+        cutoff = now - self.ttl
+        recent = self.recent
+        while recent:
+            key, last_seen = next(iter(recent.items()))
+            if last_seen >= cutoff:
+                break
+            del recent[key]
+            self.stats['expired'] += 1
+            self.retire(key)
+
+    def retire(self, key):
+        """Hand an id leaving the exact tier to the Bloom tier (if enabled)."""
+        if self.bloom is None:
+            return
+        if self.bloom.count >= self.bloom_capacity:
+            self.previous_bloom = self.bloom
+            self.bloom = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        self.bloom.add(key)
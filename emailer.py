@@ -3,11 +3,29 @@ from email.message import EmailMessage
 import tomllib  # requires Python 3.11
 import pprint
 
+def loadEmailConfig(config_path: str = ".env.toml") -> dict:
+    """Read outgoing email info from a TOML config file."""
+    with open(config_path, "rb") as file_object:
+        return tomllib.load(file_object)
+
+def buildEmailMessage(secret_dict: dict, email_subject: str, email_body: str) -> EmailMessage:
+    """Create an EmailMessage addressed using the outgoing email config."""
+    outemail = secret_dict["outgoing_email_address"]
+    toemail = secret_dict["receiver_email_address"]
+
+    # Create an instance of an EmailMessage
+    msg = EmailMessage()
+    msg["From"] = outemail
+    msg["To"] = toemail
+    msg["Reply-to"] = outemail
+    msg["Subject"] = email_subject
+    msg.set_content(email_body)
+    return msg
+
 def createAndSendEmailAlert(email_subject: str, email_body: str):
     """Read outgoing email info from a TOML config file and send an email alert."""
     try:
-        with open(".env.toml", "rb") as file_object:
-            secret_dict = tomllib.load(file_object)
+        secret_dict = loadEmailConfig()
         pprint.pprint(secret_dict)
 
         # Basic information
@@ -15,15 +33,8 @@ def createAndSendEmailAlert(email_subject: str, email_body: str):
         port = secret_dict["outgoing_email_port"]
         outemail = secret_dict["outgoing_email_address"]
         outpwd = secret_dict["outgoing_email_password"]
-        toemail = secret_dict["receiver_email_address"]
-
-        # Create an instance of an EmailMessage
-        msg = EmailMessage()
-        msg["From"] = outemail
-        msg["To"] = toemail
-        msg["Reply-to"] = outemail
-        msg["Subject"] = email_subject
-        msg.set_content(email_body)
+
+        msg = buildEmailMessage(secret_dict, email_subject, email_body)
 
         print("========================================")
         print(f"Prepared Email Message: ")
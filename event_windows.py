@@ -0,0 +1,234 @@
+"""
+Real-Time Auction Tracker: Event-Time Windows
+This module aggregates bids into tumbling or sliding windows of bid time (the timestamp the
+producer stamped on the bid) rather than arrival order, so bids that arrive out of order across
+queues still land in the right window. A watermark trails the newest bid time by the expected
+out-of-orderness; a window is emitted once the watermark passes its end, a late bid within the
+allowed lateness re-emits the windows it belongs to, and anything later is dropped.
+
+Bids are added to panes (tumbling windows one slide long), so a bid costs one aggregate update
+whatever the window and slide, a sliding window is the merge of its panes when it is emitted, and
+panes are closed and evicted in bid-time order without searching.
+"""
+
+import logging
+import math
+import time
+
+from bid_codec import micros_to_iso
+from rolling_stats import merge_snapshots
+
+# Length of each window in seconds of bid time
+WINDOW_SECONDS = 60.0
+
+# Seconds between window starts (None for tumbling windows; the window length must be a multiple of it)
+SLIDE_SECONDS = None
+
+# Seconds the watermark trails the newest bid time (how out of order bids may arrive)
+MAX_OUT_OF_ORDER = 5.0
+
+# Seconds after the watermark passes a window's end during which late bids still update it
+ALLOWED_LATENESS = 30.0
+
+# Seconds without a newer bid after which the watermark follows the clock instead
+IDLE_TIMEOUT = 10.0
+
+
+class PaneAggregate:
+    """Count, sum, mean, variance (Welford), min and max of the bids in one pane for one key."""
+
+    __slots__ = ('count', 'total', 'mean', 'm2', 'minimum', 'maximum', 'high_bidder')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.high_bidder = None
+
+    def add(self, value: float, bidder_id: str = None):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+            self.high_bidder = bidder_id
+
+    def snapshot(self) -> dict:
+        """The aggregate as a mergeable snapshot (see rolling_stats.merge_snapshots)."""
+        return {'count': self.count, 'sum': self.total, 'mean': self.mean, 'm2': self.m2,
+                'min': self.minimum, 'max': self.maximum, 'high_bidder': self.high_bidder}
+
+
+class EventTimeWindows:
+    """
+    Keyed tumbling or sliding windows of bid time, emitted by watermark.
+
+    Keys are any hashable value (an item type, or (item type, lot id) for per-lot windows).
+    Emitted windows are handed to on_window(window) as dicts with key, start_us, end_us, count,
+    sum, mean, stddev, min, max, high_bidder and late (True for a re-emission caused by a late
+    bid); without on_window they are logged.
+    """
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS, slide_seconds: float = SLIDE_SECONDS,
+                 max_out_of_order: float = MAX_OUT_OF_ORDER, allowed_lateness: float = ALLOWED_LATENESS,
+                 idle_timeout: float = IDLE_TIMEOUT, on_window=None, logger=None):
+        """
+        Parameters:
+            window_seconds (float): Length of each window in seconds
+            slide_seconds (float): Seconds between window starts (None for tumbling windows)
+            max_out_of_order (float): Seconds the watermark trails the newest bid time
+            allowed_lateness (float): Seconds past a window's end during which late bids still update it
+            idle_timeout (float): Seconds without a newer bid before poll() advances the watermark by the clock
+            on_window: Callable(window dict) for emitted windows (None to log them)
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.size_us = int(window_seconds * 1_000_000)
+        self.slide_us = int((slide_seconds or window_seconds) * 1_000_000)
+        if self.size_us % self.slide_us:
+            raise ValueError(f"Window length {window_seconds}s must be a multiple of the slide {slide_seconds}s")
+        self.panes_per_window = self.size_us // self.slide_us
+        self.max_out_of_order_us = int(max_out_of_order * 1_000_000)
+        self.lateness_us = int(allowed_lateness * 1_000_000)
+        self.idle_timeout = idle_timeout
+        self.on_window = on_window or self.log_window
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.panes = {}  # pane index -> {key: PaneAggregate}; pane i covers [i * slide, (i + 1) * slide)
+        self.max_event_us = None
+        self.watermark_us = None
+        self.fired = None  # Windows ending at panes up to this index have been emitted
+        self.evicted = None  # Panes up to this index have been evicted
+        self.last_advance = time.monotonic()
+        self.stats = {'bids': 0, 'late': 0, 'dropped': 0, 'windows': 0, 'late_windows': 0}
+
+    def add(self, key, value: float, timestamp_us: int, bidder_id: str = None) -> bool:
+        """
+        Adds a bid to the panes of its bid time and advances the watermark.
+
+        Parameters:
+            key: Window key (e.g. the item type)
+            value (float): The bid amount
+            timestamp_us (int): Epoch microseconds of the bid
+            bidder_id (str): Bidder UUID (reported as the window's high bidder)
+
+        Returns:
+            bool: False if the bid was too late for every window it belongs to and was dropped
+        """
+        pane = timestamp_us // self.slide_us
+        if self.evicted is not None and pane <= self.evicted:
+            self.stats['dropped'] += 1
+            return False
+        aggregates = self.panes.get(pane)
+        if aggregates is None:
+            aggregates = self.panes[pane] = {}
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = aggregates[key] = PaneAggregate()
+        aggregate.add(value, bidder_id)
+        self.stats['bids'] += 1
+
+        if self.fired is not None and pane <= self.fired:
+            # Late but within the allowed lateness: re-emit this key's windows that were already emitted
+            self.stats['late'] += 1
+            for end in range(pane, min(pane + self.panes_per_window - 1, self.fired) + 1):
+                self.fire(end, (key,), late=True)
+        if self.max_event_us is None or timestamp_us > self.max_event_us:
+            self.max_event_us = timestamp_us
+            self.last_advance = time.monotonic()
+            self.advance(timestamp_us - self.max_out_of_order_us)
+        return True
+
+    def poll(self, now_us: int = None):
+        """
+        Advances the watermark by the clock after idle_timeout seconds without a newer bid, so the
+        last windows are emitted when bids stop arriving.
+
+        Parameters:
+            now_us (int): Current epoch microseconds (defaults to the clock)
+        """
+        if time.monotonic() - self.last_advance < self.idle_timeout:
+            return
+        if now_us is None:
+            now_us = int(time.time() * 1_000_000)
+        self.advance(now_us - self.max_out_of_order_us)
+
+    def advance(self, watermark_us: int):
+        """
+        Moves the watermark forward (never back), emitting windows that end at or before it and
+        evicting panes whose windows are past the allowed lateness.
+
+        Parameters:
+            watermark_us (int): New watermark in epoch microseconds
+        """
+        if self.watermark_us is not None and watermark_us <= self.watermark_us:
+            return
+        self.watermark_us = watermark_us
+        n = self.panes_per_window
+        last_fired = watermark_us // self.slide_us - 1  # The window ending at pane e ends at (e + 1) * slide
+        last_evicted = (watermark_us - self.lateness_us) // self.slide_us - n
+        if self.fired is None:
+            self.fired, self.evicted = last_fired, last_evicted  # First watermark: no window can end before it
+            return
+        for end in self.due(self.fired, last_fired, n):
+            self.fire(end)
+        self.fired = max(self.fired, last_fired)
+        for pane in self.due(self.evicted, last_evicted, 1):
+            self.panes.pop(pane, None)
+        self.evicted = max(self.evicted, last_evicted)
+
+    def due(self, after: int, through: int, span: int):
+        """
+        Indexes in (after, through] that may hold data, in order: pane indexes plus up to span - 1
+        (the windows a pane belongs to). Walks the range when it is short and derives the indexes
+        from the live panes after a long jump, so both cost O(1) per pane.
+        """
+        if through <= after:
+            return ()
+        if through - after <= len(self.panes) * span:
+            return range(after + 1, through + 1)
+        return sorted({pane + offset for pane in self.panes for offset in range(span)
+                       if after < pane + offset <= through})
+
+    def fire(self, end: int, keys=None, late: bool = False):
+        """Emit the window ending at pane end for the given keys (every key with bids in it by default)."""
+        panes = [self.panes[pane] for pane in range(end - self.panes_per_window + 1, end + 1) if pane in self.panes]
+        if not panes:
+            return
+        if keys is None:
+            keys = dict.fromkeys(key for aggregates in panes for key in aggregates)
+        for key in keys:
+            merged = None
+            for aggregates in panes:
+                aggregate = aggregates.get(key)
+                if aggregate is None:
+                    continue
+                snapshot = aggregate.snapshot()
+                if merged is None:
+                    merged = snapshot
+                else:
+                    high_bidder = snapshot['high_bidder'] if snapshot['max'] > merged['max'] else merged['high_bidder']
+                    merged = merge_snapshots(merged, snapshot)
+                    merged['high_bidder'] = high_bidder
+            if merged is None:
+                continue
+            merged['key'] = key
+            merged['end_us'] = (end + 1) * self.slide_us
+            merged['start_us'] = merged['end_us'] - self.size_us
+            merged['stddev'] = math.sqrt(merged['m2'] / (merged['count'] - 1)) if merged['count'] > 1 else 0.0
+            merged['late'] = late
+            self.stats['late_windows' if late else 'windows'] += 1
+            self.on_window(merged)
+
+    def log_window(self, window: dict):
+        """Default on_window: log the window's aggregates."""
+        self.logger.info(f"{'Late update of e' if window['late'] else 'E'}vent-time window {window['key']} "
+                         f"[{micros_to_iso(window['start_us'])}, {micros_to_iso(window['end_us'])}): "
+                         f"{window['count']} bids, mean {window['mean']:.2f}, min {window['min']}, "
+                         f"max {window['max']} by {window['high_bidder']}, std dev {window['stddev']:.2f}")
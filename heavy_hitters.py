@@ -0,0 +1,250 @@
+"""
+Real-Time Auction Tracker: Bidder Heavy Hitters
+This module spots bidders who flood a lot with bids (shill bidding or bots) without a counter per
+bidder. Within each time window, a count-min sketch of fixed size counts bids per (bidder, lot),
+and a bidder is flagged once when its count reaches the flood threshold; a space-saving tracker
+keeps the top bidders of the window for reports. Both update in O(1) per bid, and memory does not
+grow with the number of distinct bidders.
+"""
+
+import logging
+from array import array
+
+# Counters per row of the count-min sketch and number of rows (4 x 65536 x 4 bytes = 1 MB)
+SKETCH_WIDTH = 1 << 16
+SKETCH_DEPTH = 4
+
+# (bidder, lot) pairs tracked exactly enough to rank the window's top bidders
+TOP_CAPACITY = 1000
+
+# Length in seconds of each counting window (by bid time)
+WINDOW_SECONDS = 60.0
+
+# Bids by one bidder on one lot within a window that flag the bidder
+FLOOD_THRESHOLD = 30
+
+# Odd multipliers for the per-row hashes of the count-min sketch
+ROW_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+             0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9)
+
+
+class CountMinSketch:
+    """
+    Count-min sketch with conservative update: estimates never undercount, and overcount by at
+    most about e/width of the total with high probability (less in practice with conservative
+    update, which only raises the counters that hold the current minimum).
+    """
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        """
+        Parameters:
+            width (int): Counters per row (a power of two)
+            depth (int): Number of rows (at most len(ROW_SEEDS))
+        """
+        if width & (width - 1) or not 1 <= depth <= len(ROW_SEEDS):
+            raise ValueError(f"Width must be a power of two and depth between 1 and {len(ROW_SEEDS)}")
+        self.width = width
+        self.depth = depth
+        self.shift = 64 - (width.bit_length() - 1)
+        self.rows = tuple((row * width, ROW_SEEDS[row]) for row in range(depth))  # (offset, hash multiplier)
+        self.counters = array('I', bytes(4 * width * depth))
+        self.total = 0
+
+    def cells(self, key) -> list:
+        """Counter index of a key in every row (multiply-shift hashing of hash(key))."""
+        value = hash(key) & 0xFFFFFFFFFFFFFFFF
+        shift = self.shift
+        return [offset + (((value * seed) & 0xFFFFFFFFFFFFFFFF) >> shift) for offset, seed in self.rows]
+
+    def add(self, key, count: int = 1) -> int:
+        """
+        Count a key and return its new estimate.
+
+        Parameters:
+            key: Any hashable key
+            count (int): Occurrences to add
+        """
+        counters = self.counters
+        cells = self.cells(key)
+        estimate = min([counters[cell] for cell in cells]) + count
+        for cell in cells:
+            if counters[cell] < estimate:
+                counters[cell] = estimate
+        self.total += count
+        return estimate
+
+    def estimate(self, key) -> int:
+        """Estimated count of a key (never less than the true count)."""
+        counters = self.counters
+        return min([counters[cell] for cell in self.cells(key)])
+
+    def reset(self):
+        self.counters = array('I', bytes(4 * self.width * self.depth))
+        self.total = 0
+
+
+class SpaceSaving:
+    """
+    Space-saving top-K counter (Metwally et al.) on a stream-summary structure: keys are grouped
+    by count, so both counting a tracked key and replacing the least-counted key are O(1). Any key
+    occurring more than total/capacity times is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity: int = TOP_CAPACITY):
+        """
+        Parameters:
+            capacity (int): Number of keys tracked
+        """
+        self.capacity = capacity
+        self.counts = {}  # key -> count (an overestimate by at most errors[key])
+        self.errors = {}  # key -> count inherited from the key it replaced
+        self.buckets = {}  # count -> keys with that count (a dict used as an ordered set)
+        self.minimum = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, key) -> int:
+        """Count one occurrence of key and return its tracked count."""
+        counts, buckets = self.counts, self.buckets
+        count = counts.get(key)
+        if count is None:
+            if len(counts) < self.capacity:
+                count = 0
+            else:
+                # Replace the oldest key with the lowest count; the newcomer inherits its count
+                count = self.minimum
+                bucket = buckets[count]
+                evicted = next(iter(bucket))
+                del bucket[evicted]
+                if not bucket:
+                    del buckets[count]
+                del counts[evicted], self.errors[evicted]
+            self.errors[key] = count
+        else:
+            bucket = buckets[count]
+            del bucket[key]
+            if not bucket:
+                del buckets[count]
+
+        new_count = count + 1
+        counts[key] = new_count
+        bucket = buckets.get(new_count)
+        if bucket is None:
+            bucket = buckets[new_count] = {}
+        bucket[key] = None
+        if count == 0:
+            self.minimum = 1
+        elif count == self.minimum and count not in buckets:
+            self.minimum = new_count
+        return new_count
+
+    def top(self, count: int) -> list:
+        """
+        The count most frequent keys, most frequent first.
+
+        Returns:
+            list: (key, count, error) tuples; the true count is between count - error and count
+        """
+        result = []
+        for bucket_count in sorted(self.buckets, reverse=True):
+            for key in self.buckets[bucket_count]:
+                result.append((key, bucket_count, self.errors[key]))
+                if len(result) >= count:
+                    return result
+        return result
+
+    def reset(self):
+        self.counts = {}
+        self.errors = {}
+        self.buckets = {}
+        self.minimum = 0
+
+
+class HeavyHitterDetector:
+    """
+    Per-window bid counts by (bidder, lot) that flag bidders who reach flood_threshold.
+
+    Windows are tumbling windows of bid time; when a bid falls past the current window, the
+    window's top bidders are logged and the counters start over. A bidder is flagged at most once
+    per lot per window. Bids without a lot are counted per bidder across all lots.
+    """
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS, flood_threshold: int = FLOOD_THRESHOLD,
+                 width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH, top_capacity: int = TOP_CAPACITY,
+                 report_top: int = 10, logger=None):
+        """
+        Parameters:
+            window_seconds (float): Length of each counting window in seconds
+            flood_threshold (int): Bids on one lot within a window that flag a bidder
+            width (int): Count-min sketch width
+            depth (int): Count-min sketch depth
+            top_capacity (int): Keys kept by the space-saving tracker
+            report_top (int): Top bidders logged when a window closes (0 to skip)
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.window_us = int(window_seconds * 1_000_000)
+        self.flood_threshold = flood_threshold
+        self.report_top = report_top
+        self.logger = logger or logging.getLogger(__name__)
+        self.sketch = CountMinSketch(width, depth)
+        self.top_keys = SpaceSaving(top_capacity)
+        self.flagged = set()  # keys already flagged in the current window
+        self.window_start_us = None
+        self.stats = {'bids': 0, 'flagged': 0, 'windows': 0}
+
+    def add(self, bidder_id: str, lot_id: int, timestamp_us: int) -> int:
+        """
+        Count one bid.
+
+        Parameters:
+            bidder_id (str): Bidder UUID
+            lot_id (int): The auction lot (None to count the bidder across lots)
+            timestamp_us (int): Epoch microseconds of the bid
+
+        Returns:
+            int: The bidder's estimated bid count on the lot if this bid flags the bidder, else None
+        """
+        if bidder_id is None:
+            return None
+        if self.window_start_us is None:
+            self.window_start_us = timestamp_us - timestamp_us % self.window_us
+        elif timestamp_us >= self.window_start_us + self.window_us:
+            self.roll(timestamp_us)
+        self.stats['bids'] += 1
+
+        key = (bidder_id, lot_id)
+        count = self.sketch.add(key)
+        self.top_keys.add(key)
+        if count >= self.flood_threshold and key not in self.flagged:
+            self.flagged.add(key)
+            self.stats['flagged'] += 1
+            return count
+        return None
+
+    def top(self, count: int = 10) -> list:
+        """
+        The current window's most active (bidder, lot) pairs, most bids first.
+
+        Candidates come from the space-saving tracker; each count is tightened to the smaller of
+        its space-saving count and its count-min estimate (both only ever overcount).
+
+        Returns:
+            list: Dicts with bidder_id and lot_id and their estimated bids
+        """
+        candidates = self.top_keys.top(max(count, len(self.top_keys)))
+        ranked = sorted(((min(bids, self.sketch.estimate(key)), key) for key, bids, _ in candidates),
+                        key=lambda entry: entry[0], reverse=True)
+        return [{'bidder_id': key[0], 'lot_id': key[1], 'bids': bids} for bids, key in ranked[:count]]
+
+    def roll(self, timestamp_us: int):
+        """Close the current window (logging its top bidders) and start the one holding timestamp_us."""
+        if self.report_top and self.top_keys:
+            leaders = ", ".join(f"{entry['bidder_id']} on lot {entry['lot_id']}: {entry['bids']}"
+                                for entry in self.top(self.report_top))
+            self.logger.info(f"Top bidders in window ({self.sketch.total} bids, {len(self.flagged)} flagged): {leaders}")
+        self.sketch.reset()
+        self.top_keys.reset()
+        self.flagged = set()
+        self.window_start_us = timestamp_us - timestamp_us % self.window_us
+        self.stats['windows'] += 1
@@ -0,0 +1,173 @@
+"""
+Real-Time Auction Tracker: Latency Histograms
+This module records latencies into fixed-size, log-bucketed histograms in the style of
+HdrHistogram: O(1) recording into a flat integer array with about 1.6% relative precision,
+mergeable, with percentiles read straight from the bucket counts.
+"""
+
+import logging
+import threading
+from array import array
+
+# Sub-buckets per power of two are 2 ** (SUB_BUCKET_BITS - 1); 7 bits gives ~1.6% precision
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+# Largest trackable latency in microseconds (larger values are clamped): one hour
+MAX_MICROS = 3_600_000_000
+
+# Percentiles included in reports
+REPORT_PERCENTILES = (50, 99, 99.9)
+
+
+def bucket_index(micros: int) -> int:
+    """Map a value in microseconds to its bucket."""
+    if micros < SUB_BUCKET_COUNT:
+        return micros if micros > 0 else 0
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return (shift << (SUB_BUCKET_BITS - 1)) + (micros >> shift)
+
+
+def bucket_value(index: int) -> int:
+    """Midpoint (in microseconds) of the values that fall in a bucket."""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = index // SUB_BUCKET_HALF - 1
+    mantissa = index - shift * SUB_BUCKET_HALF
+    return (mantissa << shift) + ((1 << shift) >> 1)
+
+
+BUCKET_COUNT = bucket_index(MAX_MICROS) + 1
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of latencies."""
+
+    def __init__(self):
+        self.counts = array('q', bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total_micros = 0
+        self.max_micros = 0
+
+    def record(self, seconds: float):
+        """Record one latency given in seconds (negative values, e.g. from clock skew, count as 0)."""
+        micros = int(seconds * 1_000_000)
+        if micros < 0:
+            micros = 0
+        elif micros > MAX_MICROS:
+            micros = MAX_MICROS
+        self.counts[bucket_index(micros)] += 1
+        self.count += 1
+        self.total_micros += micros
+        if micros > self.max_micros:
+            self.max_micros = micros
+
+    def merge(self, other):
+        """Add another histogram's counts into this one."""
+        for index, value in enumerate(other.counts):
+            if value:
+                self.counts[index] += value
+        self.count += other.count
+        self.total_micros += other.total_micros
+        self.max_micros = max(self.max_micros, other.max_micros)
+
+    def reset(self):
+        self.counts = array('q', bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total_micros = 0
+        self.max_micros = 0
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Latency at a percentile, in milliseconds (None if nothing was recorded).
+
+        Parameters:
+            percentile (float): Between 0 and 100
+        """
+        if self.count == 0:
+            return None
+        target = max(1, int(round(percentile / 100 * self.count)))
+        seen = 0
+        for index, value in enumerate(self.counts):
+            if value:
+                seen += value
+                if seen >= target:
+                    return min(bucket_value(index), self.max_micros) / 1000
+        return self.max_micros / 1000
+
+    def percentiles(self, percentiles=REPORT_PERCENTILES) -> dict:
+        """Latencies at several percentiles, in milliseconds."""
+        return {p: self.percentile(p) for p in percentiles}
+
+    @property
+    def mean(self) -> float:
+        """Mean latency in milliseconds."""
+        return self.total_micros / self.count / 1000 if self.count else 0.0
+
+
+class LatencyMonitor:
+    """
+    Latency histograms keyed by (queue, stage), with periodic and on-demand reports.
+
+    The periodic reporter runs on a background thread and logs every histogram, then starts a
+    fresh interval. report() can also be called at any time to log the current interval.
+    """
+
+    def __init__(self, report_interval: float = 60.0, logger=None):
+        """
+        Parameters:
+            report_interval (float): Seconds between periodic reports (None to disable)
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.histograms = {}  # (queue, stage) -> LatencyHistogram
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.report_interval = report_interval
+        self.stopped = threading.Event()
+        self.reporter = None
+        if report_interval:
+            self.reporter = threading.Thread(target=self.run_reporter, name="latency-reporter", daemon=True)
+            self.reporter.start()
+
+    def record(self, queue: str, stage: str, seconds: float):
+        """Record one latency for a queue and stage."""
+        # Under the lock, so a concurrent report(reset=True) cannot swap the histogram out mid-record
+        with self.lock:
+            histogram = self.histograms.get((queue, stage))
+            if histogram is None:
+                histogram = self.histograms[(queue, stage)] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def report(self, reset: bool = False) -> dict:
+        """
+        Log p50/p99/p999 for every queue and stage.
+
+        Parameters:
+            reset (bool): Start a new interval after reporting
+
+        Returns:
+            dict: (queue, stage) -> percentile dict in milliseconds
+        """
+        with self.lock:
+            histograms = dict(self.histograms)
+            if reset:
+                self.histograms = {}
+        results = {}
+        for (queue, stage), histogram in sorted(histograms.items()):
+            percentiles = histogram.percentiles()
+            results[(queue, stage)] = percentiles
+            formatted = ", ".join(f"p{p:g}={value:.3f}ms" for p, value in percentiles.items() if value is not None)
+            self.logger.info(f"Latency {queue} {stage}: n={histogram.count}, {formatted}, max={histogram.max_micros / 1000:.3f}ms")
+        return results
+
+    def run_reporter(self):
+        while not self.stopped.wait(self.report_interval):
+            self.report(reset=True)
+
+    def close(self):
+        """Stop the periodic reporter and log the final interval."""
+        self.stopped.set()
+        if self.reporter is not None:
+            self.reporter.join()
+        self.report()
@@ -0,0 +1,162 @@
+"""
+Real-Time Auction Tracker: Producer Load Generator
+This module paces bid publishing to a target rate with an optional ramp and periodic bursts,
+using open- or closed-loop pacing, and reports the achieved rate and latency percentiles.
+Used by the headless load mode of producer_v3.0.
+"""
+
+import logging
+import math
+import time
+
+OPEN_LOOP = 'open'
+CLOSED_LOOP = 'closed'
+
+# Percentiles included in load reports
+REPORT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+class LoadProfile:
+    """
+    Target publish rate over time: a linear ramp up to the base rate, plus periodic bursts.
+    """
+
+    def __init__(self, rate: float, duration: float, ramp_seconds: float = 0.0,
+                 burst_rate: float = None, burst_every: float = None, burst_length: float = 1.0):
+        """
+        Parameters:
+            rate (float): Base target rate in messages per second
+            duration (float): Length of the run in seconds
+            ramp_seconds (float): Seconds to ramp linearly from 0 up to the base rate
+            burst_rate (float): Rate during bursts (None for no bursts)
+            burst_every (float): Seconds between the starts of consecutive bursts
+            burst_length (float): Seconds each burst lasts
+        """
+        if rate <= 0 or duration <= 0:
+            raise ValueError("LoadProfile rate and duration must be positive.")
+        self.rate = rate
+        self.duration = duration
+        self.ramp_seconds = ramp_seconds
+        self.burst_rate = burst_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+
+    def rate_at(self, elapsed: float) -> float:
+        """Target rate (messages per second) at elapsed seconds into the run."""
+        if self.burst_rate and self.burst_every and elapsed % self.burst_every < self.burst_length:
+            return self.burst_rate
+        if self.ramp_seconds and elapsed < self.ramp_seconds:
+            # Never drop to zero so the first message is not scheduled infinitely far away
+            return max(self.rate * elapsed / self.ramp_seconds, self.rate / 100)
+        return self.rate
+
+
+class LatencyRecorder:
+    """Collects latency samples (in seconds) and reports percentiles."""
+
+    def __init__(self):
+        self.samples = []
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def percentiles(self, percentiles=REPORT_PERCENTILES) -> dict:
+        """
+        Returns the requested percentiles in milliseconds (nearest-rank).
+
+        Parameters:
+            percentiles (iterable): Percentiles between 0 and 100
+        """
+        if not self.samples:
+            return {p: None for p in percentiles}
+        ordered = sorted(self.samples)
+        result = {}
+        for p in percentiles:
+            rank = max(1, math.ceil(p / 100 * len(ordered)))
+            result[p] = ordered[rank - 1] * 1000
+        return result
+
+
+def format_percentiles(percentiles: dict) -> str:
+    """Format a percentile dict from LatencyRecorder for logging."""
+    return ", ".join(f"p{p:g}={value:.2f}ms" if value is not None else f"p{p:g}=n/a" for p, value in percentiles.items())
+
+
+def run_load(send, make_message, profile: LoadProfile, pacing: str = OPEN_LOOP, wait=time.sleep,
+             report_interval: float = 5.0, rate_limit=None, logger=None) -> dict:
+    """
+    Publishes messages following a load profile.
+
+    Open-loop pacing schedules each send at a fixed time regardless of how long earlier sends
+    took, and measures latency from the scheduled time, so a stalled publisher shows up as
+    latency instead of silently lowering the offered load. Closed-loop pacing waits for each send
+    to finish before scheduling the next one.
+
+    Parameters:
+        send: Callable(message) that publishes one message
+        make_message: Callable() returning the next message
+        profile (LoadProfile): Target rate over time
+        pacing (str): OPEN_LOOP or CLOSED_LOOP
+        wait: Callable(seconds) used to wait between sends (e.g. one that services the connection)
+        report_interval (float): Seconds between progress log lines
+        rate_limit: Callable() returning the highest rate currently allowed (e.g. by backpressure);
+            sends are scheduled at the lower of it and the profile's rate
+        logger: Logger to report on (defaults to this module's logger)
+
+    Returns:
+        dict: sent, elapsed, achieved_rate and send latency percentiles (ms)
+    """
+    if pacing not in (OPEN_LOOP, CLOSED_LOOP):
+        raise ValueError(f"Unknown pacing: {pacing}")
+    logger = logger or logging.getLogger(__name__)
+    latencies = LatencyRecorder()
+
+    start = time.perf_counter()
+    next_send = start
+    next_report = start + report_interval
+    sent = 0
+    last_report_sent = 0
+
+    while True:
+        now = time.perf_counter()
+        elapsed = now - start
+        if elapsed >= profile.duration:
+            break
+        if now < next_send:
+            wait(next_send - now)
+            continue
+
+        message = make_message()
+        began = time.perf_counter()
+        send(message)
+        finished = time.perf_counter()
+        sent += 1
+
+        rate = profile.rate_at(elapsed)
+        if rate_limit is not None:
+            rate = min(rate, rate_limit())
+        interval = 1.0 / rate
+        if pacing == OPEN_LOOP:
+            latencies.record(finished - next_send)  # Includes any time the send was behind schedule
+            next_send += interval
+        else:
+            latencies.record(finished - began)
+            next_send = finished + interval
+
+        if finished >= next_report:
+            window_rate = (sent - last_report_sent) / report_interval
+            logger.info(f"Load: {sent} sent, {window_rate:.0f} msg/s over the last {report_interval:g}s, "
+                        f"target {profile.rate_at(finished - start):.0f} msg/s")
+            last_report_sent = sent
+            next_report += report_interval
+
+    elapsed = time.perf_counter() - start
+    return {
+        'sent': sent,
+        'elapsed': elapsed,
+        'achieved_rate': sent / elapsed if elapsed else 0.0,
+        'send_latency_ms': latencies.percentiles(),
+    }
@@ -0,0 +1,154 @@
+"""
+Real-Time Auction Tracker: Lot Routing
+This module routes bids for thousands of auction lots through a topic exchange onto a fixed set
+of shard queues. Each lot is mapped to a shard with a jump consistent hash (precomputed for the
+known lots), so a lot's bids stay in order on one queue while a busy category is spread across
+every shard. Consumers take contiguous shard ranges, recomputed when consumers come and go.
+
+Routing keys are "bid.<item type>.<shard>"; each shard queue is bound with "bid.*.<shard>", so a
+consumer that only wants one category can bind its own queue with "bid.art.*" instead.
+"""
+
+from array import array
+
+# Topic exchange the producer publishes lot bids to
+EXCHANGE_NAME = 'auction_bids'
+EXCHANGE_TYPE = 'topic'
+
+# Number of shard queues (changing it moves only about 1/SHARD_COUNT of the lots per shard added)
+SHARD_COUNT = 16
+
+# Auction lots bids are spread across (the generators draw lot ids below it); their shards are
+# precomputed at startup and higher lot ids are computed on first use
+LOT_COUNT = 5000
+
+# First word of every lot routing key
+ROUTING_PREFIX = 'bid'
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping and Veach): maps a key to one of buckets so that growing
+    buckets from n to n + 1 moves only 1/(n + 1) of the keys.
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_queue_name(shard: int) -> str:
+    """Name of a shard queue."""
+    return f"auction_shard_{shard:02d}"
+
+
+def shard_binding(shard: int) -> str:
+    """Binding key that routes every item type's bids for a shard to its queue."""
+    return f"{ROUTING_PREFIX}.*.{shard}"
+
+
+def parse_routing_key(routing_key: str):
+    """
+    Split a lot routing key.
+
+    Returns:
+        tuple: (item_type, shard), or None if routing_key is not a lot routing key
+    """
+    parts = routing_key.split('.')
+    if len(parts) != 3 or parts[0] != ROUTING_PREFIX or not parts[2].isdigit():
+        return None
+    return parts[1], int(parts[2])
+
+
+def item_type_for(routing_key: str, queue_config: dict) -> str:
+    """
+    Item type of a delivery, from either a per-category queue name or a lot routing key.
+
+    Parameters:
+        routing_key (str): method.routing_key of the delivery
+        queue_config (dict): Queue name -> item type for the per-category queues
+    """
+    item_type = queue_config.get(routing_key)
+    if item_type is None:
+        parsed = parse_routing_key(routing_key)
+        item_type = parsed[0] if parsed else 'unknown'
+    return item_type
+
+
+def assign_shards(shard_count: int, consumer_count: int) -> list:
+    """
+    Splits the shards into one contiguous, near-equal range per consumer.
+
+    Parameters:
+        shard_count (int): Number of shards
+        consumer_count (int): Number of consumers (at most shard_count get a non-empty range)
+
+    Returns:
+        list: One range of shard numbers per consumer
+    """
+    consumer_count = max(1, consumer_count)
+    base, extra = divmod(shard_count, consumer_count)
+    ranges = []
+    start = 0
+    for consumer in range(consumer_count):
+        size = base + (1 if consumer < extra else 0)
+        ranges.append(range(start, start + size))
+        start += size
+    return ranges
+
+
+def declare_topology(channel, shards=None, shard_count: int = SHARD_COUNT):
+    """
+    Declare the lot exchange and the given shard queues with their bindings.
+
+    Parameters:
+        channel: Channel to declare on
+        shards (iterable): Shards to declare (defaults to all of them)
+        shard_count (int): Total number of shards
+
+    Returns:
+        list: Names of the declared shard queues
+    """
+    channel.exchange_declare(exchange=EXCHANGE_NAME, exchange_type=EXCHANGE_TYPE, durable=True)
+    queue_names = []
+    for shard in (range(shard_count) if shards is None else shards):
+        queue_name = shard_queue_name(shard)
+        channel.queue_declare(queue=queue_name, durable=True)
+        channel.queue_bind(queue=queue_name, exchange=EXCHANGE_NAME, routing_key=shard_binding(shard))
+        queue_names.append(queue_name)
+    return queue_names
+
+
+class LotRouter:
+    """Maps (item type, lot id) to a routing key using a precomputed lot -> shard table."""
+
+    def __init__(self, shard_count: int = SHARD_COUNT, lot_count: int = LOT_COUNT):
+        """
+        Parameters:
+            shard_count (int): Number of shard queues
+            lot_count (int): Lots 0 .. lot_count - 1 have their shard precomputed
+        """
+        self.shard_count = shard_count
+        self.shards = array('H', (jump_hash(lot_id, shard_count) for lot_id in range(lot_count)))
+        self.extra_shards = {}  # lot id -> shard for lots outside the precomputed table
+        self.keys = {}  # (item type, shard) -> routing key
+
+    def shard_for(self, lot_id: int) -> int:
+        """Shard of a lot."""
+        if 0 <= lot_id < len(self.shards):
+            return self.shards[lot_id]
+        shard = self.extra_shards.get(lot_id)
+        if shard is None:
+            shard = self.extra_shards[lot_id] = jump_hash(lot_id, self.shard_count)
+        return shard
+
+    def routing_key(self, item_type: str, lot_id: int) -> str:
+        """Routing key for a bid on a lot."""
+        shard = self.shard_for(lot_id)
+        key = self.keys.get((item_type, shard))
+        if key is None:
+            key = self.keys[(item_type, shard)] = f"{ROUTING_PREFIX}.{item_type}.{shard}"
+        return key
@@ -0,0 +1,94 @@
+"""
+Real-Time Auction Tracker: Consumer Micro-Batching
+This module collects deliveries in the consumer callback and processes them together once
+max_batch have arrived or the oldest has waited max_delay seconds, so the per-delivery overhead
+(logging, latency bookkeeping, acks) is paid once per batch. The batch handler reports which
+deliveries failed; those are nacked one by one and the rest are settled with one cumulative ack
+per channel, so a bad bid never acks or rejects its neighbours.
+"""
+
+import logging
+import time
+
+# Deliveries processed together
+MAX_BATCH = 100
+
+# Seconds the oldest delivery may wait for its batch to fill
+MAX_DELAY = 0.05
+
+
+class MicroBatcher:
+    """
+    Batches deliveries from on_message_callback for a handler.
+
+    handle_batch(deliveries) receives a list of (channel, method, properties, body) tuples in
+    delivery order and returns a dict of index -> error message for the deliveries that failed.
+    Use add() as the consumer callback and call poll() from the consuming loop (for example after
+    every connection.process_data_events(time_limit=max_delay)) so a partial batch is not held
+    longer than max_delay when traffic stops. A batch larger than the channel's prefetch count
+    would only ever be processed by poll().
+    """
+
+    def __init__(self, handle_batch, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY, logger=None):
+        """
+        Parameters:
+            handle_batch: Callable(deliveries) returning {index: error message} for failed deliveries
+            max_batch (int): Deliveries that trigger processing
+            max_delay (float): Maximum seconds a delivery waits for its batch
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.handle_batch = handle_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.logger = logger or logging.getLogger(__name__)
+        self.pending = []  # (channel, method, properties, body) in delivery order
+        self.first_at = 0.0  # Monotonic time the oldest pending delivery arrived
+        self.stats = {'batches': 0, 'deliveries': 0, 'failed': 0, 'acks': 0}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, channel, method, properties, body):
+        """Queue one delivery (the on_message_callback), processing the batch once it is full or due."""
+        if not self.pending:
+            self.first_at = time.monotonic()
+        self.pending.append((channel, method, properties, body))
+        if len(self.pending) >= self.max_batch or time.monotonic() - self.first_at >= self.max_delay:
+            self.flush()
+
+    def poll(self):
+        """Process a partial batch whose oldest delivery has waited max_delay."""
+        if self.pending and time.monotonic() - self.first_at >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """Process the pending deliveries, nack the failures and ack the rest cumulatively."""
+        deliveries = self.pending
+        if not deliveries:
+            return
+        self.pending = []
+        try:
+            failures = self.handle_batch(deliveries)
+        except Exception as e:
+            failures = dict.fromkeys(range(len(deliveries)), f"An error occurred while processing the batch: {e}")
+
+        # Nack failures first: a cumulative ack covers every earlier unsettled tag on the channel
+        newest_ok = {}  # channel -> newest successful delivery tag
+        for index, (channel, method, _, _) in enumerate(deliveries):
+            reason = failures.get(index)
+            if reason is None:
+                newest_ok[channel] = method.delivery_tag
+            else:
+                self.logger.error(reason)
+                channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)  # Reject without requeueing
+        for channel, delivery_tag in newest_ok.items():
+            channel.basic_ack(delivery_tag=delivery_tag, multiple=True)
+        self.stats['batches'] += 1
+        self.stats['deliveries'] += len(deliveries)
+        self.stats['failed'] += len(failures)
+        self.stats['acks'] += len(newest_ok)
+
+    def close(self):
+        """Process whatever is pending and log the batching stats."""
+        self.flush()
+        self.logger.info(f"Micro-batch stats: {self.stats}")
@@ -7,18 +7,27 @@ Date: January 15, 2023
 Revised: June 12, 2024
 """
 
-import pika
-import json
+import argparse
 from faker import Faker
 import random
 from datetime import datetime, timezone
-import time
 import webbrowser  # Import for opening the web browser
 from util_logger import setup_logger
+from transport import PUBLISH_ERRORS, connect, make_properties
+from batch_publisher import BatchPublisher
+from bid_codec import JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE, encode_bid
+from bulk_bid_generator import BulkBidGenerator
+from lot_routing import EXCHANGE_NAME, LOT_COUNT, SHARD_COUNT, LotRouter, declare_topology, shard_queue_name
+from backpressure import BackpressureController
+from spool import FailoverPublisher, Spool
+from load_generator import LoadProfile, LatencyRecorder, OPEN_LOOP, CLOSED_LOOP, run_load, format_percentiles
 
 # Set up logger
 logger, logname = setup_logger(__file__)
 
+# Message transport: "pika://localhost" for RabbitMQ, "memory://" for the in-process broker
+TRANSPORT_URL = 'pika://localhost'
+
 # Configuration mapping for queues based on item types
 QUEUE_CONFIG = {
     'electronics': 'auction_queue_electronics',
@@ -26,9 +35,39 @@ QUEUE_CONFIG = {
     'art': 'auction_queue_art'
 }
 
+# Routing: 'queues' sends each item type to its own queue; 'lots' publishes to the lot topic
+# exchange, which spreads every item type's lots across the shard queues (see lot_routing)
+ROUTING_MODE = 'queues'
+LOT_ROUTER = LotRouter() if ROUTING_MODE == 'lots' else None
+
 # Time interval (in seconds) between sending messages
 MESSAGE_INTERVAL = 5
 
+# Wire format for bids: JSON_CONTENT_TYPE for compatibility, BINARY_CONTENT_TYPE for compact records
+CONTENT_TYPE = JSON_CONTENT_TYPE
+
+# Publish in batches with publisher confirms (set to False to send one message at a time)
+BATCH_MODE = True
+
+# Generate bids in batches from pre-built name/email pools instead of calling Faker per bid
+USE_BULK_GENERATOR = True
+GENERATOR_SEED = None  # Set to an integer for reproducible runs
+
+# Service the publisher (confirms and timed flushes) after this many load-mode sends
+LOAD_POLL_EVERY = 100
+
+# Slow down (AIMD) when the consumers fall behind: the publish rate is cut while the queues hold more
+# than QUEUE_HIGH_WATER messages in total, raised again below QUEUE_LOW_WATER, and publishing pauses
+# while RabbitMQ blocks the connection (memory or disk alarm)
+BACKPRESSURE = True
+QUEUE_HIGH_WATER = 10_000
+QUEUE_LOW_WATER = 1_000
+
+# Keep bids on disk in SPOOL_DIR while RabbitMQ is unreachable and send them, in order, once it is back
+# (None to disable; needs BATCH_MODE). The oldest spooled bids are dropped beyond SPOOL_MAX_BYTES.
+SPOOL_DIR = 'spool/producer'
+SPOOL_MAX_BYTES = 1024 * 1024 * 1024
+
 def offer_rabbitmq_admin_site():
     """Offer to open the RabbitMQ Admin website for monitoring queues."""
     ans = input("Would you like to monitor RabbitMQ queues? (y/n): ")
@@ -36,22 +75,58 @@ def offer_rabbitmq_admin_site():
         webbrowser.open_new("http://localhost:15672/#/queues")
         logger.info("Opened RabbitMQ Admin site.")
 
+def route(message: dict) -> str:
+    """
+    Returns the routing key for a bid: its item type's queue, or its lot's shard routing key.
+
+    Parameters:
+        message (dict): The bid
+    """
+    if LOT_ROUTER is not None:
+        return LOT_ROUTER.routing_key(message['item'], message['lot_id'])
+    return QUEUE_CONFIG.get(message['item'], 'auction_queue_default')  # Default queue if item type not found
+
+def make_publisher(connection, channel, content_type: str = CONTENT_TYPE, **kwargs):
+    """Declares the topology for the routing mode and returns a BatchPublisher for it."""
+    if LOT_ROUTER is not None:
+        declare_topology(channel)
+        return BatchPublisher(connection, channel, (), exchange=EXCHANGE_NAME, content_type=content_type, logger=logger, **kwargs)
+    return BatchPublisher(connection, channel, QUEUE_CONFIG.values(), content_type=content_type, logger=logger, **kwargs)
+
+def make_backpressure(connection, max_rate: float):
+    """
+    Returns a BackpressureController watching the queues this producer fills (None if BACKPRESSURE is off).
+
+    Parameters:
+        connection: The RabbitMQ connection
+        max_rate (float): Highest publish rate in messages per second
+    """
+    if not BACKPRESSURE:
+        return None
+    if LOT_ROUTER is not None:
+        queue_names = [shard_queue_name(shard) for shard in range(SHARD_COUNT)]
+    else:
+        queue_names = QUEUE_CONFIG.values()
+    return BackpressureController(connection, queue_names, max_rate, high_water=QUEUE_HIGH_WATER,
+                                  low_water=QUEUE_LOW_WATER, logger=logger)
+
 def send_message(channel, queue_name: str, message: dict):
     """
     Sends a message to the specified RabbitMQ queue.
     
     Parameters:
         channel: The channel object for sending messages
-        queue_name (str): Name of the queue to send the message to
+        queue_name (str): Name of the queue to send the message to (a routing key in 'lots' mode)
         message (dict): The message data to be sent
     """
-    # Declare a durable queue and publish the message
-    channel.queue_declare(queue=queue_name, durable=True)
+    # Declare a durable queue (the lot exchange and its queues are declared up front) and publish the message
+    if LOT_ROUTER is None:
+        channel.queue_declare(queue=queue_name, durable=True)
     channel.basic_publish(
-        exchange='',
+        exchange=EXCHANGE_NAME if LOT_ROUTER is not None else '',
         routing_key=queue_name,
-        body=json.dumps(message),  # Convert message dictionary to JSON string
-        properties=pika.BasicProperties(delivery_mode=2)  # Make message persistent
+        body=encode_bid(message, CONTENT_TYPE),  # Encode the message dictionary in the configured format
+        properties=make_properties(delivery_mode=2, content_type=CONTENT_TYPE)  # Make message persistent and tag its format
     )
     logger.info(f"Sent message to {queue_name}: Bid Amount: {message['bid_amount']} at {message['timestamp']}")
 
@@ -65,44 +140,178 @@ def generate_fake_bid(fake):
     Returns:
         dict: A dictionary representing a fake bid.
     """
+    lot_id = random.randrange(LOT_COUNT)  # Random auction lot
     return {
         'bidder_id': fake.uuid4(),
         'bid_amount': round(random.uniform(10, 1000), 2),  # Random bid amount between $10 and $1000
         'timestamp': datetime.now(timezone.utc).isoformat(),  # Current time in ISO format
-        'item': fake.random_element(elements=('electronics', 'furniture', 'art')),  # Random item type
+        'item': ('electronics', 'furniture', 'art')[lot_id % 3],  # Item type of the lot
+        'lot_id': lot_id,
         'bidder_name': fake.name(),
         'bidder_email': fake.email()
     }
 
+def parse_args():
+    """Parse command-line options for the headless load-generation mode."""
+    parser = argparse.ArgumentParser(description="Send synthetic auction bids to RabbitMQ.")
+    parser.add_argument('--load', action='store_true', help="Run headless at a target rate instead of one bid every MESSAGE_INTERVAL seconds")
+    parser.add_argument('--rate', type=float, default=1000, help="Target rate in messages per second")
+    parser.add_argument('--duration', type=float, default=60, help="Length of the run in seconds")
+    parser.add_argument('--ramp', type=float, default=0, help="Seconds to ramp up to the target rate")
+    parser.add_argument('--burst-rate', type=float, default=None, help="Rate during bursts")
+    parser.add_argument('--burst-every', type=float, default=None, help="Seconds between bursts")
+    parser.add_argument('--burst-length', type=float, default=1.0, help="Seconds each burst lasts")
+    parser.add_argument('--pacing', choices=(OPEN_LOOP, CLOSED_LOOP), default=OPEN_LOOP, help="Open- or closed-loop pacing")
+    return parser.parse_args()
+
+def make_bid_source(fake):
+    """
+    Returns a callable that produces the next bid.
+
+    Parameters:
+        fake (Faker): An instance of the Faker class (used directly when the bulk generator is off)
+    """
+    if USE_BULK_GENERATOR:
+        return BulkBidGenerator(seed=GENERATOR_SEED).__next__
+    return lambda: generate_fake_bid(fake)
+
+def run_load_mode(connection, channel, next_bid, args):
+    """
+    Publishes bids at the requested rate profile and logs achieved rate and latency percentiles.
+
+    Parameters:
+        connection: The RabbitMQ connection
+        channel: The channel object for sending messages
+        next_bid: Callable returning the next bid
+        args: Parsed command-line options
+    """
+    confirm_latency = LatencyRecorder()
+    publisher = make_publisher(connection, channel, latency_recorder=confirm_latency)
+    backpressure = make_backpressure(connection, max(args.rate, args.burst_rate or 0))
+    profile = LoadProfile(args.rate, args.duration, ramp_seconds=args.ramp, burst_rate=args.burst_rate,
+                          burst_every=args.burst_every, burst_length=args.burst_length)
+    sends = 0
+
+    def send(message):
+        nonlocal sends
+        publisher.publish(route(message), message)
+        sends += 1
+        if sends % LOAD_POLL_EVERY == 0:
+            publisher.poll()
+            if backpressure is not None:
+                backpressure.poll()  # Checks queue depth once per interval; waits out a blocked connection
+
+    def wait(seconds):
+        publisher.poll()
+        if backpressure is not None:
+            backpressure.poll()
+        connection.process_data_events(time_limit=seconds)  # Keeps heartbeats and confirms flowing
+
+    logger.info(f"Load mode: {args.rate:g} msg/s for {args.duration:g}s ({args.pacing}-loop pacing).")
+    try:
+        result = run_load(send, next_bid, profile, pacing=args.pacing, wait=wait, logger=logger,
+                          rate_limit=(lambda: backpressure.rate) if backpressure is not None else None)
+    finally:
+        publisher.close()  # Flush remaining bids and wait for confirms
+        if backpressure is not None:
+            backpressure.close()
+    logger.info(f"Load complete: {result['sent']} bids in {result['elapsed']:.1f}s, achieved {result['achieved_rate']:.0f} msg/s")
+    logger.info(f"Send latency: {format_percentiles(result['send_latency_ms'])}")
+    logger.info(f"Publish-to-confirm latency: {format_percentiles(confirm_latency.percentiles())}")
+
+def run_spool_mode(next_bid):
+    """
+    Sends bids like the interactive loop, but spools them to SPOOL_DIR whenever RabbitMQ is
+    unreachable (including at startup) and reconnects in the background.
+
+    Parameters:
+        next_bid: Callable returning the next bid
+    """
+    backpressure = None
+
+    def on_connect(connection):
+        nonlocal backpressure
+        if backpressure is None:
+            backpressure = make_backpressure(connection, 1 / MESSAGE_INTERVAL)
+        else:
+            backpressure.rebind(connection)  # Closes the depth channel on the old connection
+
+    spool = Spool(SPOOL_DIR, CONTENT_TYPE, max_bytes=SPOOL_MAX_BYTES, logger=logger)
+    publisher = FailoverPublisher(TRANSPORT_URL, make_publisher, spool, CONTENT_TYPE, on_connect=on_connect, logger=logger)
+    logger.info(f"Producer started. Sending messages to RabbitMQ queues (spooling to {SPOOL_DIR} while it is down).")
+    try:
+        while True:
+            message = next_bid()  # Generate a fake bid
+            publisher.publish(route(message), message)  # Buffered for a batched publish, or spooled
+            publisher.poll()  # Process confirms and flush buffers that are due (or try to reconnect)
+            if backpressure is not None and publisher.connected:
+                try:
+                    backpressure.pace(MESSAGE_INTERVAL)  # Longer while the queues are backed up or the broker blocks us
+                except PUBLISH_ERRORS as e:
+                    publisher.fail(e)
+            else:
+                publisher.sleep(MESSAGE_INTERVAL)
+    except KeyboardInterrupt:
+        logger.info("Producer interrupted. Exiting.")
+    finally:
+        if backpressure is not None and publisher.connected:
+            backpressure.close()
+        publisher.close()  # Wait for confirms and the drain; whatever is left stays spooled for the next run
+
 if __name__ == "__main__":
-    offer_rabbitmq_admin_site()  # Optionally open RabbitMQ admin site
+    args = parse_args()
+    if not args.load:
+        offer_rabbitmq_admin_site()  # Optionally open RabbitMQ admin site
     fake = Faker()  # Initialize Faker for generating fake data
+    next_bid = make_bid_source(fake)
+    publisher = None
+    backpressure = None
+    connection = channel = None
 
     try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
-        channel = connection.channel()
+        if args.load:
+            connection = connect(TRANSPORT_URL)
+            channel = connection.channel()
+            run_load_mode(connection, channel, next_bid, args)  # Headless load test, then exit
+        elif SPOOL_DIR is not None and BATCH_MODE:
+            run_spool_mode(next_bid)  # Manages its own connections, so it can start while RabbitMQ is down
+        else:
+            connection = connect(TRANSPORT_URL)
+            channel = connection.channel()
 
-        logger.info("Producer started. Sending messages to RabbitMQ queues.")
-        
-        while True:
-            message = generate_fake_bid(fake)  # Generate a fake bid
-            # Determine queue based on item type
-            item_type = message['item']
-            queue_name = QUEUE_CONFIG.get(item_type, 'auction_queue_default')  # Default queue if item type not found
-            send_message(channel, queue_name, message)  # Send the message to the appropriate queue
-            time.sleep(MESSAGE_INTERVAL)  # Wait before sending the next message
+            if BATCH_MODE:
+                # Declares the queues once and enables publisher confirms
+                publisher = make_publisher(connection, channel)
+            elif LOT_ROUTER is not None:
+                declare_topology(channel)  # Declare the lot exchange and shard queues once
+
+            backpressure = make_backpressure(connection, 1 / MESSAGE_INTERVAL)
+            logger.info("Producer started. Sending messages to RabbitMQ queues.")
+
+            while True:
+                message = next_bid()  # Generate a fake bid
+                queue_name = route(message)  # Determine queue (or lot routing key) based on item type
+                if publisher:
+                    publisher.publish(queue_name, message)  # Buffer the message for a batched publish
+                    publisher.poll()  # Process confirms and flush buffers that are due
+                else:
+                    send_message(channel, queue_name, message)  # Send the message to the appropriate queue
+                # Wait before sending the next message, servicing heartbeats and confirms meanwhile
+                if backpressure is not None:
+                    backpressure.pace(MESSAGE_INTERVAL)  # Longer while the queues are backed up or the broker blocks us
+                else:
+                    connection.sleep(MESSAGE_INTERVAL)
 
     except KeyboardInterrupt:
         logger.info("Producer interrupted. Exiting.")
+        if publisher:
+            publisher.close()  # Flush remaining bids and wait for confirms
+        if backpressure is not None:
+            backpressure.close()
     finally:
-        if channel.is_open:
+        if channel is not None and channel.is_open:
             channel.close()  # Close the channel
             logger.info("Closed RabbitMQ channel.")
-        if connection.is_open:
+        if connection is not None and connection.is_open:
             connection.close()  # Close the connection
             logger.info("Closed RabbitMQ connection.")
-
-
-
-
-
@@ -0,0 +1,274 @@
+"""
+Real-Time Auction Tracker: Quantile Sketches
+This module estimates bid quantiles per item type without keeping the bids. Each sketch maps a
+value to a logarithmic bucket (in the style of DDSketch), so an update is one log and one dict
+increment, any quantile is within relative_accuracy of the true value, memory is bounded by
+max_buckets, and two sketches merge exactly by adding their bucket counts. QuantileThresholds
+turns the sketches into per-category alert thresholds such as "above the 99.5th percentile".
+"""
+
+import logging
+import math
+
+# Relative error of every quantile estimate (0.5%: a $900 bid is placed within $4.50)
+RELATIVE_ACCURACY = 0.005
+
+# Buckets per sketch before the lowest ones are folded together (bids from $0.01 to $10M need ~2100)
+MAX_BUCKETS = 2048
+
+# Values at or below this are counted in the zero bucket
+MIN_VALUE = 1e-9
+
+# Percentile a bid must exceed to raise an alert
+ALERT_QUANTILE = 99.5
+
+# Bids a category needs before its quantile replaces the fixed threshold
+MIN_COUNT = 500
+
+# Recompute a category's threshold after this many of its bids
+REFRESH_EVERY = 100
+
+
+class QuantileSketch:
+    """Mergeable, fixed-size sketch of a value distribution with relative-error quantiles."""
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY, max_buckets: int = MAX_BUCKETS):
+        """
+        Parameters:
+            relative_accuracy (float): Relative error of quantile estimates
+            max_buckets (int): Buckets kept before the lowest are folded together
+        """
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}  # bucket index -> count; bucket i holds values in (gamma^(i-1), gamma^i]
+        self.zero_count = 0
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value: float, weight: int = 1):
+        """Record a value (weight times)."""
+        if value > MIN_VALUE:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            bins = self.bins
+            if index in bins:
+                bins[index] += weight
+            else:
+                bins[index] = weight
+                if len(bins) > self.max_buckets:
+                    self.collapse()
+        else:
+            self.zero_count += weight
+        self.count += weight
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def collapse(self):
+        """Fold the lowest buckets together until max_buckets remain (low quantiles lose accuracy first)."""
+        ordered = sorted(self.bins)
+        excess = len(ordered) - self.max_buckets
+        if excess <= 0:
+            return
+        folded = sum(self.bins.pop(index) for index in ordered[:excess])
+        self.bins[ordered[excess]] += folded
+
+    def bucket_value(self, index: int) -> float:
+        """Estimate for the values in a bucket (within relative_accuracy of all of them)."""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantile(self, percentile: float) -> float:
+        """
+        Value at a percentile (None if the sketch is empty).
+
+        Parameters:
+            percentile (float): Between 0 and 100
+        """
+        if self.count == 0:
+            return None
+        rank = percentile / 100 * (self.count - 1)
+        if percentile >= 50:
+            # High percentiles (the alerting case) are found from the top in fewer steps
+            remaining = self.count - 1 - rank
+            seen = 0
+            for index in sorted(self.bins, reverse=True):
+                seen += self.bins[index]
+                if seen > remaining:
+                    return self.clamp(self.bucket_value(index))
+            return self.clamp(0.0)
+        if rank < self.zero_count:
+            return self.clamp(0.0)
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return self.clamp(self.bucket_value(index))
+        return self.maximum
+
+    def clamp(self, value: float) -> float:
+        return min(max(value, self.minimum), self.maximum)
+
+    def merge(self, other):
+        """
+        Add another sketch's counts into this one.
+
+        Raises:
+            ValueError: If the sketches were built with different accuracies
+        """
+        if other.gamma != self.gamma:
+            raise ValueError(f"Cannot merge sketches with relative accuracy {self.relative_accuracy} and {other.relative_accuracy}")
+        if other.count == 0:
+            return
+        bins = self.bins
+        for index, count in other.bins.items():
+            bins[index] = bins.get(index, 0) + count
+        if len(bins) > self.max_buckets:
+            self.collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+
+    def to_dict(self) -> dict:
+        """Plain-data form of the sketch (for pipes, pickling or JSON)."""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_buckets': self.max_buckets,
+            'bins': dict(self.bins),
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'min': self.minimum,
+            'max': self.maximum,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Rebuild a sketch from to_dict() output."""
+        sketch = cls(data['relative_accuracy'], data['max_buckets'])
+        sketch.bins = {int(index): count for index, count in data['bins'].items()}  # JSON turns keys into strings
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.minimum = data['min']
+        sketch.maximum = data['max']
+        return sketch
+
+
+class QuantileThresholds:
+    """
+    Per-item-type alert thresholds at a quantile of each type's bids so far.
+
+    A category's threshold is recomputed every refresh_every of its bids, so the per-bid cost is a
+    sketch update; until a category has min_count bids, observe() returns None and the caller
+    falls back to its fixed threshold.
+    """
+
+    def __init__(self, quantile: float = ALERT_QUANTILE, min_count: int = MIN_COUNT, refresh_every: int = REFRESH_EVERY,
+                 relative_accuracy: float = RELATIVE_ACCURACY, max_buckets: int = MAX_BUCKETS, logger=None):
+        """
+        Parameters:
+            quantile (float): Percentile (0-100) a bid must exceed to raise an alert
+            min_count (int): Bids a category needs before its quantile is used
+            refresh_every (int): Bids between threshold recomputations
+            relative_accuracy (float): Relative error of the sketches
+            max_buckets (int): Bucket limit of each sketch
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.quantile = quantile
+        self.min_count = min_count
+        self.refresh_every = refresh_every
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.logger = logger or logging.getLogger(__name__)
+        self.sketches = {}  # item type -> QuantileSketch
+        self.thresholds = {}  # item type -> current threshold
+        self.pending = {}  # item type -> bids since the last refresh
+
+    def sketch(self, item_type: str) -> QuantileSketch:
+        """The sketch for an item type (created on first use)."""
+        sketch = self.sketches.get(item_type)
+        if sketch is None:
+            sketch = self.sketches[item_type] = QuantileSketch(self.relative_accuracy, self.max_buckets)
+            self.pending[item_type] = 0
+        return sketch
+
+    def observe(self, item_type: str, bid_amount: float) -> float:
+        """
+        Returns the item type's current threshold, then adds the bid to its sketch.
+
+        Parameters:
+            item_type (str): Item type of the bid
+            bid_amount (float): The bid amount
+
+        Returns:
+            float: The threshold the bid should be compared with (None while the category warms up)
+        """
+        threshold = self.thresholds.get(item_type)
+        self.sketch(item_type).add(bid_amount)
+        pending = self.pending[item_type] + 1
+        if pending >= self.refresh_every:
+            self.refresh(item_type)
+        else:
+            self.pending[item_type] = pending
+        return threshold
+
+    def threshold(self, item_type: str) -> float:
+        """Current threshold for an item type (None while it warms up)."""
+        return self.thresholds.get(item_type)
+
+    def refresh(self, item_type: str):
+        """Recompute an item type's threshold from its sketch."""
+        self.pending[item_type] = 0
+        sketch = self.sketches[item_type]
+        if sketch.count < self.min_count:
+            return
+        threshold = sketch.quantile(self.quantile)
+        if self.logger.isEnabledFor(logging.DEBUG) and threshold != self.thresholds.get(item_type):
+            self.logger.debug(f"Alert threshold for {item_type}: p{self.quantile:g} = {threshold:.2f} over {sketch.count} bids")
+        self.thresholds[item_type] = threshold
+
+    def snapshot(self) -> dict:
+        """
+        Returns the mergeable state of every sketch.
+
+        Returns:
+            dict: item type -> QuantileSketch.to_dict()
+        """
+        return {item_type: sketch.to_dict() for item_type, sketch in self.sketches.items()}
+
+    def merge(self, snapshot: dict):
+        """
+        Adds sketches from another instance's snapshot (e.g. another shard) and refreshes thresholds.
+
+        Parameters:
+            snapshot (dict): Output of snapshot()
+        """
+        for item_type, data in snapshot.items():
+            self.sketch(item_type).merge(QuantileSketch.from_dict(data))
+            self.refresh(item_type)
+
+
+def merge_sketch_snapshots(snapshots) -> dict:
+    """
+    Combines QuantileThresholds snapshots per item type.
+
+    Parameters:
+        snapshots (iterable): Snapshots from QuantileThresholds.snapshot()
+
+    Returns:
+        dict: item type -> merged QuantileSketch
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for item_type, data in snapshot.items():
+            sketch = QuantileSketch.from_dict(data)
+            if item_type in merged:
+                merged[item_type].merge(sketch)
+            else:
+                merged[item_type] = sketch
+    return merged
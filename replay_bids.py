@@ -0,0 +1,216 @@
+"""
+Real-Time Auction Tracker: Bid Replay and Backtest Tool
+This script feeds recorded bids through the consumer pipeline (rolling windows and high-bid
+checks) without a broker, as fast as possible or at a chosen time scale, and reports the alerts
+fired and the throughput. Several thresholds, alert quantiles and window sizes can be compared in
+one run (with a quantile, the fixed threshold only applies while an item type warms up).
+
+Bids can come from a bid archive (written by consumer_v4.0 with RECORDING_PATH set) or from the
+existing log files: consumer logs ("Received art message: 871.83 at ...", or the full message
+dictionary in consumer_v2.0), and producer logs ("Sent message to auction_queue_art: Bid Amount:
+..." or "Sent message: {...}"). Consumer logs written with sampling only hold the sampled bids.
+
+Usage:
+    python replay_bids.py SOURCE [SOURCE ...] [--threshold 800 900] [--quantile 99 99.5] [--window-size 5 20]
+                          [--window-seconds 60] [--speed 10] [--start EPOCH_SECONDS]
+"""
+
+import argparse
+import ast
+import logging
+import re
+import sys
+import time
+
+from auction_state import AuctionState
+from bid_archive import BidArchiveReader
+from bid_codec import BidDecodeError, decode_bid, iso_to_micros
+from bid_pipeline import BidPipeline
+from heavy_hitters import HeavyHitterDetector
+from quantile_sketch import QuantileThresholds
+
+# Queue names used by the producer, for producer_v3.0 log lines
+QUEUE_CONFIG = {
+    'auction_queue_electronics': 'electronics',
+    'auction_queue_furniture': 'furniture',
+    'auction_queue_art': 'art'
+}
+ITEM_TYPES = tuple(QUEUE_CONFIG.values())
+
+# Defaults matching consumer_v4.0
+WINDOW_SIZE = 5
+BID_THRESHOLD = 800
+CONSUMER_FIELDS = ('bidder_id', 'bid_amount', 'timestamp_us', 'lot_id')
+
+# Log line formats that carry a bid
+RECEIVED_LINE = re.compile(r"Received (\w+) message: ([-\d.]+) at (\S+)$")
+RECEIVED_DICT_LINE = re.compile(r"Received (\w+) message: (\{.*\})$")
+SENT_QUEUE_LINE = re.compile(r"Sent message to (\w+): Bid Amount: ([-\d.]+) at (\S+)$")
+SENT_DICT_LINE = re.compile(r"Sent message: (\{.*\})$")
+
+
+class AlertCounter:
+    """Alert sink that counts the high-bid alerts a pipeline raises."""
+
+    def __init__(self):
+        self.counts = {}  # item type -> alerts
+        self.floods = 0
+
+    def add(self, item_type: str, bid_amount: float, timestamp: str, bidder_id: str = None):
+        self.counts[item_type] = self.counts.get(item_type, 0) + 1
+
+    def add_flood(self, item_type: str, bidder_id: str, lot_id: int, bids: int, timestamp: str):
+        self.floods += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def make_bid(bid_amount: float, timestamp: str, bidder_id: str = None) -> dict:
+    """Build a decoded bid in the form the pipeline expects."""
+    return {'bidder_id': bidder_id, 'bid_amount': bid_amount, 'timestamp': timestamp,
+            'timestamp_us': iso_to_micros(timestamp)}
+
+
+def parse_log_line(line: str):
+    """
+    Extract a bid from one log line.
+
+    Parameters:
+        line (str): A line from a consumer or producer log
+
+    Returns:
+        tuple: (item_type, bid) or None if the line does not carry a bid
+    """
+    match = RECEIVED_LINE.search(line)
+    if match:
+        return match.group(1), make_bid(float(match.group(2)), match.group(3))
+    match = SENT_QUEUE_LINE.search(line)
+    if match:
+        return QUEUE_CONFIG.get(match.group(1), 'unknown'), make_bid(float(match.group(2)), match.group(3))
+    match = RECEIVED_DICT_LINE.search(line) or SENT_DICT_LINE.search(line)
+    if match:
+        message = ast.literal_eval(match.group(match.lastindex))
+        item_type = match.group(1) if match.lastindex == 2 else message.get('item', 'unknown')
+        return item_type, make_bid(message['bid_amount'], message['timestamp'], message.get('bidder_id'))
+    return None
+
+
+def read_log(path: str):
+    """Yield (item_type, bid) for every bid found in a log file."""
+    with open(path, encoding='utf-8', errors='replace') as file:
+        for line in file:
+            try:
+                parsed = parse_log_line(line.rstrip('\n'))
+            except (ValueError, SyntaxError, KeyError):
+                continue  # A truncated or unrelated line
+            if parsed is not None:
+                yield parsed
+
+
+def read_archive(path: str, start: float = None):
+    """Yield (item_type, bid) for every decodable message in a bid archive."""
+    for _, item_type, content_type, body in BidArchiveReader(path).records(start):
+        try:
+            yield item_type, decode_bid(body, content_type, CONSUMER_FIELDS)
+        except BidDecodeError:
+            continue
+
+
+def load_bids(sources: list, start: float = None) -> list:
+    """
+    Read every source into one list of (item_type, bid), in bid timestamp order.
+
+    Parameters:
+        sources (list): Archive (.bids) and log (.log) file paths
+        start (float): Skip bids before this epoch second (None for all)
+    """
+    bids = []
+    for path in sources:
+        if path.endswith('.log'):
+            bids.extend(read_log(path))
+        else:
+            bids.extend(read_archive(path, start))
+    if start is not None:
+        start_us = int(start * 1_000_000)
+        bids = [entry for entry in bids if entry[1]['timestamp_us'] >= start_us]
+    bids.sort(key=lambda entry: entry[1]['timestamp_us'])
+    return bids
+
+
+def replay(bids: list, threshold: float, window_size: int, window_seconds: float = None, speed: float = 0,
+           quantile: float = None) -> dict:
+    """
+    Run bids through a fresh pipeline.
+
+    Parameters:
+        bids (list): (item_type, bid) pairs in timestamp order
+        threshold (float): Bid threshold for high-bid alerts
+        window_size (int): Rolling window size
+        window_seconds (float): Rolling window age limit (None for none)
+        speed (float): Time scale relative to the recorded bids (0 replays as fast as possible)
+        quantile (float): Alert above this percentile of each item type's bids (None for the fixed threshold only)
+
+    Returns:
+        dict: bids, alerts, alerts per item type, flagged bidders, elapsed seconds and bids per second
+    """
+    quiet = logging.getLogger('replay_bids.pipeline')
+    quiet.setLevel(logging.WARNING)  # Per-bid INFO logging would dominate the replay time
+    alerts = AlertCounter()
+    thresholds = QuantileThresholds(quantile=quantile, logger=quiet) if quantile is not None else None
+    heavy_hitters = HeavyHitterDetector(report_top=0, logger=quiet)
+    pipeline = BidPipeline(ITEM_TYPES, window_size=window_size, window_seconds=window_seconds,
+                           bid_threshold=threshold, alert_sink=alerts, auction_state=AuctionState(logger=quiet),
+                           thresholds=thresholds, heavy_hitters=heavy_hitters, logger=quiet)
+
+    started = time.perf_counter()
+    first_us = bids[0][1]['timestamp_us'] if bids else 0
+    for item_type, bid in bids:
+        if speed > 0:
+            due = started + (bid['timestamp_us'] - first_us) / 1_000_000 / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        pipeline.process(item_type, bid)
+    elapsed = time.perf_counter() - started
+    return {
+        'bids': len(bids),
+        'alerts': alerts.total,
+        'alerts_by_item': dict(alerts.counts),
+        'floods': alerts.floods,
+        'elapsed': elapsed,
+        'rate': len(bids) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    """Parse arguments, replay every threshold/window combination and print a report."""
+    parser = argparse.ArgumentParser(description="Replay recorded bids through the consumer pipeline.")
+    parser.add_argument('sources', nargs='+', help="Bid archives and/or log files")
+    parser.add_argument('--threshold', type=float, nargs='+', default=[BID_THRESHOLD], help="Bid thresholds to try")
+    parser.add_argument('--quantile', type=float, nargs='+', default=[None], help="Alert quantiles (percentiles) to try")
+    parser.add_argument('--window-size', type=int, nargs='+', default=[WINDOW_SIZE], help="Window sizes to try")
+    parser.add_argument('--window-seconds', type=float, default=None, help="Also limit windows to this many seconds")
+    parser.add_argument('--speed', type=float, default=0, help="Time scale (e.g. 10 = ten times real time; 0 = as fast as possible)")
+    parser.add_argument('--start', type=float, default=None, help="Skip bids before this epoch second")
+    args = parser.parse_args(argv)
+
+    loading = time.perf_counter()
+    bids = load_bids(args.sources, args.start)
+    print(f"Loaded {len(bids):,} bids from {len(args.sources)} source(s) in {time.perf_counter() - loading:.2f}s")
+    if not bids:
+        return
+
+    for threshold in args.threshold:
+        for quantile in args.quantile:
+            for window_size in args.window_size:
+                result = replay(bids, threshold, window_size, args.window_seconds, args.speed, quantile)
+                by_item = ", ".join(f"{item}: {count}" for item, count in sorted(result['alerts_by_item'].items())) or "none"
+                label = f"Threshold {threshold:g}" + (f", quantile p{quantile:g}" if quantile is not None else "")
+                print(f"{label}, window {window_size}: {result['alerts']} alerts ({by_item}), {result['floods']} flooding bidders; "
+                      f"{result['bids']:,} bids in {result['elapsed']:.3f}s = {result['rate']:,.0f} bids/s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
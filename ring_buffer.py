@@ -0,0 +1,173 @@
+"""
+Real-Time Auction Tracker: Columnar Bid Ring Buffer
+This module stores a window of bids column by column in flat typed arrays (float64 amounts,
+int64 epoch-microsecond timestamps, 16-byte bidder UUIDs) instead of one decoded dict per bid.
+"""
+
+import math
+import uuid
+from array import array
+
+# Bidder id stored when a bid has no (valid) bidder UUID
+NO_BIDDER = bytes(16)
+
+
+def to_micros(epoch_seconds: float) -> int:
+    """Convert epoch seconds to integer epoch microseconds."""
+    return int(round(epoch_seconds * 1_000_000))
+
+
+def uuid_bytes(bidder_id) -> bytes:
+    """Convert a bidder UUID string to its 16-byte form (NO_BIDDER if it is missing or invalid)."""
+    if not bidder_id:
+        return NO_BIDDER
+    if isinstance(bidder_id, bytes) and len(bidder_id) == 16:
+        return bidder_id  # Already in 16-byte form (e.g. restored from a checkpoint)
+    try:
+        return uuid.UUID(bidder_id).bytes
+    except (ValueError, TypeError, AttributeError):
+        return NO_BIDDER
+
+
+class BidRingBuffer:
+    """
+    Fixed-capacity (or growable) FIFO of bids held in columnar arrays.
+
+    Bids are appended at the tail and removed from the head. When a fixed-capacity buffer is
+    full, appending overwrites the oldest bid. The live bids occupy at most two contiguous
+    slices of each column, exposed through views() for vectorized window statistics.
+    """
+
+    def __init__(self, capacity: int, growable: bool = False):
+        """
+        Parameters:
+            capacity (int): Number of bids the buffer holds
+            growable (bool): Double the capacity when full instead of overwriting the oldest bid
+        """
+        if capacity < 1:
+            raise ValueError("BidRingBuffer capacity must be at least 1.")
+        self.capacity = capacity
+        self.growable = growable
+        self.amounts = array('d', bytes(8 * capacity))
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.bidders = bytearray(16 * capacity)
+        self.head = 0  # Index of the oldest bid
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, amount: float, timestamp_us: int, bidder: bytes = NO_BIDDER):
+        """
+        Adds a bid at the tail of the buffer.
+
+        Parameters:
+            amount (float): The bid amount
+            timestamp_us (int): Epoch microseconds of the bid
+            bidder (bytes): 16-byte bidder UUID
+        """
+        if self.size == self.capacity:
+            if self.growable:
+                self.grow()
+            else:
+                self.popleft()  # Overwrite the oldest bid
+        index = (self.head + self.size) % self.capacity
+        self.amounts[index] = amount
+        self.timestamps[index] = timestamp_us
+        self.bidders[16 * index:16 * index + 16] = bidder
+        self.size += 1
+
+    def popleft(self):
+        """
+        Removes the oldest bid.
+
+        Returns:
+            tuple: (amount, timestamp_us) of the removed bid
+        """
+        if self.size == 0:
+            raise IndexError("pop from an empty BidRingBuffer")
+        index = self.head
+        self.head = (self.head + 1) % self.capacity
+        self.size -= 1
+        return self.amounts[index], self.timestamps[index]
+
+    def grow(self):
+        """Double the capacity, moving the live bids to the front of the new arrays."""
+        ordered_amounts = array('d')
+        ordered_timestamps = array('q')
+        ordered_bidders = bytearray()
+        for amount_view, timestamp_view, bidder_view in self.views():
+            ordered_amounts.frombytes(amount_view.tobytes())
+            ordered_timestamps.frombytes(timestamp_view.tobytes())
+            ordered_bidders += bidder_view
+        new_capacity = self.capacity * 2
+        ordered_amounts.frombytes(bytes(8 * (new_capacity - self.size)))
+        ordered_timestamps.frombytes(bytes(8 * (new_capacity - self.size)))
+        ordered_bidders += bytes(16 * (new_capacity - self.size))
+        self.amounts, self.timestamps, self.bidders = ordered_amounts, ordered_timestamps, ordered_bidders
+        self.capacity = new_capacity
+        self.head = 0
+
+    def physical_index(self, position: int) -> int:
+        """Map a logical position (0 = oldest, -1 = newest) to an index into the columns."""
+        if position < 0:
+            position += self.size
+        if not 0 <= position < self.size:
+            raise IndexError("BidRingBuffer index out of range")
+        return (self.head + position) % self.capacity
+
+    def amount(self, position: int) -> float:
+        """Bid amount at a logical position."""
+        return self.amounts[self.physical_index(position)]
+
+    def timestamp(self, position: int) -> int:
+        """Epoch microseconds of the bid at a logical position."""
+        return self.timestamps[self.physical_index(position)]
+
+    def bidder_id(self, position: int):
+        """Bidder UUID string of the bid at a logical position (None if it had no bidder)."""
+        index = self.physical_index(position)
+        raw = bytes(self.bidders[16 * index:16 * index + 16])
+        return None if raw == NO_BIDDER else str(uuid.UUID(bytes=raw))
+
+    def views(self):
+        """
+        Zero-copy views of the live bids, oldest first.
+
+        Returns:
+            list: One or two (amounts, timestamps, bidders) tuples of memoryviews, each covering a
+            contiguous slice of the columns. These can be passed straight to numpy.frombuffer.
+        """
+        if self.size == 0:
+            return []
+        amounts = memoryview(self.amounts)
+        timestamps = memoryview(self.timestamps)
+        bidders = memoryview(self.bidders)
+        end = self.head + self.size
+        if end <= self.capacity:
+            slices = [(self.head, end)]
+        else:
+            slices = [(self.head, self.capacity), (0, end - self.capacity)]
+        return [(amounts[start:stop], timestamps[start:stop], bidders[16 * start:16 * stop]) for start, stop in slices]
+
+    def summary(self) -> dict:
+        """
+        Computes window statistics by scanning the contiguous column slices.
+
+        Returns:
+            dict: count, sum, mean, min, max and variance of the bid amounts
+        """
+        segments = [amount_view for amount_view, _, _ in self.views()]
+        if not segments:
+            return {'count': 0, 'sum': 0.0, 'mean': 0.0, 'min': None, 'max': None, 'variance': 0.0}
+        total = math.fsum(math.fsum(segment) for segment in segments)
+        mean = total / self.size
+        squares = math.fsum(math.fsum((value - mean) ** 2 for value in segment) for segment in segments)
+        return {
+            'count': self.size,
+            'sum': total,
+            'mean': mean,
+            'min': min(min(segment) for segment in segments),
+            'max': max(max(segment) for segment in segments),
+            'variance': squares / (self.size - 1) if self.size > 1 else 0.0,
+        }
@@ -0,0 +1,223 @@
+"""
+Real-Time Auction Tracker: Rolling-Window Bid Statistics
+This module keeps sum, mean, min, max, variance and bid rate over a rolling window of bids,
+updated in O(1) amortized time when a bid is appended or evicted.
+"""
+
+import math
+import time
+from collections import deque
+
+from ring_buffer import BidRingBuffer, to_micros, uuid_bytes
+
+# Starting capacity of the bid buffer for windows limited only by age
+INITIAL_CAPACITY = 1024
+
+
+class RollingStats:
+    """
+    Incremental statistics over a count-based and/or time-based rolling window.
+
+    Running sums give the total and mean, Welford's update (applied in reverse on eviction)
+    gives the variance, and monotonic deques give the window min and max. The bids themselves
+    are held in a columnar BidRingBuffer.
+    """
+
+    def __init__(self, max_count: int = None, max_age: float = None):
+        """
+        Parameters:
+            max_count (int): Keep at most this many bids (None for no count limit)
+            max_age (float): Keep only bids from the last max_age seconds (None for no time limit)
+        """
+        if max_count is None and max_age is None:
+            raise ValueError("RollingStats needs a max_count, a max_age, or both.")
+        self.max_count = max_count
+        self.max_age = max_age
+
+        if max_count is not None:
+            self.window = BidRingBuffer(max_count + 1)  # One spare slot so eviction stays explicit
+        else:
+            self.window = BidRingBuffer(INITIAL_CAPACITY, growable=True)
+        self.min_candidates = deque()  # (sequence number, value), values increasing
+        self.max_candidates = deque()  # (sequence number, value), values decreasing
+        self.next_seq = 0
+
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences from the mean
+
+    def append(self, value: float, timestamp: float = None, bidder_id: str = None):
+        """
+        Adds a bid to the window and evicts any bids that fall out of it.
+
+        Parameters:
+            value (float): The bid amount
+            timestamp (float): Epoch seconds of the bid (defaults to now)
+            bidder_id (str): Bidder UUID (or its 16-byte form), stored alongside the bid
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        seq = self.next_seq
+        self.next_seq += 1
+        self.window.append(value, to_micros(timestamp), uuid_bytes(bidder_id))
+
+        # Welford update for the new value
+        self.total += value
+        count = len(self.window)
+        delta = value - self.mean
+        self.mean += delta / count
+        self.m2 += delta * (value - self.mean)
+
+        # Drop candidates that can never be the min/max again
+        while self.min_candidates and self.min_candidates[-1][1] >= value:
+            self.min_candidates.pop()
+        self.min_candidates.append((seq, value))
+        while self.max_candidates and self.max_candidates[-1][1] <= value:
+            self.max_candidates.pop()
+        self.max_candidates.append((seq, value))
+
+        if self.max_count is not None:
+            while len(self.window) > self.max_count:
+                self.evict()
+        self.expire(timestamp)
+
+    def expire(self, now: float = None):
+        """
+        Evicts bids older than max_age seconds before now.
+
+        Parameters:
+            now (float): Epoch seconds to measure age against (defaults to now)
+        """
+        if self.max_age is None:
+            return
+        if now is None:
+            now = time.time()
+        cutoff = to_micros(now - self.max_age)
+        while self.window and self.window.timestamp(0) < cutoff:
+            self.evict()
+
+    def evict(self):
+        """Removes the oldest bid from the window and reverses its effect on the statistics."""
+        seq = self.next_seq - len(self.window)
+        value, _ = self.window.popleft()
+        count = len(self.window)
+        if count == 0:
+            self.total = self.mean = self.m2 = 0.0
+        else:
+            # Reverse Welford update for the removed value
+            self.total -= value
+            old_mean = self.mean
+            self.mean = (old_mean * (count + 1) - value) / count
+            self.m2 = max(0.0, self.m2 - (value - old_mean) * (value - self.mean))
+        if self.min_candidates and self.min_candidates[0][0] == seq:
+            self.min_candidates.popleft()
+        if self.max_candidates and self.max_candidates[0][0] == seq:
+            self.max_candidates.popleft()
+
+    @property
+    def count(self) -> int:
+        """Number of bids in the window."""
+        return len(self.window)
+
+    def __len__(self):
+        return len(self.window)
+
+    @property
+    def minimum(self):
+        """Lowest bid in the window (None if empty)."""
+        return self.min_candidates[0][1] if self.min_candidates else None
+
+    @property
+    def maximum(self):
+        """Highest bid in the window (None if empty)."""
+        return self.max_candidates[0][1] if self.max_candidates else None
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the bids in the window."""
+        count = len(self.window)
+        return self.m2 / (count - 1) if count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        """Sample standard deviation of the bids in the window."""
+        return math.sqrt(self.variance)
+
+    @property
+    def latest(self):
+        """(timestamp, value) of the newest bid in the window (None if empty)."""
+        if not self.window:
+            return None
+        return self.window.timestamp(-1) / 1_000_000, self.window.amount(-1)
+
+    def rate(self, now: float = None) -> float:
+        """
+        Bids per second over the window.
+
+        For time-based windows this is the count divided by max_age; for count-only windows it
+        is the count divided by the time from the oldest bid to now.
+
+        Parameters:
+            now (float): Epoch seconds to measure against (defaults to now)
+        """
+        count = len(self.window)
+        if count == 0:
+            return 0.0
+        if self.max_age is not None:
+            return count / self.max_age
+        if now is None:
+            now = time.time()
+        span = now - self.window.timestamp(0) / 1_000_000
+        return count / span if span > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        """Returns the mergeable aggregate state of the window (see merge_snapshots)."""
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.minimum,
+            'max': self.maximum,
+        }
+
+    def summary(self) -> dict:
+        """Returns the current statistics as a dictionary."""
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.mean,
+            'min': self.minimum,
+            'max': self.maximum,
+            'variance': self.variance,
+            'rate': self.rate(),
+        }
+
+
+def merge_snapshots(first: dict, second: dict) -> dict:
+    """
+    Combines two window snapshots into the snapshot of their union.
+
+    Uses the parallel form of Welford's algorithm so the merged variance is exact.
+
+    Parameters:
+        first (dict): A snapshot from RollingStats.snapshot()
+        second (dict): Another snapshot
+
+    Returns:
+        dict: The combined snapshot
+    """
+    if first['count'] == 0:
+        return dict(second)
+    if second['count'] == 0:
+        return dict(first)
+    count = first['count'] + second['count']
+    delta = second['mean'] - first['mean']
+    return {
+        'count': count,
+        'sum': first['sum'] + second['sum'],
+        'mean': first['mean'] + delta * second['count'] / count,
+        'm2': first['m2'] + second['m2'] + delta * delta * first['count'] * second['count'] / count,
+        'min': min(first['min'], second['min']),
+        'max': max(first['max'], second['max']),
+    }
@@ -0,0 +1,612 @@
+"""
+Real-Time Auction Tracker: Producer Spool
+This module keeps the producer's bids on local disk while RabbitMQ is unreachable and sends them
+once it is back. The spool is an append-only log split into segment files; a cursor file records
+how far it has been drained, so a restarted producer picks up where it left off. A background
+drainer republishes the spool in large confirmed batches on its own connection, and the oldest
+segments are dropped if the spool outgrows its disk budget.
+
+Messages are sent at least once: a batch that was published but not confirmed when the connection
+dropped is sent again, and the consumers' idempotency cache drops the copies.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+from bid_codec import BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE, encode_bid
+from transport import PUBLISH_ERRORS, connect
+
+# Segment header: magic, format version and content type code of every body in the segment
+MAGIC = b'ASPL'
+VERSION = 1
+SEGMENT_HEADER = struct.Struct('<4sHB')
+
+# Record header: body length, CRC-32 of routing key + body, routing key length
+RECORD = struct.Struct('<IIB')
+
+# Drain cursor: segment number, offset of the next record, records already drained from the segment
+CURSOR = struct.Struct('<QQQ')
+CURSOR_FILE = 'cursor'
+
+# Content type codes stored in segment headers
+CONTENT_TYPES = (JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE)
+CONTENT_CODES = {content_type: code for code, content_type in enumerate(CONTENT_TYPES)}
+
+# Start a new segment file once the current one reaches this size
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+# Drop the oldest segments once the spool is larger than this
+MAX_BYTES = 1024 * 1024 * 1024
+
+# Seconds appended records may wait in the write buffer before reaching the file
+FLUSH_INTERVAL = 0.2
+
+# Bytes buffered when writing, and read at a time when draining
+WRITE_BUFFER = 1024 * 1024
+READ_BYTES = 1024 * 1024
+
+# Messages republished per confirmed drain batch
+DRAIN_BATCH = 5000
+
+# Seconds between reconnect attempts while the broker is unreachable
+RETRY_INTERVAL = 2.0
+
+# Seconds to wait for a drain batch to be confirmed
+CONFIRM_TIMEOUT = 30.0
+
+# Seconds the idle drainer waits for new records before servicing its connection
+IDLE_WAIT = 1.0
+
+
+class SpoolError(ValueError):
+    """Raised when a spool segment is not in the expected format."""
+
+
+def segment_name(number: int) -> str:
+    """File name of a spool segment."""
+    return f"{number:012d}.seg"
+
+
+def parse_records(data: bytes, offset: int, max_records: int):
+    """
+    Parse complete records from a block of a segment.
+
+    Parameters:
+        data (bytes): Bytes read from the segment
+        offset (int): Position in data of the first record
+        max_records (int): Most records to return
+
+    Returns:
+        tuple: (list of (routing key, body), position after the last record returned, True if a
+        damaged record was found)
+    """
+    records = []
+    size = len(data)
+    while len(records) < max_records and offset + RECORD.size <= size:
+        length, checksum, key_length = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        end = start + key_length + length
+        if end > size:
+            break  # The record continues past this block
+        payload = data[start:end]
+        if zlib.crc32(payload) != checksum:
+            return records, offset, True
+        records.append((payload[:key_length].decode('utf-8'), payload[key_length:]))
+        offset = end
+    return records, offset, False
+
+
+class Spool:
+    """
+    Append-only, segmented on-disk queue of (routing key, encoded body) records.
+
+    append() is called by the producer and read()/commit() by the drainer, from different
+    threads. Records are read in the order they were appended, so each queue's messages keep
+    their order. Only committed progress is saved: after a crash, records read but not committed
+    are read again.
+    """
+
+    def __init__(self, directory: str, content_type: str = JSON_CONTENT_TYPE, segment_bytes: int = SEGMENT_BYTES,
+                 max_bytes: int = MAX_BYTES, flush_interval: float = FLUSH_INTERVAL, logger=None):
+        """
+        Parameters:
+            directory (str): Directory holding the segments and cursor (created if needed)
+            content_type (str): Content type of the bodies appended by this producer
+            segment_bytes (int): Size at which a new segment is started
+            max_bytes (int): Disk budget; the oldest segments are dropped beyond it
+            flush_interval (float): Seconds appended records may stay buffered in memory
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.content_code = CONTENT_CODES[content_type]
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.lock = threading.Lock()
+        self.appended = threading.Event()  # Set on every append to wake the drainer
+        self.segments = []  # Segment numbers, oldest first
+        self.counts = {}  # segment -> records in it
+        self.sizes = {}  # segment -> bytes in it
+        self.codes = {}  # segment -> content type code
+        self.read_segment = None
+        self.read_offset = SEGMENT_HEADER.size
+        self.read_count = 0
+        self.write_segment = None
+        self.write_file = None
+        self.last_flush = time.monotonic()
+        self.stats = {'appended': 0, 'drained': 0, 'dropped': 0, 'segments': 0}
+        self.load()
+
+    def path(self, segment: int) -> str:
+        return os.path.join(self.directory, segment_name(segment))
+
+    def load(self):
+        """Recover the segments and cursor left by a previous run and open a segment for appending."""
+        names = [name for name in os.listdir(self.directory) if name.endswith('.seg') and name[:-4].isdigit()]
+        cursor = self.read_cursor()
+        for segment in sorted(int(name[:-4]) for name in names):
+            if cursor is not None and segment < cursor[0]:
+                os.remove(self.path(segment))  # Drained before the last run stopped
+                continue
+            self.scan(segment)
+        if self.segments:
+            if cursor is not None and cursor[0] == self.segments[0]:
+                self.read_segment, self.read_offset, self.read_count = cursor
+            else:
+                self.read_segment = self.segments[0]
+            last = self.segments[-1]
+            if self.codes[last] == self.content_code and self.sizes[last] < self.segment_bytes:
+                self.open_segment(last)
+        if self.write_file is None:
+            self.open_segment(self.segments[-1] + 1 if self.segments else 0)
+        if self.read_segment is None:
+            self.read_segment = self.segments[0]
+        pending = self.pending
+        if pending:
+            self.logger.info(f"Spool {self.directory} holds {pending} undelivered messages.")
+
+    def read_cursor(self):
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE), 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        return CURSOR.unpack(data) if len(data) == CURSOR.size else None
+
+    def write_cursor(self):
+        """Save the drain position (write to a temporary file, then rename over the old one)."""
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + '.tmp', 'wb') as file:
+            file.write(CURSOR.pack(self.read_segment, self.read_offset, self.read_count))
+        os.replace(path + '.tmp', path)
+
+    def scan(self, segment: int):
+        """Count the records of an existing segment, cutting off a record left partial by a crash."""
+        path = self.path(segment)
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < SEGMENT_HEADER.size:
+            os.remove(path)  # Created but never written
+            return
+        magic, version, code = SEGMENT_HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION or code >= len(CONTENT_TYPES):
+            raise SpoolError(f"{path} is not a version {VERSION} spool segment.")
+        records, end, damaged = parse_records(data, SEGMENT_HEADER.size, len(data))
+        if end < len(data):
+            self.logger.warning(f"Truncating {len(data) - end} bytes of {'damaged' if damaged else 'partial'} records from {path}.")
+            with open(path, 'r+b') as file:
+                file.truncate(end)
+        self.segments.append(segment)
+        self.counts[segment] = len(records)
+        self.sizes[segment] = end
+        self.codes[segment] = code
+
+    def open_segment(self, segment: int):
+        """Open a segment for appending, creating it with a header if it is new."""
+        self.write_file = open(self.path(segment), 'ab', buffering=WRITE_BUFFER)
+        if segment not in self.sizes:
+            self.write_file.write(SEGMENT_HEADER.pack(MAGIC, VERSION, self.content_code))
+            self.segments.append(segment)
+            self.counts[segment] = 0
+            self.sizes[segment] = SEGMENT_HEADER.size
+            self.codes[segment] = self.content_code
+            self.stats['segments'] += 1
+        self.write_segment = segment
+
+    @property
+    def pending(self) -> int:
+        """Records appended but not yet drained."""
+        return sum(self.counts.values()) - self.read_count
+
+    @property
+    def size(self) -> int:
+        """Bytes on disk across all segments."""
+        return sum(self.sizes.values())
+
+    def append(self, routing_key: str, body: bytes):
+        """
+        Appends one message.
+
+        Parameters:
+            routing_key (str): Queue name or routing key the message is for
+            body (bytes): The encoded message
+        """
+        payload = routing_key.encode('utf-8') + body
+        record = RECORD.pack(len(body), zlib.crc32(payload), len(payload) - len(body)) + payload
+        with self.lock:
+            segment = self.write_segment
+            if self.sizes[segment] + len(record) > self.segment_bytes and self.counts[segment]:
+                self.rotate()
+                segment = self.write_segment
+            self.write_file.write(record)
+            self.sizes[segment] += len(record)
+            self.counts[segment] += 1
+            self.stats['appended'] += 1
+            now = time.monotonic()
+            if now - self.last_flush >= self.flush_interval:
+                self.write_file.flush()
+                self.last_flush = now
+        self.appended.set()
+
+    def rotate(self):
+        """Close the full segment (synced to disk), start the next one and enforce the disk budget."""
+        self.write_file.flush()
+        os.fsync(self.write_file.fileno())
+        self.write_file.close()
+        self.open_segment(self.write_segment + 1)
+        while self.size > self.max_bytes and len(self.segments) > 1:
+            self.drop_oldest()
+
+    def drop_oldest(self):
+        """Delete the oldest segment to stay within max_bytes, losing its undrained records."""
+        segment = self.segments.pop(0)
+        lost = self.counts.pop(segment) - (self.read_count if segment == self.read_segment else 0)
+        del self.sizes[segment], self.codes[segment]
+        os.remove(self.path(segment))
+        if segment == self.read_segment:
+            self.read_segment, self.read_offset, self.read_count = self.segments[0], SEGMENT_HEADER.size, 0
+            self.write_cursor()
+        self.stats['dropped'] += lost
+        self.logger.warning(f"Spool is over {self.max_bytes} bytes: dropped segment {segment} with {lost} undelivered messages.")
+
+    def read(self, max_records: int):
+        """
+        Reads the oldest undrained records without removing them (see commit()).
+
+        Parameters:
+            max_records (int): Most records to return
+
+        Returns:
+            tuple: (content type, list of (routing key, body), position to pass to commit())
+        """
+        with self.lock:
+            self.write_file.flush()
+            self.last_flush = time.monotonic()
+            segment, offset, count = self.read_segment, self.read_offset, self.read_count
+            code = self.codes[segment]
+            records = []
+            while len(records) < max_records:
+                block, offset, damaged = self.read_block(segment, offset, max_records - len(records))
+                records.extend(block)
+                count += len(block)
+                if damaged:
+                    self.logger.error(f"Damaged record in spool segment {segment}; skipping the rest of the segment.")
+                    self.counts[segment] = count
+                    if segment == self.write_segment:
+                        self.rotate()
+                elif offset < self.sizes[segment] or segment == self.write_segment:
+                    break  # Either max_records was reached or everything written so far was read
+                following = self.segments[self.segments.index(segment) + 1]
+                if records and self.codes[following] != code:
+                    segment, offset, count = following, SEGMENT_HEADER.size, 0
+                    break  # A batch holds one content type
+                segment, offset, count = following, SEGMENT_HEADER.size, 0
+                code = self.codes[segment] if not records else code
+            return CONTENT_TYPES[code], records, (segment, offset, count)
+
+    def read_block(self, segment: int, offset: int, max_records: int):
+        """Read up to max_records complete records of one segment starting at offset."""
+        with open(self.path(segment), 'rb') as file:
+            file.seek(offset)
+            want = READ_BYTES
+            while True:
+                data = file.read(want)
+                records, end, damaged = parse_records(data, 0, max_records)
+                if records or damaged or len(data) < want:
+                    return records, offset + end, damaged
+                file.seek(offset)
+                want *= 2  # A single record larger than the block
+
+    def commit(self, position):
+        """
+        Marks everything before a position returned by read() as drained, deleting finished segments.
+
+        Parameters:
+            position (tuple): Position from read()
+        """
+        segment, offset, count = position
+        with self.lock:
+            if not self.segments or segment < self.segments[0]:
+                return  # The segment was dropped for space while the batch was being sent
+            before = self.pending
+            while self.segments[0] < segment:
+                finished = self.segments.pop(0)
+                del self.counts[finished], self.sizes[finished], self.codes[finished]
+                os.remove(self.path(finished))
+            self.read_segment, self.read_offset, self.read_count = segment, offset, count
+            self.stats['drained'] += before - self.pending
+            self.write_cursor()
+
+    def flush(self):
+        with self.lock:
+            self.write_file.flush()
+            self.last_flush = time.monotonic()
+
+    def close(self):
+        """Flush and sync the spool to disk and save the drain position."""
+        with self.lock:
+            self.write_file.flush()
+            os.fsync(self.write_file.fileno())
+            self.write_file.close()
+            self.write_cursor()
+        self.logger.info(f"Spool stats: {self.stats}, {self.pending} messages left in {self.directory}")
+
+
+class SpoolDrainer:
+    """
+    Background thread that republishes a spool once the broker is reachable.
+
+    The drainer uses its own connection (pika connections are not thread-safe) and a publisher
+    from publisher_factory(connection, channel, content_type), sends one batch at a time, and
+    only commits a batch after every message in it is confirmed.
+    """
+
+    def __init__(self, spool: Spool, url: str, publisher_factory, batch_size: int = DRAIN_BATCH,
+                 retry_interval: float = RETRY_INTERVAL, confirm_timeout: float = CONFIRM_TIMEOUT, logger=None):
+        """
+        Parameters:
+            spool (Spool): The spool to drain
+            url (str): Transport URL to connect to (see transport.connect)
+            publisher_factory: Callable(connection, channel, content_type) returning a BatchPublisher
+            batch_size (int): Messages per confirmed batch
+            retry_interval (float): Seconds between reconnect attempts
+            confirm_timeout (float): Seconds to wait for a batch to be confirmed
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.spool = spool
+        self.url = url
+        self.publisher_factory = publisher_factory
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.confirm_timeout = confirm_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.connection = None
+        self.publisher = None
+        self.content_type = None
+        self.stats = {'batches': 0, 'published': 0, 'failures': 0}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="spool-drainer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                if not self.spool.pending or not self.drain_batch():
+                    self.idle()
+            except PUBLISH_ERRORS as e:
+                self.stats['failures'] += 1
+                self.logger.warning(f"Spool drain paused ({e}); {self.spool.pending} messages waiting. "
+                                    f"Retrying in {self.retry_interval:g}s.")
+                self.disconnect()
+                self.stopped.wait(self.retry_interval)
+
+    def idle(self):
+        """Wait for new records, keeping an open connection serviced (heartbeats)."""
+        if self.connection is not None:
+            self.connection.process_data_events(time_limit=0)
+        self.spool.appended.wait(IDLE_WAIT)
+        self.spool.appended.clear()
+
+    def drain_batch(self) -> bool:
+        """
+        Publish and commit one batch.
+
+        Returns:
+            bool: True if the drain position moved
+        """
+        content_type, records, position = self.spool.read(self.batch_size)
+        if not records:
+            moved = position != (self.spool.read_segment, self.spool.read_offset, self.spool.read_count)
+            self.spool.commit(position)  # Step past finished or damaged segments
+            return moved
+        publisher = self.publisher_for(content_type)
+        for routing_key, body in records:
+            publisher.publish_encoded(routing_key, body)
+        if not publisher.wait_for_confirms(self.confirm_timeout):
+            raise ConnectionError(f"{len(records)} spooled messages were not confirmed within {self.confirm_timeout:g}s")
+        self.spool.commit(position)
+        self.stats['batches'] += 1
+        self.stats['published'] += len(records)
+        if not self.spool.pending:
+            self.logger.info(f"Spool drained ({self.stats['published']} messages republished so far).")
+        return True
+
+    def publisher_for(self, content_type: str):
+        """Connect if needed and return a publisher for the content type."""
+        if self.connection is None or not self.connection.is_open:
+            self.disconnect()
+            self.connection = connect(self.url)
+            self.logger.info(f"Spool drainer connected; draining {self.spool.pending} messages.")
+        if self.publisher is None or self.content_type != content_type:
+            if self.publisher is not None:
+                self.publisher.close()
+            self.publisher = self.publisher_factory(self.connection, self.connection.channel(), content_type)
+            self.content_type = content_type
+        return self.publisher
+
+    def disconnect(self):
+        """Drop the connection; anything unconfirmed is still in the spool and will be sent again."""
+        self.publisher = None
+        if self.connection is not None and self.connection.is_open:
+            try:
+                self.connection.close()
+            except PUBLISH_ERRORS:
+                pass
+        self.connection = None
+
+    def stop(self, timeout: float = None):
+        """Stop the drainer thread and close its connection."""
+        self.stopped.set()
+        self.spool.appended.set()
+        self.thread.join(timeout)
+        self.disconnect()
+        self.logger.info(f"Spool drainer stats: {self.stats}")
+
+
+class FailoverPublisher:
+    """
+    Publishes through a BatchPublisher while the broker is reachable and to a spool while it is not.
+
+    Once anything is spooled, new messages also go to the spool until the drainer has emptied it,
+    so no queue receives a new bid before an older spooled one. When the connection drops,
+    unconfirmed messages are moved to the spool ahead of the new ones.
+    """
+
+    def __init__(self, url: str, publisher_factory, spool: Spool, content_type: str = JSON_CONTENT_TYPE,
+                 reconnect_interval: float = RETRY_INTERVAL, drain_batch: int = DRAIN_BATCH, on_connect=None,
+                 logger=None):
+        """
+        Parameters:
+            url (str): Transport URL to connect to (see transport.connect)
+            publisher_factory: Callable(connection, channel, content_type) returning a BatchPublisher
+            spool (Spool): Spool for messages that cannot be published
+            content_type (str): Wire format for message bodies (see bid_codec)
+            reconnect_interval (float): Seconds between reconnect attempts
+            drain_batch (int): Messages per confirmed drain batch
+            on_connect: Optional callable(connection) run after every successful connect
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.url = url
+        self.publisher_factory = publisher_factory
+        self.spool = spool
+        self.content_type = content_type
+        self.reconnect_interval = reconnect_interval
+        self.on_connect = on_connect
+        self.logger = logger or logging.getLogger(__name__)
+        self.connection = None
+        self.publisher = None
+        self.next_connect = 0.0
+        self.stats = {'published': 0, 'spooled': 0, 'failovers': 0}
+        self.drainer = SpoolDrainer(spool, url, publisher_factory, batch_size=drain_batch,
+                                    retry_interval=reconnect_interval, logger=self.logger)
+        self.reconnect()
+
+    @property
+    def connected(self) -> bool:
+        return self.publisher is not None
+
+    def reconnect(self) -> bool:
+        """Try to connect, at most once per reconnect_interval."""
+        now = time.monotonic()
+        if now < self.next_connect:
+            return False
+        self.next_connect = now + self.reconnect_interval
+        try:
+            connection = connect(self.url)
+            publisher = self.publisher_factory(connection, connection.channel(), self.content_type)
+        except PUBLISH_ERRORS as e:
+            self.logger.warning(f"Broker unavailable ({e}). Spooling bids to {self.spool.directory}.")
+            return False
+        self.connection, self.publisher = connection, publisher
+        self.logger.info("Connected to the broker.")
+        if self.on_connect is not None:
+            self.on_connect(connection)
+        return True
+
+    def publish(self, routing_key: str, message: dict):
+        """
+        Publishes a message, or spools it while the broker is unreachable or the spool is draining.
+
+        Parameters:
+            routing_key (str): Queue name or routing key
+            message (dict): The bid
+        """
+        body = encode_bid(message, self.content_type)
+        if self.publisher is None:
+            self.reconnect()
+        if self.publisher is not None and not self.spool.pending:
+            try:
+                self.publisher.publish_encoded(routing_key, body)
+                self.stats['published'] += 1
+                return
+            except PUBLISH_ERRORS as e:
+                self.fail(e)
+        self.spool.append(routing_key, body)
+        self.stats['spooled'] += 1
+
+    def fail(self, error):
+        """Move unconfirmed messages to the spool and drop the broken connection."""
+        self.stats['failovers'] += 1
+        unconfirmed = self.publisher.take_unconfirmed() if self.publisher is not None else []
+        for routing_key, body in unconfirmed:
+            self.spool.append(routing_key, body)
+        self.logger.warning(f"Lost the broker connection ({error}). Spooled {len(unconfirmed)} unconfirmed bids; "
+                            f"new bids go to {self.spool.directory} until it is drained.")
+        self.publisher = None
+        if self.connection is not None and self.connection.is_open:
+            try:
+                self.connection.close()
+            except PUBLISH_ERRORS:
+                pass
+        self.connection = None
+        self.next_connect = time.monotonic() + self.reconnect_interval
+
+    def poll(self):
+        """Service the publisher (confirms and timed flushes), or try to reconnect."""
+        if self.publisher is None:
+            self.reconnect()
+            return
+        try:
+            self.publisher.poll()
+        except PUBLISH_ERRORS as e:
+            self.fail(e)
+
+    def sleep(self, seconds: float):
+        """Wait, servicing the connection (heartbeats and confirms) while there is one."""
+        if self.connection is not None:
+            try:
+                self.connection.sleep(seconds)
+                return
+            except PUBLISH_ERRORS as e:
+                self.fail(e)
+        self.drainer.stopped.wait(seconds)  # No connection to service
+
+    def close(self, timeout: float = CONFIRM_TIMEOUT):
+        """
+        Waits for outstanding confirms (spooling what is left), gives the drainer up to timeout
+        seconds to empty the spool, then stops it; anything still spooled is sent on the next run.
+
+        Parameters:
+            timeout (float): Seconds to wait for confirms and again for the drain
+        """
+        if self.publisher is not None:
+            try:
+                if not self.publisher.wait_for_confirms(timeout):
+                    raise ConnectionError("publisher confirms timed out")
+            except PUBLISH_ERRORS as e:
+                self.fail(e)
+        deadline = time.monotonic() + timeout
+        while self.spool.pending and self.connection is not None and time.monotonic() < deadline:
+            self.sleep(0.05)  # The broker is reachable, so give the drainer time to finish
+        self.drainer.stop()
+        self.spool.close()
+        if self.connection is not None and self.connection.is_open:
+            self.connection.close()
+        self.logger.info(f"Failover publisher stats: {self.stats}")
@@ -0,0 +1,560 @@
+"""
+Real-Time Auction Tracker: Pluggable Message Transport
+This module lets producers and consumers open a connection by URL instead of hard-coding
+pika.BlockingConnection. "pika://host" uses RabbitMQ through pika; "memory://name" uses an
+in-process broker stand-in with durable-ish queues, direct/topic/fanout exchanges, acks/nacks,
+prefetch and redelivery, so the full producer -> consumer -> alert path can be exercised and
+benchmarked without RabbitMQ.
+
+The in-memory connection and channel mirror the subset of pika's BlockingConnection and
+BlockingChannel API that the scripts in this project use.
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+try:
+    import pika
+except ImportError:  # pika is only required for the RabbitMQ backend
+    pika = None
+
+DEFAULT_URL = 'pika://localhost'
+
+# Most deliveries handed to one channel in a single process_data_events call
+DISPATCH_BATCH = 1000
+
+
+def connection_errors() -> tuple:
+    """Exception types raised when a transport cannot connect."""
+    errors = (ConnectionError,)
+    if pika is not None:
+        errors += (pika.exceptions.AMQPConnectionError,)
+    return errors
+
+
+# Catch these around connect() instead of pika.exceptions.AMQPConnectionError
+CONNECTION_ERRORS = connection_errors()
+
+
+def channel_errors() -> tuple:
+    """Exception types raised when the broker refuses a channel operation (e.g. a passive declare of a missing queue)."""
+    errors = (ValueError,)
+    if pika is not None:
+        errors += (pika.exceptions.ChannelClosedByBroker,)
+    return errors
+
+
+# Catch these around passive declares; the pika channel is closed afterwards and must be reopened
+CHANNEL_ERRORS = channel_errors()
+
+
+def publish_errors() -> tuple:
+    """Exception types raised by publishing or processing events on a connection or channel that has gone away."""
+    errors = (ConnectionError,)
+    if pika is not None:
+        errors += (pika.exceptions.AMQPConnectionError, pika.exceptions.AMQPChannelError)
+    return errors
+
+
+# Catch these around publish/process_data_events to fall back (e.g. to the spool) when the broker goes away
+PUBLISH_ERRORS = publish_errors()
+
+
+def connect(url: str = DEFAULT_URL):
+    """
+    Opens a connection for the given transport URL.
+
+    Parameters:
+        url (str): "pika://host[:port]" for RabbitMQ or "memory://[broker name]" for the in-process broker
+
+    Returns:
+        A pika.BlockingConnection or a MemoryConnection
+    """
+    scheme, _, location = url.partition('://')
+    if scheme == 'pika':
+        if pika is None:
+            raise ConnectionError("The pika transport needs the pika package installed.")
+        host, _, port = location.partition(':')
+        parameters = pika.ConnectionParameters(host or 'localhost', int(port) if port else 5672)
+        return pika.BlockingConnection(parameters)
+    if scheme == 'memory':
+        broker = get_broker(location or 'default')
+        if not broker.available:
+            raise ConnectionError(f"In-memory broker '{location or 'default'}' is unavailable.")
+        return MemoryConnection(broker)
+    raise ValueError(f"Unknown transport URL: {url}")
+
+
+def make_properties(**kwargs):
+    """Build message properties (pika.BasicProperties when pika is available)."""
+    if pika is not None:
+        return pika.BasicProperties(**kwargs)
+    return MemoryProperties(**kwargs)
+
+
+def enable_async_confirms(channel, callback):
+    """
+    Puts a channel into publisher-confirm mode without making each publish wait for its confirm.
+
+    Confirms are passed to callback(frame) while the connection processes data events; each frame
+    has frame.method.NAME ('Basic.Ack' or 'Basic.Nack'), delivery_tag and multiple.
+
+    Parameters:
+        channel: A pika BlockingChannel or a MemoryChannel
+        callback: Called with each confirm frame
+    """
+    if isinstance(channel, MemoryChannel):
+        channel.enable_async_confirms(callback)
+    else:
+        # Confirm mode on the underlying channel; BlockingChannel.confirm_delivery would
+        # instead block every basic_publish until its confirm arrives
+        channel._impl.confirm_delivery(ack_nack_callback=callback)
+
+
+class MemoryProperties:
+    """Message properties for the in-memory broker when pika is not installed."""
+
+    def __init__(self, content_type=None, delivery_mode=None, headers=None, message_id=None, timestamp=None, **kwargs):
+        self.content_type = content_type
+        self.delivery_mode = delivery_mode
+        self.headers = headers
+        self.message_id = message_id
+        self.timestamp = timestamp
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+# In-memory broker
+
+_BROKERS = {}
+_BROKERS_LOCK = threading.Lock()
+
+
+def get_broker(name: str = 'default'):
+    """Return the named in-process broker, creating it on first use."""
+    with _BROKERS_LOCK:
+        broker = _BROKERS.get(name)
+        if broker is None:
+            broker = _BROKERS[name] = MemoryBroker()
+        return broker
+
+
+def topic_matches(pattern: str, routing_key: str) -> bool:
+    """AMQP topic matching: '*' matches one dot-separated word, '#' matches zero or more."""
+    return words_match(pattern.split('.'), routing_key.split('.'))
+
+
+def words_match(pattern: list, words: list) -> bool:
+    if not pattern:
+        return not words
+    head = pattern[0]
+    if head == '#':
+        return any(words_match(pattern[1:], words[skip:]) for skip in range(len(words) + 1))
+    if not words:
+        return False
+    return (head == '*' or head == words[0]) and words_match(pattern[1:], words[1:])
+
+
+class MemoryExchange:
+    """An exchange in the in-memory broker, with its bindings and a routing-key lookup cache."""
+
+    def __init__(self, name: str, exchange_type: str):
+        if exchange_type not in ('direct', 'topic', 'fanout'):
+            raise ValueError(f"The in-memory broker does not support {exchange_type} exchanges.")
+        self.name = name
+        self.exchange_type = exchange_type
+        self.bindings = []  # (binding key, queue name)
+        self.routes = {}  # routing key -> queue names (cleared when bindings change)
+
+    def route(self, routing_key: str) -> list:
+        queue_names = self.routes.get(routing_key)
+        if queue_names is None:
+            if self.exchange_type == 'fanout':
+                matches = self.bindings
+            elif self.exchange_type == 'direct':
+                matches = [binding for binding in self.bindings if binding[0] == routing_key]
+            else:
+                matches = [binding for binding in self.bindings if topic_matches(binding[0], routing_key)]
+            queue_names = self.routes[routing_key] = list(dict.fromkeys(queue_name for _, queue_name in matches))
+        return queue_names
+
+
+class MemoryQueue:
+    """A queue in the in-memory broker."""
+
+    def __init__(self, name: str, durable: bool):
+        self.name = name
+        self.durable = durable
+        self.messages = deque()  # (body, properties, routing key, redelivered)
+        self.consumer_count = 0
+
+
+class MemoryBroker:
+    """
+    Shared state of the in-process broker: the queues and a condition used to wake consumers.
+
+    Queues live as long as the broker (the life of the process), so they survive connections
+    closing and reopening; unacknowledged messages are requeued and marked redelivered when the
+    channel holding them closes.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.queues = {}
+        self.exchanges = {}
+        self.blocked_reason = None  # Set to simulate a resource alarm (Connection.Blocked)
+        self.available = True  # Cleared to simulate an outage (connects and publishes fail)
+
+    def set_blocked(self, reason: str = None):
+        """Raise (with a reason) or clear (with None) a simulated resource alarm on every connection."""
+        with self.condition:
+            self.blocked_reason = reason
+            self.condition.notify_all()
+
+    def set_available(self, available: bool):
+        """Simulate the broker going down (open connections fail on their next operation) or coming back."""
+        with self.condition:
+            self.available = available
+            self.condition.notify_all()
+
+    def declare(self, name: str, durable: bool, passive: bool) -> MemoryQueue:
+        with self.condition:
+            queue = self.queues.get(name)
+            if queue is None:
+                if passive:
+                    raise ValueError(f"NOT_FOUND - no queue '{name}'")
+                queue = self.queues[name] = MemoryQueue(name, durable)
+            return queue
+
+    def declare_exchange(self, name: str, exchange_type: str, passive: bool) -> MemoryExchange:
+        with self.condition:
+            exchange = self.exchanges.get(name)
+            if exchange is None:
+                if passive:
+                    raise ValueError(f"NOT_FOUND - no exchange '{name}'")
+                exchange = self.exchanges[name] = MemoryExchange(name, exchange_type)
+            elif exchange.exchange_type != exchange_type and not passive:
+                raise ValueError(f"PRECONDITION_FAILED - exchange '{name}' is a {exchange.exchange_type} exchange")
+            return exchange
+
+    def bind(self, queue_name: str, exchange_name: str, routing_key: str, unbind: bool = False):
+        with self.condition:
+            exchange = self.exchanges.get(exchange_name)
+            if exchange is None:
+                raise ValueError(f"NOT_FOUND - no exchange '{exchange_name}'")
+            if queue_name not in self.queues:
+                raise ValueError(f"NOT_FOUND - no queue '{queue_name}'")
+            binding = (routing_key, queue_name)
+            if unbind:
+                if binding in exchange.bindings:
+                    exchange.bindings.remove(binding)
+            elif binding not in exchange.bindings:
+                exchange.bindings.append(binding)
+            exchange.routes.clear()
+
+    def publish(self, routing_key: str, body: bytes, properties, exchange_name: str = '') -> bool:
+        with self.condition:
+            if exchange_name:
+                exchange = self.exchanges.get(exchange_name)
+                if exchange is None:
+                    raise ValueError(f"NOT_FOUND - no exchange '{exchange_name}'")
+                queues = [self.queues[queue_name] for queue_name in exchange.route(routing_key)]
+            else:
+                queue = self.queues.get(routing_key)
+                queues = [queue] if queue is not None else []
+            if not queues:
+                return False  # Unroutable messages are dropped
+            for queue in queues:
+                queue.messages.append((body, properties, routing_key, False))
+            self.condition.notify_all()
+            return True
+
+    def requeue(self, queue_name: str, entries: list):
+        """Put unacked messages back at the front of their queue, oldest first, marked redelivered."""
+        with self.condition:
+            queue = self.queues.get(queue_name)
+            if queue is None:
+                return
+            for body, properties, routing_key in reversed(entries):
+                queue.messages.appendleft((body, properties, routing_key, True))
+            self.condition.notify_all()
+
+
+class MemoryConnection:
+    """In-process stand-in for pika.BlockingConnection."""
+
+    def __init__(self, broker: MemoryBroker):
+        self.broker = broker
+        self.channels = []
+        self.is_open = True
+        self.blocked = False
+        self.blocked_callbacks = []
+        self.unblocked_callbacks = []
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.is_open
+
+    def channel(self):
+        channel = MemoryChannel(self, len(self.channels) + 1)
+        self.channels.append(channel)
+        return channel
+
+    def process_data_events(self, time_limit=0):
+        """
+        Deliver queued messages and confirms to this connection's channels.
+
+        Parameters:
+            time_limit (float): 0 to process what is ready and return, a number of seconds to wait
+                for work, or None to wait until there is work
+        """
+        self.check_available()
+        if self.dispatch():
+            return
+        if time_limit == 0:
+            return
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        with self.broker.condition:
+            while not self.has_work():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.broker.condition.wait(remaining)
+        self.dispatch()
+
+    def sleep(self, duration: float):
+        """Wait for duration seconds while still processing data events."""
+        deadline = time.monotonic() + duration
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.process_data_events(time_limit=remaining)
+
+    def check_available(self):
+        """Close the connection and raise ConnectionError if the broker is down (a lost connection)."""
+        if not self.broker.available:
+            if self.is_open:
+                self.close()
+            raise ConnectionError("Connection to the in-memory broker was lost.")
+
+    def add_on_connection_blocked_callback(self, callback):
+        """Call callback(connection, frame) when the broker raises a resource alarm."""
+        self.blocked_callbacks.append(callback)
+
+    def add_on_connection_unblocked_callback(self, callback):
+        """Call callback(connection, frame) when the broker clears its resource alarm."""
+        self.unblocked_callbacks.append(callback)
+
+    def has_work(self) -> bool:
+        if (self.broker.blocked_reason is not None) != self.blocked:
+            return True
+        return any(channel.has_work() for channel in self.channels if channel.is_open)
+
+    def dispatch(self) -> int:
+        return self.dispatch_blocked() + sum(channel.dispatch() for channel in list(self.channels) if channel.is_open)
+
+    def dispatch_blocked(self) -> int:
+        """Deliver a Connection.Blocked or Connection.Unblocked notification if the alarm state changed."""
+        reason = self.broker.blocked_reason
+        if (reason is not None) == self.blocked:
+            return 0
+        self.blocked = reason is not None
+        if self.blocked:
+            frame = SimpleNamespace(method=SimpleNamespace(NAME='Connection.Blocked', reason=reason))
+            callbacks = self.blocked_callbacks
+        else:
+            frame = SimpleNamespace(method=SimpleNamespace(NAME='Connection.Unblocked'))
+            callbacks = self.unblocked_callbacks
+        for callback in callbacks:
+            callback(self, frame)
+        return 1
+
+    def close(self):
+        for channel in list(self.channels):
+            if channel.is_open:
+                channel.close()
+        self.is_open = False
+
+
+class MemoryChannel:
+    """In-process stand-in for pika's BlockingChannel."""
+
+    def __init__(self, connection: MemoryConnection, channel_number: int):
+        self.connection = connection
+        self.broker = connection.broker
+        self.channel_number = channel_number
+        self.is_open = True
+        self.prefetch_count = 0
+        self.consumers = {}  # consumer tag -> (queue name, callback, auto ack)
+        self.consumer_order = []
+        self.unacked = {}  # delivery tag -> (queue name, body, properties, routing key)
+        self.delivery_tags = itertools.count(1)
+        self.consuming = False
+
+        self.confirm_callback = None
+        self.publish_seq = 0
+        self.confirmed_seq = 0
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.is_open
+
+    def queue_declare(self, queue: str, durable: bool = False, passive: bool = False, **kwargs):
+        declared = self.broker.declare(queue, durable, passive)
+        with self.broker.condition:
+            method = SimpleNamespace(NAME='Queue.DeclareOk', queue=queue, message_count=len(declared.messages),
+                                     consumer_count=declared.consumer_count)
+        return SimpleNamespace(method=method)
+
+    def exchange_declare(self, exchange: str, exchange_type: str = 'direct', passive: bool = False,
+                         durable: bool = False, **kwargs):
+        self.broker.declare_exchange(exchange, exchange_type, passive)
+        return SimpleNamespace(method=SimpleNamespace(NAME='Exchange.DeclareOk'))
+
+    def queue_bind(self, queue: str, exchange: str, routing_key: str = None, arguments=None):
+        self.broker.bind(queue, exchange, queue if routing_key is None else routing_key)
+        return SimpleNamespace(method=SimpleNamespace(NAME='Queue.BindOk'))
+
+    def queue_unbind(self, queue: str, exchange: str = None, routing_key: str = None, arguments=None):
+        self.broker.bind(queue, exchange, queue if routing_key is None else routing_key, unbind=True)
+        return SimpleNamespace(method=SimpleNamespace(NAME='Queue.UnbindOk'))
+
+    def basic_qos(self, prefetch_count: int = 0, **kwargs):
+        self.prefetch_count = prefetch_count
+
+    def basic_publish(self, exchange: str, routing_key: str, body, properties=None, mandatory: bool = False):
+        if isinstance(body, str):
+            body = body.encode()
+        self.connection.check_available()
+        self.broker.publish(routing_key, body, properties, exchange)
+        self.publish_seq += 1
+
+    def enable_async_confirms(self, callback):
+        self.confirm_callback = callback
+        self.publish_seq = self.confirmed_seq = 0
+
+    def basic_consume(self, queue: str, on_message_callback, auto_ack: bool = False, consumer_tag: str = None, **kwargs):
+        declared = self.broker.declare(queue, durable=False, passive=True)
+        tag = consumer_tag or f"ctag{self.channel_number}.{len(self.consumer_order) + 1}"
+        self.consumers[tag] = (queue, on_message_callback, auto_ack)
+        self.consumer_order.append(tag)
+        with self.broker.condition:
+            declared.consumer_count += 1
+        return tag
+
+    def basic_cancel(self, consumer_tag: str):
+        if consumer_tag in self.consumers:
+            queue_name = self.consumers.pop(consumer_tag)[0]
+            self.consumer_order.remove(consumer_tag)
+            with self.broker.condition:
+                queue = self.broker.queues.get(queue_name)
+                if queue is not None:
+                    queue.consumer_count -= 1
+
+    def settle(self, delivery_tag: int, multiple: bool) -> list:
+        """Remove and return unacked deliveries covered by an ack/nack."""
+        if multiple:
+            tags = [tag for tag in self.unacked if tag <= delivery_tag] if delivery_tag else list(self.unacked)
+        elif delivery_tag in self.unacked:
+            tags = [delivery_tag]
+        else:
+            raise ValueError(f"PRECONDITION_FAILED - unknown delivery tag {delivery_tag}")
+        return [self.unacked.pop(tag) for tag in tags]
+
+    def basic_ack(self, delivery_tag: int = 0, multiple: bool = False):
+        self.settle(delivery_tag, multiple)
+        self.wake()
+
+    def basic_nack(self, delivery_tag: int = 0, multiple: bool = False, requeue: bool = True):
+        settled = self.settle(delivery_tag, multiple)
+        if requeue:
+            self.requeue(settled)
+        self.wake()
+
+    def basic_reject(self, delivery_tag: int, requeue: bool = True):
+        self.basic_nack(delivery_tag, multiple=False, requeue=requeue)
+
+    def requeue(self, entries: list):
+        by_queue = {}
+        for queue_name, body, properties, routing_key in entries:
+            by_queue.setdefault(queue_name, []).append((body, properties, routing_key))
+        for queue_name, queue_entries in by_queue.items():
+            self.broker.requeue(queue_name, queue_entries)
+
+    def wake(self):
+        """Freed prefetch capacity may let other waiting consumers make progress."""
+        with self.broker.condition:
+            self.broker.condition.notify_all()
+
+    def capacity(self) -> int:
+        if not self.prefetch_count:
+            return DISPATCH_BATCH
+        return max(0, self.prefetch_count - len(self.unacked))
+
+    def has_work(self) -> bool:
+        """Called with the broker condition held."""
+        if self.confirm_callback is not None and self.publish_seq > self.confirmed_seq:
+            return True
+        if not self.consumers or self.capacity() == 0:
+            return False
+        return any(self.broker.queues[queue_name].messages for queue_name, _, _ in self.consumers.values())
+
+    def dispatch(self) -> int:
+        """Deliver pending confirms and as many messages as prefetch allows; returns events handled."""
+        events = 0
+        if self.confirm_callback is not None and self.publish_seq > self.confirmed_seq:
+            self.confirmed_seq = self.publish_seq
+            method = SimpleNamespace(NAME='Basic.Ack', delivery_tag=self.confirmed_seq, multiple=True)
+            self.confirm_callback(SimpleNamespace(method=method))
+            events += 1
+
+        deliveries = []
+        with self.broker.condition:
+            budget = min(self.capacity(), DISPATCH_BATCH)
+            while budget > 0:
+                progressed = False
+                for tag in self.consumer_order:  # Round-robin across this channel's consumers
+                    queue_name, callback, auto_ack = self.consumers[tag]
+                    queue = self.broker.queues[queue_name]
+                    if not queue.messages or budget == 0:
+                        continue
+                    body, properties, routing_key, redelivered = queue.messages.popleft()
+                    delivery_tag = next(self.delivery_tags)
+                    if not auto_ack:
+                        self.unacked[delivery_tag] = (queue_name, body, properties, routing_key)
+                    method = SimpleNamespace(NAME='Basic.Deliver', consumer_tag=tag, delivery_tag=delivery_tag,
+                                             redelivered=redelivered, exchange='', routing_key=routing_key)
+                    deliveries.append((callback, method, properties, body))
+                    budget -= 1
+                    progressed = True
+                if not progressed:
+                    break
+
+        for callback, method, properties, body in deliveries:
+            callback(self, method, properties or MemoryProperties(), body)
+        return events + len(deliveries)
+
+    def start_consuming(self):
+        """Deliver messages to consumers until stop_consuming() is called or all are cancelled."""
+        self.consuming = True
+        while self.consuming and self.consumers and self.is_open:
+            self.connection.process_data_events(time_limit=1.0)
+
+    def stop_consuming(self):
+        self.consuming = False
+        for tag in list(self.consumers):
+            self.basic_cancel(tag)
+
+    def close(self):
+        """Close the channel, requeueing any unacknowledged deliveries for redelivery."""
+        if not self.is_open:
+            return
+        for tag in list(self.consumers):
+            self.basic_cancel(tag)
+        self.requeue(list(self.unacked.values()))
+        self.unacked.clear()
+        self.is_open = False
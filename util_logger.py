@@ -30,6 +30,18 @@ In your code file, instead of print(), use logger.info().
 
 Levels include: debug, info, warning, error, and critical.
 
+HIGH-THROUGHPUT MODE:
+- For per-message logging on a hot path, pass asynchronous=True so records
+  are written to the file and console by a background QueueListener thread.
+- Use lazy %-style arguments so formatting also happens off the hot path:
+
+  logger.info("Received %s message: %s", item_type, bid_amount, extra=SAMPLED)
+
+- With sample_every=N, records logged with extra=SAMPLED are kept 1 in N
+  (per message template) and a summary line reports how many were skipped.
+  Warnings and errors are never sampled.
+- Call shutdown_logger(logger) (or let the program exit) to flush.
+
 @Author: Denise Case
 @Updated: 2021-08
 
@@ -38,8 +50,13 @@ Levels include: debug, info, warning, error, and critical.
 
 # Import some helpful modules from the Python Standard Library
 
+import atexit
 import logging
+import logging.handlers
 import pathlib
+import queue
+import threading
+import time
 import platform
 import sys
 import os
@@ -49,13 +66,95 @@ import datetime
 
 DIVIDER = "=" * 50  # A string divider for cleaner output formatting
 
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotate the log file when it reaches this size
+LOG_BACKUP_COUNT = 5  # Number of rotated log files to keep
+SUMMARY_INTERVAL = 60.0  # Seconds between sampling summary lines
+
+SAMPLED = {"sampled": True}  # Pass as extra= to mark a per-message record as sampleable
+
+QUEUE_LISTENERS = {}  # logger name -> QueueListener for asynchronous loggers
+
 # Define program functions (reusable bits of code)
 
 
-def setup_logger(current_file):
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+    The stock QueueHandler formats each record before queueing it (so it can
+    be pickled); an in-process queue does not need that.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps 1 in every_n records marked with extra=SAMPLED, counted per message
+    template, and logs a summary of what was skipped every summary_interval.
+    """
+
+    def __init__(self, logger, every_n, summary_interval=SUMMARY_INTERVAL):
+        super().__init__()
+        self.logger = logger
+        self.every_n = every_n
+        self.summary_interval = summary_interval
+        self.counts = {}  # message template -> [seen, logged] this interval
+        self.lock = threading.Lock()
+        self.next_summary = time.monotonic() + summary_interval
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False) or record.levelno > logging.INFO:
+            return True
+        with self.lock:
+            counts = self.counts.get(record.msg)
+            if counts is None:
+                counts = self.counts[record.msg] = [0, 0]
+            keep = counts[0] % self.every_n == 0
+            counts[0] += 1
+            if keep:
+                counts[1] += 1
+            due = time.monotonic() >= self.next_summary
+        if due:
+            self.log_summary()
+        return keep
+
+    def log_summary(self):
+        """Log one line per sampled message template and start a new interval."""
+        with self.lock:
+            counts, self.counts = self.counts, {}
+            self.next_summary = time.monotonic() + self.summary_interval
+        for template, (seen, logged) in counts.items():
+            self.logger.info(
+                "Sampled 1 in %d: logged %d of %d %r records", self.every_n, logged, seen, template
+            )
+
+
+def shutdown_logger(logger):
+    """
+    Flush sampling summaries and stop the background writer of a logger.
+    @param logger: a logger returned by setup_logger.
+    """
+    for log_filter in logger.filters:
+        if isinstance(log_filter, SamplingFilter):
+            log_filter.log_summary()
+    listener = QUEUE_LISTENERS.pop(logger.name, None)
+    if listener is not None:
+        listener.stop()  # Writes out everything already queued
+        # Anything logged after this point is written directly
+        for handler in list(logger.handlers):
+            if isinstance(handler, DeferredQueueHandler):
+                logger.removeHandler(handler)
+        for handler in listener.handlers:
+            logger.addHandler(handler)
+
+
+def setup_logger(current_file, asynchronous=False, sample_every=1):
     """
     Setup a logger to automatically record useful information.
     @param current_file: the name of the file requesting a logger.
+    @param asynchronous: write records from a background thread instead of the caller.
+    @param sample_every: keep 1 in this many records logged with extra=SAMPLED.
     @returns: the logger object and the name of the logfile.
     """
     logs_dir = pathlib.Path("logs")
@@ -67,8 +166,13 @@ def setup_logger(current_file):
     logger = logging.getLogger(module_name)
     logger.setLevel(logging.DEBUG)  # Set the root logger level.
 
-    # Create file handler to write logging messages to a file
-    file_handler = logging.FileHandler(log_file_name, "w")
+    # Create file handler to write logging messages to a file.
+    # Each run starts a fresh file; the previous run is kept as <name>.log.1
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file_name, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+    )
+    if log_file_name.exists() and log_file_name.stat().st_size > 0:
+        file_handler.doRollover()
     file_handler.setLevel(logging.DEBUG)
 
     # Create console handler to write logging messages to the console
@@ -80,9 +184,22 @@ def setup_logger(current_file):
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
 
-    # Add the handlers to the logger.
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Add the handlers to the logger (or to a background listener).
+    if asynchronous:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        listener.start()
+        QUEUE_LISTENERS[module_name] = listener
+        logger.addHandler(DeferredQueueHandler(log_queue))
+        atexit.register(shutdown_logger, logger)
+    else:
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+
+    if sample_every > 1:
+        logger.addFilter(SamplingFilter(logger, sample_every))
 
     python_version_string = platform.python_version()
     today = datetime.date.today()
@@ -0,0 +1,241 @@
+"""
+Real-Time Auction Tracker: Window Checkpoints
+This module saves the consumers' rolling windows to a compact binary snapshot file and restores
+them on startup, so statistics and alerts are warm again right after a restart. The snapshot is
+captured on the consumer thread (a copy of each window's columns) and written to disk by a
+background thread, so a checkpoint never waits on the disk.
+"""
+
+import logging
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from array import array
+
+# File header: magic, format version, creation time (epoch microseconds), window count
+MAGIC = b'AWCK'
+VERSION = 1
+HEADER = struct.Struct('<4sHqH')
+
+# Per-window header: item type length (the UTF-8 item type follows), then the bid count
+NAME_LENGTH = struct.Struct('<H')
+BID_COUNT = struct.Struct('<I')
+
+# Seconds between checkpoints
+CHECKPOINT_INTERVAL = 5.0
+
+
+class CheckpointError(ValueError):
+    """Raised when a checkpoint file is truncated or not in the expected format."""
+
+
+def column_bytes(column: array) -> bytes:
+    """Little-endian bytes of a typed array column."""
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def encode_window(item_type: str, window) -> bytes:
+    """
+    Serializes one RollingStats window: its bids, oldest first, column by column.
+
+    Parameters:
+        item_type (str): Item type the window belongs to
+        window (RollingStats): The window to serialize
+
+    Returns:
+        bytes: The encoded window
+    """
+    amounts = array('d')
+    timestamps = array('q')
+    bidders = bytearray()
+    for amount_view, timestamp_view, bidder_view in window.window.views():
+        amounts.frombytes(amount_view.tobytes())
+        timestamps.frombytes(timestamp_view.tobytes())
+        bidders += bidder_view
+    name = item_type.encode('utf-8')
+    return b''.join((NAME_LENGTH.pack(len(name)), name, BID_COUNT.pack(len(amounts)),
+                     column_bytes(amounts), column_bytes(timestamps), bytes(bidders)))
+
+
+def decode_windows(data: bytes) -> tuple:
+    """
+    Parses a checkpoint file.
+
+    Parameters:
+        data (bytes): Contents of a checkpoint file
+
+    Returns:
+        tuple: (created_us, {item_type: (amounts array, timestamps array, bidders bytes)})
+    """
+    if len(data) < HEADER.size:
+        raise CheckpointError("Checkpoint is truncated.")
+    magic, version, created_us, window_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise CheckpointError(f"Not a version {VERSION} window checkpoint.")
+    offset = HEADER.size
+    windows = {}
+    try:
+        for _ in range(window_count):
+            (name_length,) = NAME_LENGTH.unpack_from(data, offset)
+            offset += NAME_LENGTH.size
+            item_type = data[offset:offset + name_length].decode('utf-8')
+            offset += name_length
+            (count,) = BID_COUNT.unpack_from(data, offset)
+            offset += BID_COUNT.size
+            amounts = array('d', data[offset:offset + 8 * count])
+            offset += 8 * count
+            timestamps = array('q', data[offset:offset + 8 * count])
+            offset += 8 * count
+            bidders = data[offset:offset + 16 * count]
+            offset += 16 * count
+            if len(bidders) != 16 * count:
+                raise CheckpointError("Checkpoint is truncated.")
+            if sys.byteorder == 'big':
+                amounts.byteswap()
+                timestamps.byteswap()
+            windows[item_type] = (amounts, timestamps, bidders)
+    except (struct.error, ValueError) as e:
+        raise CheckpointError(f"Checkpoint is truncated or corrupt: {e}") from e
+    return created_us, windows
+
+
+class WindowCheckpointer:
+    """
+    Periodic checkpoints of a set of RollingStats windows to one snapshot file.
+
+    Each checkpoint re-encodes only the windows that changed since the previous one and hands
+    the bytes to a writer thread, which writes a temporary file and renames it over the old
+    snapshot so a crash mid-write never leaves a partial checkpoint. If the writer falls behind,
+    a newer snapshot replaces the one still waiting to be written.
+    """
+
+    def __init__(self, path: str, windows: dict, interval: float = CHECKPOINT_INTERVAL, logger=None):
+        """
+        Parameters:
+            path (str): Snapshot file to write and restore from
+            windows (dict): item type -> RollingStats (e.g. BidPipeline.windows)
+            interval (float): Minimum seconds between checkpoints
+            logger: Logger to report on (defaults to this module's logger)
+        """
+        self.path = path
+        self.windows = windows
+        self.interval = interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.encoded = {}  # item type -> (sequence number when encoded, encoded bytes)
+        self.next_checkpoint = time.monotonic() + interval
+        self.pending = queue.Queue(maxsize=1)
+        self.stats = {'checkpoints': 0, 'skipped': 0, 'written': 0, 'bytes': 0, 'failures': 0}
+        self.writer = threading.Thread(target=self.run_writer, name="window-checkpointer", daemon=True)
+        self.writer.start()
+
+    def restore(self) -> int:
+        """
+        Loads the snapshot file (if any) into the windows.
+
+        The saved bids are appended in order, so windows configured smaller than when the
+        checkpoint was taken keep only their newest bids, and bids older than a time-based
+        window's max_age are dropped.
+
+        Returns:
+            int: Number of bids restored
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            self.logger.info(f"No window checkpoint at {self.path}. Starting with empty windows.")
+            return 0
+        started = time.perf_counter()
+        try:
+            created_us, saved = decode_windows(data)
+        except CheckpointError as e:
+            self.logger.warning(f"Ignoring window checkpoint {self.path}: {e}")
+            return 0
+
+        restored = 0
+        for item_type, (amounts, timestamps, bidders) in saved.items():
+            window = self.windows.get(item_type)
+            if window is None:
+                continue
+            for index in range(len(amounts)):
+                window.append(amounts[index], timestamps[index] / 1_000_000, bidders[16 * index:16 * index + 16])
+            window.expire()
+            restored += window.count
+        age = time.time() - created_us / 1_000_000
+        self.logger.info(f"Restored {restored} bids from {self.path} (checkpoint age {age:.1f}s) "
+                         f"in {(time.perf_counter() - started) * 1000:.2f}ms.")
+        return restored
+
+    def maybe_checkpoint(self):
+        """Take a checkpoint if the interval has passed. Cheap enough to call for every bid."""
+        if time.monotonic() >= self.next_checkpoint:
+            self.checkpoint()
+
+    def checkpoint(self) -> bool:
+        """
+        Captures the windows and queues the snapshot for writing.
+
+        Returns:
+            bool: True if a snapshot was queued (False if nothing changed since the last one)
+        """
+        self.next_checkpoint = time.monotonic() + self.interval
+        changed = False
+        for item_type, window in self.windows.items():
+            cached = self.encoded.get(item_type)
+            if cached is None or cached[0] != window.next_seq:
+                self.encoded[item_type] = (window.next_seq, encode_window(item_type, window))
+                changed = True
+        if not changed:
+            self.stats['skipped'] += 1
+            return False
+
+        header = HEADER.pack(MAGIC, VERSION, int(time.time() * 1_000_000), len(self.encoded))
+        snapshot = header + b''.join(encoded for _, encoded in self.encoded.values())
+        try:
+            self.pending.put_nowait(snapshot)
+        except queue.Full:
+            try:
+                self.pending.get_nowait()  # Replace the older snapshot still waiting to be written
+            except queue.Empty:
+                pass
+            self.pending.put_nowait(snapshot)
+        self.stats['checkpoints'] += 1
+        return True
+
+    def write(self, snapshot: bytes):
+        """Atomically replace the snapshot file."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(snapshot)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self.stats['written'] += 1
+        self.stats['bytes'] = len(snapshot)
+
+    def run_writer(self):
+        while True:
+            snapshot = self.pending.get()
+            if snapshot is None:
+                return
+            try:
+                self.write(snapshot)
+            except OSError as e:
+                self.stats['failures'] += 1
+                self.logger.error(f"Failed to write window checkpoint {self.path}: {e}")
+
+    def close(self):
+        """Take a final checkpoint, wait for it to be written, and stop the writer thread."""
+        self.checkpoint()
+        self.pending.put(None)
+        self.writer.join()
+        self.logger.info(f"Window checkpointer stats: {self.stats}")